@@ -1,5 +1,3 @@
-from modulo.processamento import extrair_dados_da_imagem
-from modulo.recomendacao import recomendar_roupas
 from modulo.interface import mostrar_interface
 
 mostrar_interface()
\ No newline at end of file
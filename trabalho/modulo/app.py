@@ -1,17 +1,35 @@
 import streamlit as st
 import cv2
 import numpy as np
-import pandas as pd
-from PIL import ImageFont, ImageDraw, Image
+from PIL import Image
 import io
-import base64
 import os
 import traceback
 import glob
+from functools import lru_cache
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from aquecimento import aquecer
+from cache import CacheLRU, hash_conteudo
+from cores import bgr_para_hex
+from exportacao import codificar, formato_do_arquivo, para_pil, tipo_mime
+from miniaturas import LojaMiniaturas
+from tarefas import AnaliseCancelada, TrabalhoAnalise
+from tempos import Cronometro, resumo
+from texto import Texto, desenhar_textos
+
+# Optional local analysis service (python servico.py): when set, uploads are sent there
+# and this process never loads the MediaPipe models itself
+SERVICO_ANALISE = os.environ.get("ANALISE_SERVICO")
 
 # Try to import your custom functions - with error handling
 try:
-    from processamento import extrair_dados_da_imagem
+    if SERVICO_ANALISE:
+        from servico import ClienteAnalise
+
+        ETAPAS_EXTRACAO = ('servico',)
+    else:
+        from processamento import ETAPAS_EXTRACAO, extrair_dados_da_imagem
+        from modelos import obter_pool
 
     PROCESSAMENTO_AVAILABLE = True
 except ImportError:
@@ -19,7 +37,7 @@ except ImportError:
     PROCESSAMENTO_AVAILABLE = False
 
 try:
-    from recomendacao import recomendar_roupas
+    from recomendacao import recomendar_roupas, recomendar_cores
 
     RECOMENDACAO_AVAILABLE = True
 except ImportError:
@@ -71,109 +89,173 @@ def pil_to_opencv(pil_image):
     return open_cv_image
 
 
-def opencv_to_base64(cv_img):
-    """Convert OpenCV image to base64 for display in Streamlit"""
-    _, buffer = cv2.imencode('.png', cv_img)
-    img_base64 = base64.b64encode(buffer).decode()
-    return f"data:image/png;base64,{img_base64}"
-
-
 def opencv_to_pil(cv_img):
-    """Convert OpenCV image to PIL using io buffer"""
-    # Convert BGR to RGB
-    cv_img_rgb = cv2.cvtColor(cv_img, cv2.COLOR_BGR2RGB)
-    # Encode to PNG in memory
-    _, buffer = cv2.imencode('.png', cv_img_rgb)
-    # Use io.BytesIO to create a bytes buffer
-    img_buffer = io.BytesIO(buffer)
-    # Convert to PIL Image
-    pil_img = Image.open(img_buffer)
-    return pil_img
+    """Convert OpenCV image to PIL straight from its BGR bytes (no PNG round-trip)"""
+    return para_pil(cv_img)
 
 
-def create_downloadable_image(cv_img, filename="analysis_result.png"):
-    """Create a downloadable image using io buffer"""
-    # Convert to PIL first
-    pil_img = opencv_to_pil(cv_img)
+def create_downloadable_image(cv_img, filename="analysis_result.png", qualidade=None):
+    """Create a downloadable image: encoded once per image and format (taken from the file extension)"""
+    formato = formato_do_arquivo(filename)
+    return codificar(cv_img, formato, qualidade), filename
 
-    # Create buffer for download
-    buffer = io.BytesIO()
-    pil_img.save(buffer, format='PNG')
-    buffer.seek(0)
 
-    return buffer.getvalue(), filename
+def download_image_button(label, cv_img, filename):
+    """Download button for an OpenCV image; reruns reuse the bytes encoded for the same array"""
+    img_data, filename = create_downloadable_image(cv_img, filename)
+    st.download_button(label=label, data=img_data, file_name=filename,
+                       mime=tipo_mime(formato_do_arquivo(filename)))
 
 
-def criar_painel_cores(medidas):
-    """Create a color panel showing extracted colors"""
+@lru_cache(maxsize=16)
+def layout_painel_cores(titulos):
+    """Static part of the color panel (background + one header per tone), shared read-only"""
     painel = np.full((400, 600, 3), 240, dtype=np.uint8)
-    y_pos = 50
-
-    def desenhar_texto_com_acentos(img_cv2, texto, pos, cor=(0, 0, 0), tamanho=20):
-        img_pil = Image.fromarray(cv2.cvtColor(img_cv2, cv2.COLOR_BGR2RGB))
-        draw = ImageDraw.Draw(img_pil)
-        fonte = ImageFont.truetype("arial.ttf", tamanho)
-
-        x, y = pos
-
-        # Apenas dois pontos de contorno leves
-        draw.text((x - 1, y - 1), texto, font=fonte, fill=cor)
-        draw.text((x + 1, y + 1), texto, font=fonte, fill=cor)
-
-        # Texto principal
-        draw.text((x, y), texto, font=fonte, fill=cor)
+    for i, titulo in enumerate(titulos):
+        cv2.putText(painel, titulo, (20, 50 + 80 * i),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 2)
+    painel.setflags(write=False)
+    return painel
 
-        return cv2.cvtColor(np.array(img_pil), cv2.COLOR_RGB2BGR)
 
+def criar_painel_cores(medidas):
+    """Create a color panel showing extracted colors"""
+    tons = []
     # Skin tone
     if 'tom_de_pele' in medidas:
-        cv2.putText(painel, "Tom de Pele:", (20, y_pos),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 2)
-        cor_pele = tuple(map(int, medidas['tom_de_pele']))
-        cv2.rectangle(painel, (200, y_pos - 20), (300, y_pos + 20), cor_pele, -1)
-        cv2.putText(painel, f"BGR: {list(cor_pele)}", (320, y_pos),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
-        y_pos += 80
-
+        tons.append(("Tom de Pele:", medidas['tom_de_pele']))
     # Hair tone
     if 'tom_de_cabelo' in medidas and not medidas.get('pouco_cabelo', True):
-        cv2.putText(painel, "Tom de Cabelo:", (20, y_pos),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 2)
-        cor_cabelo = tuple(map(int, medidas['tom_de_cabelo']))
-        cv2.rectangle(painel, (200, y_pos - 20), (300, y_pos + 20), cor_cabelo, -1)
-        cv2.putText(painel, f"BGR: {list(cor_cabelo)}", (320, y_pos),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
-        y_pos += 80
-
+        tons.append(("Tom de Cabelo:", medidas['tom_de_cabelo']))
     # Eye tone
     if 'tom_de_olho' in medidas:
-        cv2.putText(painel, "Tom dos Olhos:", (20, y_pos),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 2)
-        cor_olho = tuple(map(int, medidas['tom_de_olho']))
-        cv2.rectangle(painel, (200, y_pos - 20), (300, y_pos + 20), cor_olho, -1)
-        cv2.putText(painel, f"BGR: {list(cor_olho)}", (320, y_pos),
+        tons.append(("Tom dos Olhos:", medidas['tom_de_olho']))
+
+    painel = layout_painel_cores(tuple(titulo for titulo, _ in tons)).copy()
+    y_pos = 50
+    for _, tom in tons:
+        cor = tuple(map(int, tom))
+        cv2.rectangle(painel, (200, y_pos - 20), (300, y_pos + 20), cor, -1)
+        cv2.putText(painel, f"BGR: {list(cor)}", (320, y_pos),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
         y_pos += 80
 
+    # Accented labels go through PIL, all of them in a single pass
+    textos = []
     # Classification
     if 'Classificação' in medidas:
-        texto = f"Contraste: {medidas['Classificação'].capitalize()}"
-        painel = desenhar_texto_com_acentos(painel, texto, (20, y_pos))
+        textos.append(Texto(f"Contraste: {medidas['Classificação'].capitalize()}", (20, y_pos)))
         y_pos += 40
 
     if 'Subtom' in medidas:
         cv2.putText(painel, f"Subtom: {medidas['Subtom'].capitalize()}", (20, y_pos),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
 
-    return painel
+    return desenhar_textos(painel, textos)
+
+
+@st.cache_resource
+def obter_pool_modelos():
+    """Model pool shared by every session of this server process"""
+    return obter_pool()
+
+
+@st.cache_resource
+def iniciar_aquecimento():
+    """Loads the models and runs a synthetic inference once per server process, in the background"""
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="aquecimento")
+    futuro = executor.submit(aquecer, obter_pool_modelos())
+    executor.shutdown(wait=False)
+    return futuro
+
+
+@st.cache_resource
+def obter_cache_analises():
+    """Analysis results keyed by a hash of the uploaded bytes, shared by every session"""
+    return CacheLRU(max_itens=128, max_bytes=512 * 1024 ** 2, ttl=60 * 60)
+
+
+@st.cache_resource
+def obter_executor_analises():
+    """Background threads running the uploads' analyses, shared by every session"""
+    tamanho = (os.cpu_count() or 1) if SERVICO_ANALISE else obter_pool_modelos().tamanho
+    return ThreadPoolExecutor(max_workers=tamanho, thread_name_prefix="analise")
+
+
+def executar_analise(cv_image, dados, chave, pool, cache, cronometro):
+    """Runs in a background thread (no st.* calls): analysis + visualizations, stored in the cache"""
+    if pool is None:
+        # Analysed by the local service: the pose landmarks stay there, so no skeleton overlay
+        analise, _ = ClienteAnalise(SERVICO_ANALISE).analisar(dados)
+        cronometro.marcar('servico')
+        etapas_servico, resultado = analise.tempos or [], None
+    else:
+        with pool.emprestar() as modelos:
+            analise, resultado = extrair_dados_da_imagem(cv_image, modelos, cronometro=cronometro)
+        etapas_servico = []
+    medidas = analise.como_dict()
+
+    # Create visualizations (their warnings travel with the result: st.warning can't run in this thread)
+    with cronometro.etapa('visualizacoes'):
+        visualizacoes, avisos = criar_visualizacoes(cv_image, medidas, resultado)
+
+    em_cache = (medidas, visualizacoes, etapas_servico + list(cronometro.etapas), avisos)
+    cache.guardar(chave, em_cache)
+    return em_cache
+
+
+def submeter_analise(image, dados, chave):
+    """Starts the analysis of a new upload, cancelling the one this session was waiting for"""
+    anterior = st.session_state.get('trabalho')
+    if anterior is not None:
+        anterior.cancelar()
+
+    st.session_state.trabalho = TrabalhoAnalise.submeter(
+        obter_executor_analises(), chave, executar_analise,
+        pil_to_opencv(image), dados, chave, None if SERVICO_ANALISE else obter_pool_modelos(),
+        obter_cache_analises(),
+        etapas_previstas=ETAPAS_EXTRACAO + ('visualizacoes',))
+    st.session_state.analysis_complete = False
+    st.session_state.pop('falha_analise', None)
+
+
+@st.fragment(run_every=0.5)
+def acompanhar_analise():
+    """Polls the session's background analysis; reruns the page once it finishes"""
+    trabalho = st.session_state.get('trabalho')
+    if trabalho is None:
+        return
+
+    if not trabalho.terminado():
+        fracao, etapa = trabalho.progresso()
+        st.progress(fracao, text=f"Analisando sua coloração pessoal... ({etapa or 'iniciando'})")
+        return
+
+    del st.session_state.trabalho
+    try:
+        *em_cache, avisos = trabalho.resultado()
+        st.session_state.medidas, st.session_state.visualizacoes, st.session_state.tempos = em_cache
+        st.session_state.analysis_complete = True
+        # Toasts outlive the rerun below, unlike st.warning
+        for aviso in avisos:
+            st.toast(aviso, icon="⚠️")
+    except (AnaliseCancelada, CancelledError):
+        return
+    except Exception as e:
+        st.session_state.falha_analise = (trabalho.chave, str(e), traceback.format_exc())
+    st.rerun()
 
 
 def criar_visualizacoes(imagem, medidas, resultado=None):
-    """Create visualizations replacing cv2.imshow()"""
+    """Create visualizations replacing cv2.imshow(); returns (visualizacoes, warnings to show the user)
+
+    Runs in the analysis worker thread, so it never calls st.* itself.
+    """
     visualizacoes = {}
+    avisos = []
 
-    # 1. Original image
-    visualizacoes['original'] = imagem.copy()
+    # 1. Original image (the decoded upload is never modified, so no copy is needed)
+    visualizacoes['original'] = imagem
 
     # 2. Body analysis (equivalent to your visualizar_resultados)
     if resultado and hasattr(resultado, 'pose_landmarks') and resultado.pose_landmarks:
@@ -192,17 +274,17 @@ def criar_visualizacoes(imagem, medidas, resultado=None):
             )
             visualizacoes['landmarks'] = imagem_landmarks
         except ImportError:
-            st.warning("MediaPipe não disponível para visualização de landmarks")
+            avisos.append("MediaPipe não disponível para visualização de landmarks")
 
     # 3. Color panel
     painel_cores = criar_painel_cores(medidas)
     visualizacoes['cores'] = painel_cores
 
-    return visualizacoes
+    return visualizacoes, avisos
 
 
-def gerar_recomendacoes_web(dicionario):
-    """Web version of clothing recommendation function"""
+def gerar_recomendacoes_web(dicionario, cronometro=None):
+    """Web version of clothing recommendation function (stage timings go to `cronometro` when given)"""
     try:
         # Try multiple paths for the CSV file
         possible_paths = [
@@ -221,100 +303,17 @@ def gerar_recomendacoes_web(dicionario):
         if not caminho_csv:
             st.error(
                 "❌ Arquivo CSV do catálogo não encontrado. Certifique-se de que 'catalogo_roupas.csv' está no diretório correto.")
-            return []
-
-        catalogo = pd.read_csv(caminho_csv)
-        catalogo.columns = catalogo.columns.str.strip().str.lower()
-
-        # Create copy of catalog
-        roupas_filtradas = catalogo.copy()
-
-        # Recommendation rules
-        classificacao = dicionario.get('Classificação', '').lower()
-        subtom = dicionario.get('Subtom', '').lower()
-        contraste = dicionario.get('Classificação', '').lower()
-        intensidade = dicionario.get('Intensidade', '').lower()
-        profundidade = dicionario.get('Profundidade', '').lower()
-        estacao = ''
-
-        if 'estação' in roupas_filtradas.columns:
-            if subtom == "quente":
-                if intensidade == "alta" and profundidade == "claro":
-                        roupas_filtradas = roupas_filtradas[roupas_filtradas['estação'].str.contains("primavera brilhante", case=False, na=False)]
-                        estacao = 'primavera brilhante'
-
-                elif intensidade == "baixa":
-                    if profundidade == "escuro":
-                        roupas_filtradas = roupas_filtradas[roupas_filtradas['estação'].str.contains("outono suave", case=False)]
-                        estacao = 'outono suave'
-                    else:
-                        roupas_filtradas = roupas_filtradas[roupas_filtradas['estação'].str.contains("primavera suave", case=False)]
-                        estacao = 'primavera suave'
+            return [], None
 
+        if not RECOMENDACAO_AVAILABLE:
+            st.error("❌ Módulo 'recomendacao' não disponível.")
+            return [], None
 
-                elif intensidade == "média":
-                    if profundidade == "claro":
-                        roupas_filtradas = roupas_filtradas[roupas_filtradas['estação'].str.contains("primavera clara", case=False)]
-                        estacao = 'primavera clara'
-                    else:
-                        roupas_filtradas = roupas_filtradas[roupas_filtradas['estação'].str.contains("outono puro", case=False)]
-                        estacao = 'outono puro'
-
-            elif subtom == "frio":
-                if intensidade == "alta" and (contraste == "médio contraste" or "baixo contraste escuro"):
-                    roupas_filtradas = roupas_filtradas[roupas_filtradas['estação'].str.contains("inverno brilhante", case=False)]
-                    estacao = 'inverno brilhante'
-                elif intensidade == "baixa":
-                    if profundidade == "claro":
-                        roupas_filtradas = roupas_filtradas[roupas_filtradas['estação'].str.contains("verão suave", case=False)]
-                        estacao = 'verão suave'
+        # Compiled, memory-mapped catalogue shared by all sessions (rebuilt when the CSV changes),
+        # colours ranked by harmony with the extracted tones
+        cores_bgr, _, estacao = recomendar_cores(dicionario, caminho_csv, cronometro=cronometro)
 
-                    else:
-                        roupas_filtradas = roupas_filtradas[roupas_filtradas['estação'].str.contains("inverno profundo", case=False)]
-                        estacao = 'inverno profundo'
-
-                elif intensidade == 'média':
-                    if profundidade == "claro":
-                        roupas_filtradas = roupas_filtradas[roupas_filtradas['estação'].str.contains("verão claro", case=False)]
-                        estacao = 'verão claro'
-
-                    else:
-                        roupas_filtradas = roupas_filtradas[roupas_filtradas['estação'].str.contains("inverno puro", case=False)]
-                        estacao = 'inverno puro'
-
-            elif subtom == "neutro":
-                if profundidade == "claro":
-                    roupas_filtradas = roupas_filtradas[roupas_filtradas['estação'].str.contains("verão suave", case=False)]
-                    estacao = 'verão suave'
-
-                else:
-                    roupas_filtradas = roupas_filtradas[roupas_filtradas['estação'].str.contains("outono suave", case=False)]
-                    estacao = 'outono suave'
-
-            elif subtom == "oliva":
-                if profundidade == "claro":
-                    roupas_filtradas = roupas_filtradas[roupas_filtradas['estação'].str.contains("primavera suave", case=False)]
-                    estacao = 'primavera suave'
-                else:
-                    roupas_filtradas = roupas_filtradas[roupas_filtradas['estação'].str.contains("outono profundo", case=False)]
-                    estacao = 'outono profundo'
-            else:
-                roupas_filtradas = f'Subtom:{subtom}, profundidade: {profundidade}, intensidade {intensidade}'
-                estacao = None
-
-        # Convert string "[146 28 63]" to list [146, 28, 63]
-        if 'cor bgr' in roupas_filtradas.columns:
-            roupas_filtradas["cor bgr"] = roupas_filtradas["cor bgr"].apply(
-                lambda x: list(map(int, str(x).strip("[]").split())) if pd.notna(x) else [0, 0, 0]
-            )
-
-        # Extract colors
-        cores_bgr = []
-        for _, row in roupas_filtradas.iterrows():
-            if 'cor bgr' in row and isinstance(row['cor bgr'], list) and len(row['cor bgr']) == 3:
-                cores_bgr.append(row['cor bgr'])
-
-        return cores_bgr, estacao
+        return cores_bgr.tolist(), estacao
 
     except Exception as e:
         st.error(f"Erro ao processar recomendações: {str(e)}")
@@ -344,9 +343,8 @@ def create_color_palette_report(cores_bgr, medidas):
     report_buffer.write("CORES RECOMENDADAS (RGB):\n")
     report_buffer.write("-" * 30 + "\n")
 
-    for i, cor_bgr in enumerate(cores_bgr, 1):
+    for i, (cor_bgr, cor_hex) in enumerate(zip(cores_bgr, bgr_para_hex(cores_bgr)), 1):
         cor_rgb = (cor_bgr[2], cor_bgr[1], cor_bgr[0])  # Convert BGR to RGB
-        cor_hex = f"#{cor_rgb[0]:02x}{cor_rgb[1]:02x}{cor_rgb[2]:02x}"
         report_buffer.write(f"Cor {i:2d}: RGB{cor_rgb} - HEX: {cor_hex}\n")
 
     report_buffer.write(f"\nTotal de cores recomendadas: {len(cores_bgr)}\n")
@@ -359,49 +357,46 @@ def create_color_palette_report(cores_bgr, medidas):
     return content
 
 
+def html_grade_cores(cores_bgr, cols_per_row=5):
+    """Whole palette as one HTML block"""
+    cores_bgr = np.asarray(cores_bgr, dtype=np.uint8).reshape(-1, 3)
+    celulas = "".join(
+        f'<div style="text-align: center;">'
+        f'<div style="width: 80px; height: 80px; background-color: {cor_hex}; border: 2px solid #ddd; '
+        f'border-radius: 8px; margin: 5px auto;"></div>'
+        f'<p style="font-size: 10px; margin: 0;">RGB: ({r}, {g}, {b})</p></div>'
+        for cor_hex, (b, g, r) in zip(bgr_para_hex(cores_bgr), cores_bgr.tolist())
+    )
+    return (f'<div style="display: grid; grid-template-columns: repeat({cols_per_row}, 1fr); gap: 8px;">'
+            f'{celulas}</div>')
+
+
 def display_color_grid(cores_bgr):
-    """Display colors in a grid format"""
+    """Display colors in a grid format (a single Streamlit element)"""
     if not cores_bgr:
         st.warning("Nenhuma cor encontrada para exibir.")
         return
 
-    # Create color grid
-    cols_per_row = 5
-    rows = len(cores_bgr) // cols_per_row + (1 if len(cores_bgr) % cols_per_row else 0)
-
-    for row in range(rows):
-        cols = st.columns(cols_per_row)
-        for col_idx in range(cols_per_row):
-            color_idx = row * cols_per_row + col_idx
-            if color_idx < len(cores_bgr):
-                with cols[col_idx]:
-                    cor_bgr = cores_bgr[color_idx]
-                    # Convert BGR to RGB for correct display
-                    cor_rgb = (cor_bgr[2], cor_bgr[1], cor_bgr[0])
-                    cor_hex = f"#{cor_rgb[0]:02x}{cor_rgb[1]:02x}{cor_rgb[2]:02x}"
-
-                    # Create colored square
-                    st.markdown(f"""
-                    <div style="
-                        width: 80px; 
-                        height: 80px; 
-                        background-color: {cor_hex}; 
-                        border: 2px solid #ddd;
-                        border-radius: 8px;
-                        margin: 5px auto;
-                    "></div>
-                    <p style="text-align: center; font-size: 10px; margin: 0;">
-                        RGB: {cor_rgb}
-                    </p>
-                    """, unsafe_allow_html=True)
-
-
-def exibir_imagens_roupas(caminho_imagens=r"C:\Users\HOME\PycharmProjects\trabalhoFinal\trabalho\data\imagens_roupas"):
+    st.markdown(html_grade_cores(cores_bgr), unsafe_allow_html=True)
+
+
+CAMINHO_IMAGENS_ROUPAS = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '../../trabalho/data/imagens_roupas'))
+
+
+@st.cache_resource
+def obter_loja_miniaturas(caminho_imagens):
+    """Thumbnail store for a garment photo directory, shared by every session"""
+    return LojaMiniaturas(caminho_imagens)
+
+
+def exibir_imagens_roupas(caminho_imagens=CAMINHO_IMAGENS_ROUPAS, por_pagina=24):
     """
-    Função para ler e exibir imagens de roupas no Streamlit
+    Função para exibir as imagens de roupas no Streamlit, em páginas de miniaturas
 
     Args:
         caminho_imagens (str): Caminho para o diretório das imagens
+        por_pagina (int): Quantidade de miniaturas por página
     """
 
     # Verificar se o diretório existe
@@ -409,27 +404,10 @@ def exibir_imagens_roupas(caminho_imagens=r"C:\Users\HOME\PycharmProjects\trabal
         st.error(f"Diretório não encontrado: {caminho_imagens}")
         return
 
-    # Extensões de imagem suportadas
-    extensoes = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp']
-
-    # Buscar todas as imagens no diretório
-    imagens = []
+    # Gera miniaturas só para fotos novas ou alteradas (as demais nem são abertas)
+    loja = obter_loja_miniaturas(caminho_imagens)
     try:
-        # Listar todos os arquivos no diretório
-        arquivos = os.listdir(caminho_imagens)
-
-        for arquivo in arquivos:
-            # Verificar se o arquivo tem uma extensão de imagem válida
-            nome, ext = os.path.splitext(arquivo.lower())
-            if ext in extensoes:
-                caminho_completo = os.path.join(caminho_imagens, arquivo)
-                imagens.append(caminho_completo)
-
-        # Remover duplicatas (caso existam)
-        imagens = list(set(imagens))
-        # Ordenar para manter consistência
-        imagens.sort()
-
+        loja.sincronizar()
     except PermissionError:
         st.error("Sem permissão para acessar o diretório.")
         return
@@ -437,7 +415,7 @@ def exibir_imagens_roupas(caminho_imagens=r"C:\Users\HOME\PycharmProjects\trabal
         st.error(f"Erro ao acessar o diretório: {str(e)}")
         return
 
-    if not imagens:
+    if not len(loja):
         st.warning("Nenhuma imagem encontrada no diretório especificado.")
         return
 
@@ -445,24 +423,20 @@ def exibir_imagens_roupas(caminho_imagens=r"C:\Users\HOME\PycharmProjects\trabal
     num_colunas = 4
     largura_imagem = 200
 
+    # Só as miniaturas da página visível são enviadas ao navegador
+    total_paginas = loja.total_paginas(por_pagina)
+    pagina = 1
+    if total_paginas > 1:
+        pagina = st.number_input("Página", min_value=1, max_value=total_paginas, value=1, step=1,
+                                 key="pagina_galeria")
+
     # Criar layout de colunas para as imagens
     colunas = st.columns(num_colunas)
 
     # Exibir as imagens
-    for i, caminho_imagem in enumerate(imagens):
-        try:
-            # Abrir a imagem
-            img = Image.open(caminho_imagem)
-
-            # Calcular coluna atual
-            col_atual = i % num_colunas
-
-            with colunas[col_atual]:
-                # Exibir a imagem
-                st.image(img, width=largura_imagem, use_container_width=False)
-
-        except Exception as e:
-            st.error(f"Erro ao carregar imagem {os.path.basename(caminho_imagem)}: {str(e)}")
+    for i, (nome, caminho_miniatura) in enumerate(loja.pagina(pagina - 1, por_pagina)):
+        with colunas[i % num_colunas]:
+            st.image(caminho_miniatura, width=largura_imagem, caption=nome)
 
 
 # def exibir_imagem_individual(
@@ -521,6 +495,9 @@ def exibir_imagens_roupas(caminho_imagens=r"C:\Users\HOME\PycharmProjects\trabal
 #             st.error(f"Erro ao carregar a imagem: {str(e)}")
 
 def main():
+    # Model warm-up starts with the first page load, so the first analysis finds them ready
+    aquecimento = iniciar_aquecimento() if PROCESSAMENTO_AVAILABLE and not SERVICO_ANALISE else None
+
     # Header
     st.markdown('<h1 class="main-header">🎨 Análise de Coloração Pessoal</h1>', unsafe_allow_html=True)
     st.markdown("**Upload uma foto para análise completa das suas características de cor e estilo!**")
@@ -546,6 +523,15 @@ def main():
         - Recomendações de cores para roupas
         """)
 
+        if aquecimento is not None:
+            if not aquecimento.done():
+                st.caption("🔥 Carregando os modelos de análise...")
+            elif aquecimento.exception() is not None:
+                st.caption(f"⚠️ Falha no aquecimento: {aquecimento.exception()}")
+            else:
+                with st.expander("🔥 Aquecimento do servidor"):
+                    st.dataframe(resumo(aquecimento.result()), use_container_width=True)
+
     # File upload
     uploaded_file = st.file_uploader(
         "Escolha uma imagem",
@@ -571,27 +557,29 @@ def main():
                     "Módulo de processamento não disponível. Verifique se o arquivo 'processamento.py' está presente.")
                 st.stop()  # Use stop() em vez de return para interromper a execução
 
-            # Executa a análise automaticamente
-            with st.spinner("Analisando sua coloração pessoal..."):
-                try:
-                    # Convert PIL to OpenCV
-                    cv_image = pil_to_opencv(image)
-
-                    # Call your analysis function
-                    medidas, resultado = extrair_dados_da_imagem(cv_image)
-
-                    # Create visualizations
-                    visualizacoes = criar_visualizacoes(cv_image, medidas, resultado)
-
-                    # Store in session_state
-                    st.session_state.medidas = medidas
-                    st.session_state.visualizacoes = visualizacoes
-                    st.session_state.analysis_complete = True
-
-
-                except Exception as e:
-                    st.error(f"Erro na análise: {str(e)}")
-                    st.code(traceback.format_exc())
+            # Reruns with the same upload (any widget interaction) reuse the cached analysis
+            dados = uploaded_file.getvalue()
+            chave = hash_conteudo(dados)
+            em_cache = obter_cache_analises().obter(chave)
+            trabalho = st.session_state.get('trabalho')
+            falha = st.session_state.get('falha_analise')
+
+            if em_cache is not None:
+                # Store in session_state (a job for an older upload is no longer needed)
+                if trabalho is not None:
+                    trabalho.cancelar()
+                    del st.session_state.trabalho
+                st.session_state.medidas, st.session_state.visualizacoes, st.session_state.tempos, _ = em_cache
+                st.session_state.analysis_complete = True
+            elif falha is not None and falha[0] == chave:
+                st.error(f"Erro na análise: {falha[1]}")
+                st.code(falha[2])
+            elif trabalho is None or trabalho.chave != chave:
+                # Executa a análise automaticamente, em segundo plano: a página continua respondendo
+                submeter_analise(image, dados, chave)
+
+            if 'trabalho' in st.session_state:
+                acompanhar_analise()
 
 
             # Display results if they exist - MOVED INSIDE COL2
@@ -625,6 +613,18 @@ def main():
                     else:
                         st.info("Análise de cores não disponível")
 
+                # Downloads of the analysis images (kept in the cached result, encoded once each)
+                visualizacoes = st.session_state.get('visualizacoes', {})
+                try:
+                    if 'landmarks' in visualizacoes:
+                        download_image_button("📥 Baixar Análise de Landmarks", visualizacoes['landmarks'],
+                                              "landmarks_analysis.png")
+                    if 'cores' in visualizacoes:
+                        download_image_button("📥 Baixar Painel de Cores", visualizacoes['cores'],
+                                              "color_analysis.png")
+                except Exception as e:
+                    st.error(f"Erro ao preparar download: {e}")
+
         # Section 2: Visualizations
         # st.divider()
         # st.subheader("🖼️ Visualizações da Análise")
@@ -685,34 +685,41 @@ def main():
         st.divider()
         st.subheader("👗 Recomendações de Cores")
 
-        with st.spinner("Buscando roupas ideais para você..."):
-            try:
-                cores_recomendadas, estacao = gerar_recomendacoes_web(st.session_state.medidas)
-
-                if cores_recomendadas:
-                    st.subheader(f"🎨PARABÉNS! A sua estação é {estacao.capitalize()}")
-                    display_color_grid(cores_recomendadas)
-
-                    # Create downloadable color palette
-                    try:
-                        palette_data = create_color_palette_report(cores_recomendadas, st.session_state.medidas)
-                        st.download_button(
-                            label="📥 Baixar Relatório de Cores",
-                            data=palette_data,
-                            file_name="color_palette_report.txt",
-                            mime="text/plain"
-                        )
-                    except Exception as e:
-                        st.error(f"Erro ao criar relatório: {e}")
-                else:
-                    resultado = gerar_recomendacoes_web(st.session_state.medidas)
-                    st.write("Resultado da função:", resultado)
-                    st.warning(
-                        "⚠️ Nenhuma roupa recomendada encontrada. Verifique se o arquivo CSV do catálogo está disponível.")
-
-            except Exception as e:
-                st.error(f"Erro nas recomendações: {str(e)}")
-                st.code(traceback.format_exc())
+        # Recommendations need the finished analysis; the gallery below works while it runs
+        analise_pronta = st.session_state.get('analysis_complete', False) and 'medidas' in st.session_state
+        cronometro_recomendacao = Cronometro()
+        if not analise_pronta:
+            st.info("As recomendações aparecem assim que a análise terminar. Enquanto isso, veja as roupas abaixo.")
+        else:
+            with st.spinner("Buscando roupas ideais para você..."):
+                try:
+                    cores_recomendadas, estacao = gerar_recomendacoes_web(st.session_state.medidas,
+                                                                          cronometro_recomendacao)
+
+                    if cores_recomendadas:
+                        st.subheader(f"🎨PARABÉNS! A sua estação é {estacao.capitalize()}")
+                        display_color_grid(cores_recomendadas)
+
+                        # Create downloadable color palette
+                        try:
+                            palette_data = create_color_palette_report(cores_recomendadas, st.session_state.medidas)
+                            st.download_button(
+                                label="📥 Baixar Relatório de Cores",
+                                data=palette_data,
+                                file_name="color_palette_report.txt",
+                                mime="text/plain"
+                            )
+                        except Exception as e:
+                            st.error(f"Erro ao criar relatório: {e}")
+                    else:
+                        resultado = gerar_recomendacoes_web(st.session_state.medidas)
+                        st.write("Resultado da função:", resultado)
+                        st.warning(
+                            "⚠️ Nenhuma roupa recomendada encontrada. Verifique se o arquivo CSV do catálogo está disponível.")
+
+                except Exception as e:
+                    st.error(f"Erro nas recomendações: {str(e)}")
+                    st.code(traceback.format_exc())
 
         # Section 4: Clothing recommendations
         st.divider()
@@ -732,9 +739,26 @@ def main():
         #     else:
         #         exibir_imagem_individual()
 
+        if not analise_pronta:
+            return
+
         # Complete dictionary (expandable)
         with st.expander("📋 Ver Dicionário Completo de Análise"):
             st.json(st.session_state.medidas)
 
+        # Stage timings of the analysis (as first computed; cached reruns keep them) and of this recommendation
+        with st.expander("⏱️ Tempos por etapa"):
+            etapas = st.session_state.get('tempos') or []
+            st.markdown(f"**Análise:** {sum(e['duracao_ns'] for e in etapas) / 1e6:.1f} ms")
+            st.dataframe(resumo(etapas), use_container_width=True)
+            st.markdown(f"**Recomendação:** {cronometro_recomendacao.total_ms():.1f} ms")
+            st.dataframe(cronometro_recomendacao.resumo(), use_container_width=True)
+
+    else:
+        # Upload removed: nothing left to wait for
+        trabalho = st.session_state.pop('trabalho', None)
+        if trabalho is not None:
+            trabalho.cancelar()
+
 if __name__ == "__main__":
     main()
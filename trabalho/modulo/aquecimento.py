@@ -0,0 +1,92 @@
+"""Aquecimento do servidor: paga a partida a frio antes do primeiro usuário.
+
+Importa as dependências pesadas (o MediaPipe, que por sua vez carrega o
+matplotlib), cria os modelos do pool, roda uma inferência sintética em cada
+conjunto e compila/consulta o catálogo. Cada passo vira uma etapa de um
+Cronometro, então os tempos de importação e de aquecimento aparecem no mesmo
+formato das análises (resumo, trace do Chrome).
+
+Uso:
+    python aquecimento.py            # tempos de uma partida a frio, em JSON
+    python aquecimento.py -n 4       # aquece 4 conjuntos de modelos
+"""
+import argparse
+import importlib
+import json
+import sys
+from contextlib import ExitStack
+
+import numpy as np
+
+from tempos import Cronometro, resumo
+
+LADO_SINTETICO = 640  # maior lado da imagem da inferência de aquecimento
+
+
+def imagem_sintetica(lado=LADO_SINTETICO, semente=0):
+    # RUÍDO BGR: SEM ROSTO, MAS PERCORRE TODO O GRAFO DE DETECÇÃO DO POSE E DO FACE MESH
+    gerador = np.random.default_rng(semente)
+    return gerador.integers(0, 256, (lado * 3 // 4, lado, 3), dtype=np.uint8)
+
+
+def aquecer(pool=None, conjuntos=1, catalogo=True, cronometro=None):
+    """Aquece `conjuntos` ConjuntoModelos do pool (o do processo se omitido) e o catálogo.
+
+    Retorna as etapas do Cronometro: importar_mediapipe, importar_processamento,
+    carregar_modelos, inferencia_sintetica e, com `catalogo`, carregar_catalogo
+    e recomendacao.
+    """
+    cronometro = Cronometro() if cronometro is None else cronometro
+    cronometro.reiniciar()
+    primeira_etapa = len(cronometro)
+
+    importlib.import_module('mediapipe')
+    cronometro.marcar('importar_mediapipe')
+    processamento = importlib.import_module('processamento')
+    processamento.tabela_cabelo()  # TABELA DE CORES DO CABELO, CALCULADA UMA VEZ POR PROCESSO
+    cronometro.marcar('importar_processamento')
+
+    if pool is None:
+        from modelos import obter_pool
+        pool = obter_pool()
+    conjuntos = max(1, min(conjuntos, pool.tamanho))
+
+    # EMPRESTA TODOS AO MESMO TEMPO PARA O POOL CRIAR `conjuntos` DIFERENTES
+    imagem = imagem_sintetica()
+    with ExitStack() as pilha:
+        emprestados = [pilha.enter_context(pool.emprestar()) for _ in range(conjuntos)]
+        cronometro.marcar('carregar_modelos', conjuntos=conjuntos)
+        for modelos in emprestados:
+            try:
+                processamento.extrair_dados_da_imagem(imagem, modelos)
+            except ValueError:  # SEM ROSTO NA IMAGEM SINTÉTICA: ESPERADO
+                pass
+        cronometro.marcar('inferencia_sintetica', conjuntos=conjuntos)
+
+    if catalogo:
+        from catalogo import carregar_catalogo
+        from exemplos import MEDIDAS_EXEMPLO
+        from recomendacao import recomendar_cores
+
+        catalogo_carregado = carregar_catalogo()
+        catalogo_carregado.colunas_delta_e  # L*a*b* E TERMOS DO ΔE2000 DO CATÁLOGO INTEIRO, CALCULADOS UMA VEZ
+        cronometro.marcar('carregar_catalogo', linhas=len(catalogo_carregado))
+        recomendar_cores(MEDIDAS_EXEMPLO)
+        cronometro.marcar('recomendacao')
+
+    return cronometro.etapas[primeira_etapa:]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aquece modelos e catálogo e mostra os tempos da partida a frio.")
+    parser.add_argument("-n", "--conjuntos", type=int, default=1, help="conjuntos de modelos a aquecer")
+    parser.add_argument("--sem-catalogo", action="store_true", help="não compila nem consulta o catálogo")
+    args = parser.parse_args(argv)
+
+    etapas = aquecer(conjuntos=args.conjuntos, catalogo=not args.sem_catalogo)
+    print(json.dumps(resumo(etapas), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+"""Benchmarks reprodutíveis da extração e da recomendação, sem interface gráfica.
+
+Cada cenário roda num processo novo (spawn), então a latência "fria" inclui de
+verdade a primeira inferência e o pico de memória (RSS) é só daquele cenário.
+
+  - extração: as imagens de ../data/imagens_testes redimensionadas para cada
+    resolução (maior lado); mede carga dos modelos, primeira imagem, latência
+    quente (mediana e p95), imagens por segundo e a mediana de cada etapa;
+  - recomendação: catálogos sintéticos (o CSV real replicado com cores
+    perturbadas, semente fixa) de 1 mil, 100 mil e 1 milhão de linhas; mede a
+    compilação + primeira consulta e a latência quente de recomendar_cores
+    (o que o app chama em gerar_recomendacoes_web) e de recomendar_roupas.
+
+Imagens em que o rosto não é encontrado naquela resolução (ValueError) são
+contadas em `falhas` e ficam fora da mediana, do p95 e de imagens_por_s.
+
+O resultado é um JSON comparado com benchmark_base.json (versionado ao lado
+deste arquivo; outra execução com --base, nenhuma com --sem-base): o processo
+termina com código 1 se alguma métrica piorou além da tolerância. Para
+atualizar a base depois de uma melhoria, grave a saída por cima dela.
+
+Uso:
+    python benchmark.py -o benchmark.json
+    python benchmark.py --base outra_base.json --tolerancia 0.2
+    python benchmark.py --so recomendacao --linhas 1000 100000
+    python benchmark.py -o benchmark_base.json --sem-base   # nova base
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+from exemplos import MEDIDAS_EXEMPLO
+
+PASTA_FIXTURES = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../trabalho/data/imagens_testes'))
+FIXTURES = ('mulher.jpg', 'homem_negro.jpg', 'idoso.jpg', 'mulher_loira.jpg')
+RESOLUCOES = (640, 1280, 2560)
+LINHAS_CATALOGO = (1_000, 100_000, 1_000_000)
+REPETICOES = 5
+SEMENTE = 1234
+FORMATO = 2  # aumente quando o formato do JSON mudar
+BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_base.json')
+
+# MÉTRICAS COMPARADAS COM A BASE (TODAS "MENOR É MELHOR")
+METRICAS_COMPARADAS = ('carregar_modelos_ms', 'frio_ms', 'quente_mediana_ms', 'quente_p95_ms',
+                       'roupas_mediana_ms', 'pico_rss_mb')
+
+
+def pico_rss_mb():
+    # PICO DE MEMÓRIA RESIDENTE DO PROCESSO (None ONDE resource NÃO EXISTE, ex.: WINDOWS)
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(pico / 1024 ** 2 if sys.platform == 'darwin' else pico / 1024, 1)
+
+
+def _ms(inicio):
+    return (time.perf_counter_ns() - inicio) / 1e6
+
+
+def _estatisticas(tempos_ms):
+    if not tempos_ms:
+        return {'quente_mediana_ms': None, 'quente_p95_ms': None}
+    ordenados = sorted(tempos_ms)
+    p95 = ordenados[min(len(ordenados) - 1, int(round(0.95 * (len(ordenados) - 1))))]
+    return {'quente_mediana_ms': round(statistics.median(ordenados), 3), 'quente_p95_ms': round(p95, 3)}
+
+
+def redimensionar(imagem, lado):
+    # MAIOR LADO = `lado` (REDUZ OU AMPLIA)
+    import cv2
+
+    escala = lado / max(imagem.shape[:2])
+    tamanho = (max(1, round(imagem.shape[1] * escala)), max(1, round(imagem.shape[0] * escala)))
+    interpolacao = cv2.INTER_AREA if escala < 1 else cv2.INTER_CUBIC
+    return cv2.resize(imagem, tamanho, interpolation=interpolacao)
+
+
+def cenario_extracao(lado, fixtures=FIXTURES, repeticoes=REPETICOES):
+    from lote import ler_imagem
+
+    imagens = [redimensionar(ler_imagem(os.path.join(PASTA_FIXTURES, nome)), lado) for nome in fixtures]
+
+    inicio = time.perf_counter_ns()
+    from modelos import ConjuntoModelos
+    from processamento import extrair_dados_da_imagem
+    modelos = ConjuntoModelos()
+    carregar_ms = _ms(inicio)
+
+    def analisar(imagem):
+        try:
+            analise, _ = extrair_dados_da_imagem(imagem, modelos)
+            return analise.tempos
+        except ValueError:  # rosto não encontrado nessa resolução
+            return None
+
+    inicio = time.perf_counter_ns()
+    analisar(imagens[0])
+    frio_ms = _ms(inicio)
+
+    # SÓ AS ANÁLISES QUE TERMINARAM ENTRAM NOS TEMPOS: UMA FALHA PARA CEDO E DEIXARIA A MEDIANA MAIS RÁPIDA
+    tempos, etapas, falhas = [], {}, 0
+    for _ in range(repeticoes):
+        for imagem in imagens:
+            inicio = time.perf_counter_ns()
+            etapas_imagem = analisar(imagem)
+            duracao = _ms(inicio)
+            if etapas_imagem is None:
+                falhas += 1
+                continue
+            tempos.append(duracao)
+            for etapa in etapas_imagem:
+                etapas.setdefault(etapa['nome'], []).append(etapa['duracao_ns'] / 1e6)
+    modelos.fechar()
+
+    return {
+        'cenario': f'extracao_{lado}',
+        'imagens': len(imagens) * repeticoes,
+        'falhas': falhas,
+        'carregar_modelos_ms': round(carregar_ms, 3),
+        'frio_ms': round(frio_ms, 3),
+        **_estatisticas(tempos),
+        'imagens_por_s': round(1000 * len(tempos) / sum(tempos), 3) if tempos else None,
+        'etapas_mediana_ms': {nome: round(statistics.median(v), 3) for nome, v in etapas.items()},
+        'pico_rss_mb': pico_rss_mb(),
+    }
+
+
+def gerar_catalogo_sintetico(linhas, destino, semente=SEMENTE):
+    """Replica o catálogo real até `linhas` linhas, com cores perturbadas (±12 por canal)."""
+    import pandas as pd
+
+    from catalogo import CAMINHO_CSV
+
+    base = pd.read_csv(CAMINHO_CSV, dtype=str, keep_default_na=False)
+    base.columns = base.columns.str.strip()
+    gerador = np.random.default_rng(semente)
+    tabela = base.iloc[gerador.integers(0, len(base), linhas)].reset_index(drop=True)
+
+    cores = np.array(tabela['cor bgr'].str.strip('[] ').str.split().tolist(), dtype=np.int16)
+    cores = np.clip(cores + gerador.integers(-12, 13, cores.shape), 0, 255)
+    b, g, r = (pd.Series(canal).astype(str) for canal in cores.T)
+    tabela['cor bgr'] = '[' + b + ' ' + g + ' ' + r + ']'
+
+    caminho = os.path.join(destino, f'catalogo_{linhas}.csv')
+    tabela.to_csv(caminho, index=False)
+    return caminho
+
+
+def cenario_recomendacao(linhas, repeticoes=REPETICOES):
+    pasta = tempfile.mkdtemp(prefix='benchmark_catalogo_')
+    try:
+        caminho = gerar_catalogo_sintetico(linhas, pasta)
+
+        inicio = time.perf_counter_ns()
+        from recomendacao import recomendar_cores, recomendar_roupas
+        recomendar_cores(MEDIDAS_EXEMPLO, caminho)  # compila o CSV + primeira consulta
+        frio_ms = _ms(inicio)
+
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter_ns()
+            cores, _, _ = recomendar_cores(MEDIDAS_EXEMPLO, caminho)
+            tempos.append(_ms(inicio))
+
+        tempos_roupas = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter_ns()
+            recomendar_roupas(MEDIDAS_EXEMPLO, caminho_csv=caminho)
+            tempos_roupas.append(_ms(inicio))
+
+        return {
+            'cenario': f'recomendacao_{linhas}',
+            'linhas': linhas,
+            'recomendadas': len(cores),
+            'frio_ms': round(frio_ms, 3),
+            **_estatisticas(tempos),
+            'roupas_mediana_ms': round(statistics.median(tempos_roupas), 3),
+            'pico_rss_mb': pico_rss_mb(),
+        }
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+def executar(cenarios):
+    """Roda cada (função, argumentos) num processo novo e retorna os resultados na ordem."""
+    contexto = multiprocessing.get_context('spawn')
+    resultados = []
+    for funcao, argumentos in cenarios:
+        with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+            resultado = executor.submit(funcao, *argumentos).result()
+        if resultado['quente_mediana_ms'] is None:
+            quente = "nenhuma análise terminou"
+        else:
+            quente = f"quente {resultado['quente_mediana_ms']:.1f} ms (p95 {resultado['quente_p95_ms']:.1f})"
+        falhas = f", {resultado['falhas']} falhas" if resultado.get('falhas') else ""
+        print(f"{resultado['cenario']}: frio {resultado['frio_ms']:.1f} ms, {quente}{falhas}", file=sys.stderr)
+        resultados.append(resultado)
+    return resultados
+
+
+def comparar(atual, base, tolerancia=0.2):
+    """Lista de (cenario, métrica, base, atual, razão) que pioraram mais que `tolerancia`."""
+    anteriores = {c['cenario']: c for c in base.get('cenarios', [])}
+    regressoes = []
+    for cenario in atual['cenarios']:
+        anterior = anteriores.get(cenario['cenario'])
+        if anterior is None:
+            continue
+        for metrica in METRICAS_COMPARADAS:
+            valor, valor_base = cenario.get(metrica), anterior.get(metrica)
+            if not valor or not valor_base:
+                continue
+            razao = valor / valor_base
+            if razao > 1 + tolerancia:
+                regressoes.append((cenario['cenario'], metrica, valor_base, valor, razao))
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark da extração e da recomendação.")
+    parser.add_argument("-o", "--saida", default="-", help="arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument("--so", choices=("extracao", "recomendacao"), default=None,
+                        help="roda só um grupo de cenários")
+    parser.add_argument("--resolucoes", type=int, nargs="+", default=list(RESOLUCOES),
+                        help="maior lado das imagens da extração")
+    parser.add_argument("--linhas", type=int, nargs="+", default=list(LINHAS_CATALOGO),
+                        help="tamanhos dos catálogos sintéticos")
+    parser.add_argument("-n", "--repeticoes", type=int, default=REPETICOES)
+    parser.add_argument("--base", default=BASE,
+                        help="JSON de uma execução anterior para comparar (padrão: benchmark_base.json)")
+    parser.add_argument("--sem-base", action="store_true", help="não compara com nenhuma execução anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.2,
+                        help="piora relativa aceita antes de acusar regressão (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    cenarios = []
+    if args.so in (None, "extracao"):
+        cenarios += [(cenario_extracao, (lado, FIXTURES, args.repeticoes)) for lado in args.resolucoes]
+    if args.so in (None, "recomendacao"):
+        cenarios += [(cenario_recomendacao, (linhas, args.repeticoes)) for linhas in args.linhas]
+
+    resultado = {
+        'formato': FORMATO,
+        'data': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'maquina': {'sistema': platform.platform(), 'python': platform.python_version(),
+                    'processador': platform.processor(), 'nucleos': os.cpu_count()},
+        'cenarios': executar(cenarios),
+    }
+
+    texto = json.dumps(resultado, ensure_ascii=False, indent=2)
+    if args.saida == "-":
+        print(texto)
+    else:
+        with open(args.saida, "w", encoding="utf-8") as saida:
+            saida.write(texto + "\n")
+
+    if not args.sem_base:
+        with open(args.base, encoding="utf-8") as arquivo:
+            regressoes = comparar(resultado, json.load(arquivo), args.tolerancia)
+        for cenario, metrica, valor_base, valor, razao in regressoes:
+            print(f"REGRESSÃO {cenario}.{metrica}: {valor_base} -> {valor} ({razao:.2f}x)", file=sys.stderr)
+        if regressoes:
+            return 1
+        print(f"Sem regressões em relação a {args.base}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def hash_conteudo(dados):
+    # CHAVE ESTÁVEL PARA OS BYTES DE UM ARQUIVO (O MESMO UPLOAD SEMPRE GERA A MESMA CHAVE)
+    return hashlib.blake2b(dados, digest_size=16).hexdigest()
+
+
+def tamanho_aproximado(valor):
+    # BYTES OCUPADOS POR UM VALOR; ARRAYS DO NUMPY CONTAM PELO BUFFER
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(tamanho_aproximado(k) + tamanho_aproximado(v) for k, v in valor.items())
+    if isinstance(valor, (list, tuple)):
+        return sys.getsizeof(valor) + sum(tamanho_aproximado(v) for v in valor)
+    return sys.getsizeof(valor)
+
+
+class CacheLRU:
+    """Cache LRU thread-safe limitado por quantidade, bytes e tempo de vida.
+
+    max_itens / max_bytes: o item usado há mais tempo sai primeiro quando um limite estoura.
+    ttl: segundos até uma entrada expirar (None = não expira).
+    """
+
+    def __init__(self, max_itens=64, max_bytes=512 * 1024 ** 2, ttl=None):
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._itens = OrderedDict()  # chave -> (valor, tamanho, expira_em)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def __len__(self):
+        return len(self._itens)
+
+    def _remover(self, chave):
+        _, tamanho, _ = self._itens.pop(chave)
+        self._bytes -= tamanho
+
+    def obter(self, chave, padrao=None):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                self.falhas += 1
+                return padrao
+
+            valor, _, expira_em = item
+            if expira_em is not None and time.monotonic() >= expira_em:
+                self._remover(chave)
+                self.falhas += 1
+                return padrao
+
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return valor
+
+    def guardar(self, chave, valor, tamanho=None):
+        tamanho = tamanho_aproximado(valor) if tamanho is None else tamanho
+        if tamanho > self.max_bytes:
+            return  # maior que o cache inteiro: não vale a pena guardar
+
+        expira_em = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if chave in self._itens:
+                self._remover(chave)
+            self._itens[chave] = (valor, tamanho, expira_em)
+            self._bytes += tamanho
+
+            while len(self._itens) > self.max_itens or self._bytes > self.max_bytes:
+                self._remover(next(iter(self._itens)))
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
@@ -0,0 +1,312 @@
+"""Catálogo de roupas compilado para um formato binário colunar.
+
+O CSV é validado uma única vez e gravado em `<pasta do csv>/.compilado/` como:
+  - um arquivo .bin com as colunas contíguas (cores BGR em uint8 N×3, o
+    índice de cada cor quantizada e os campos de texto como códigos
+    categóricos inteiros);
+  - um .meta.json com os deslocamentos de cada coluna, as categorias e o
+    mtime/tamanho do CSV de origem.
+
+As colunas tipo, contraste e estação ganham também um índice invertido (termo
+-> linhas, em CSR: ponteiros + linhas ordenadas). Valores com vários termos,
+como "contraste alto/contraste médio", entram na lista de cada termo; um filtro
+vira a interseção das listas, sem comparar texto linha a linha.
+
+O .bin é aberto com memória mapeada: várias requisições (e vários processos)
+compartilham as mesmas páginas, e o arquivo é recompilado sozinho quando o CSV
+muda.
+"""
+import json
+import os
+import threading
+
+import cv2
+import numpy as np
+import pandas as pd
+
+from cores import bgr_para_lab_cie, colunas_delta_e, colunas_delta_e_quantizadas, tabela_cores
+
+CAMINHO_CSV = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../trabalho/data/catalogo_roupas.csv'))
+
+COLUNAS_TEXTO = ('nome', 'tipo', 'contraste', 'estação', 'imagem')
+COLUNAS_INDEXADAS = ('tipo', 'contraste', 'estação')
+SEPARADOR_TERMOS = '/'
+FORMATO = 3  # aumente quando o layout do .bin mudar (ou BITS_QUANTIZACAO)
+BITS_QUANTIZACAO = 5  # bits por canal de cores.quantizadas (índice na TabelaCores)
+_ALINHAMENTO = 64
+
+
+class ErroCatalogo(ValueError):
+    pass
+
+
+def _pasta_compilada(caminho_csv):
+    return os.path.join(os.path.dirname(caminho_csv), '.compilado')
+
+
+def _caminho_meta(caminho_csv):
+    nome = os.path.splitext(os.path.basename(caminho_csv))[0]
+    return os.path.join(_pasta_compilada(caminho_csv), nome + '.meta.json')
+
+
+def _ler_csv(caminho_csv):
+    # LÊ E VALIDA O CSV; RETORNA (cores uint8 N×3, {coluna: Categorical})
+    tabela = pd.read_csv(caminho_csv, dtype=str, keep_default_na=False)
+    tabela.columns = tabela.columns.str.strip().str.lower()
+
+    faltando = [c for c in COLUNAS_TEXTO + ('cor bgr',) if c not in tabela.columns]
+    if faltando:
+        raise ErroCatalogo(f"{caminho_csv}: colunas ausentes {faltando}")
+
+    if tabela.empty:
+        raise ErroCatalogo(f"{caminho_csv}: catálogo vazio")
+
+    # "[146 28 63]" -> [146, 28, 63], TUDO DE UMA VEZ
+    partes = tabela['cor bgr'].str.strip().str.strip('[]').str.split()
+    invalidas = partes.str.len() != 3
+    if invalidas.any():
+        raise ErroCatalogo(f"{caminho_csv}: 'cor bgr' inválida nas linhas {list(tabela.index[invalidas][:10] + 2)}")
+
+    valores = pd.DataFrame(partes.tolist(), index=tabela.index).apply(pd.to_numeric, errors='coerce')
+    invalidas = valores.isna().any(axis=1) | ((valores < 0) | (valores > 255)).any(axis=1)
+    if invalidas.any():
+        raise ErroCatalogo(f"{caminho_csv}: 'cor bgr' inválida nas linhas {list(tabela.index[invalidas][:10] + 2)}")
+    cores = np.ascontiguousarray(valores.to_numpy(), dtype=np.uint8)
+
+    categoricas = {c: pd.Categorical(tabela[c].str.strip()) for c in COLUNAS_TEXTO}
+    return cores, categoricas
+
+
+def _termos(valor):
+    return [t.strip().lower() for t in str(valor).split(SEPARADOR_TERMOS) if t.strip()]
+
+
+def _indice_invertido(categorica):
+    # RETORNA (termos ordenados, ponteiros int64 T+1, linhas int32): AS LINHAS DO TERMO i SÃO
+    # linhas[ponteiros[i]:ponteiros[i + 1]], EM ORDEM CRESCENTE
+    termos_por_categoria = [_termos(c) for c in categorica.categories]
+    termos = sorted({t for ts in termos_por_categoria for t in ts})
+    posicao = {t: i for i, t in enumerate(termos)}
+
+    # LINHAS AGRUPADAS POR CATEGORIA (UM argsort) E DEPOIS DISTRIBUÍDAS PELOS TERMOS DE CADA UMA
+    codigos = np.asarray(categorica.codes)
+    ordem = np.argsort(codigos, kind='stable').astype(np.int32)
+    limites = np.searchsorted(codigos[ordem], np.arange(len(termos_por_categoria) + 1))
+    partes = [[] for _ in termos]
+    for codigo, ts in enumerate(termos_por_categoria):
+        for termo in ts:
+            partes[posicao[termo]].append(ordem[limites[codigo]:limites[codigo + 1]])
+
+    listas = [np.sort(np.concatenate(p)) for p in partes]
+    ponteiros = np.zeros(len(termos) + 1, dtype=np.int64)
+    ponteiros[1:] = np.cumsum([len(lista) for lista in listas])
+    linhas = np.concatenate(listas) if listas else np.empty(0, dtype=np.int32)
+    return termos, ponteiros, np.ascontiguousarray(linhas, dtype=np.int32)
+
+
+def _cores_por_termo(ponteiros, linhas, quantizadas):
+    # CORES QUANTIZADAS DISTINTAS DAS LINHAS DE CADA TERMO, NO MESMO FORMATO CSR DO ÍNDICE INVERTIDO
+    listas = [np.unique(quantizadas[linhas[inicio:fim]]) for inicio, fim in zip(ponteiros[:-1], ponteiros[1:])]
+    ponteiros_cores = np.zeros(len(listas) + 1, dtype=np.int64)
+    ponteiros_cores[1:] = np.cumsum([len(lista) for lista in listas])
+    cores = np.concatenate(listas) if listas else np.empty(0, dtype=quantizadas.dtype)
+    return ponteiros_cores, np.ascontiguousarray(cores, dtype=quantizadas.dtype)
+
+
+def compilar_catalogo(caminho_csv=CAMINHO_CSV):
+    """Valida o CSV e grava a versão binária dele. Retorna o caminho do .meta.json."""
+    estado = os.stat(caminho_csv)
+    cores, categoricas = _ler_csv(caminho_csv)
+
+    # COR QUANTIZADA DE CADA LINHA: O RANKING DE CATÁLOGOS GRANDES PONTUA UMA VEZ POR COR, NÃO POR LINHA
+    quantizadas = tabela_cores(cv2.COLOR_BGR2LAB, BITS_QUANTIZACAO, np.float32).indices(cores)
+    # (5 BITS POR CANAL = 15 BITS: CABE EM int16)
+    quantizadas = np.ascontiguousarray(quantizadas, dtype=np.int16)
+    colunas = {'cores': cores, 'cores.quantizadas': quantizadas}
+    for nome, categorica in categoricas.items():
+        tipo = np.int16 if len(categorica.categories) < 2 ** 15 else np.int32
+        colunas[nome] = np.ascontiguousarray(categorica.codes, dtype=tipo)
+
+    termos = {}
+    for nome in COLUNAS_INDEXADAS:
+        termos[nome], colunas[f'{nome}.ponteiros'], colunas[f'{nome}.linhas'] = _indice_invertido(categoricas[nome])
+        colunas[f'{nome}.cores.ponteiros'], colunas[f'{nome}.cores'] = _cores_por_termo(
+            colunas[f'{nome}.ponteiros'], colunas[f'{nome}.linhas'], quantizadas)
+
+    pasta = _pasta_compilada(caminho_csv)
+    os.makedirs(pasta, exist_ok=True)
+    nome_base = os.path.splitext(os.path.basename(caminho_csv))[0]
+    # O .bin LEVA O mtime NO NOME: LEITORES AINDA MAPEANDO A VERSÃO ANTIGA NÃO SÃO AFETADOS
+    nome_bin = f"{nome_base}.{estado.st_mtime_ns}.bin"
+    caminho_bin = os.path.join(pasta, nome_bin)
+
+    blocos = {}
+    tmp_bin = f"{caminho_bin}.{os.getpid()}.tmp"
+    with open(tmp_bin, 'wb') as arquivo:
+        for nome, coluna in colunas.items():
+            offset = -arquivo.tell() % _ALINHAMENTO
+            arquivo.write(b'\0' * offset)
+            blocos[nome] = {'offset': arquivo.tell(), 'dtype': coluna.dtype.str, 'shape': list(coluna.shape)}
+            arquivo.write(coluna.tobytes())
+    os.replace(tmp_bin, caminho_bin)
+
+    meta = {
+        'formato': FORMATO,
+        'origem_mtime_ns': estado.st_mtime_ns,
+        'origem_tamanho': estado.st_size,
+        'linhas': int(cores.shape[0]),
+        'arquivo': nome_bin,
+        'blocos': blocos,
+        'categorias': {nome: [str(c) for c in cat.categories] for nome, cat in categoricas.items()},
+        'termos': termos,
+    }
+    caminho_meta = _caminho_meta(caminho_csv)
+    tmp_meta = f"{caminho_meta}.{os.getpid()}.tmp"
+    with open(tmp_meta, 'w', encoding='utf-8') as arquivo:
+        json.dump(meta, arquivo, ensure_ascii=False)
+    os.replace(tmp_meta, caminho_meta)
+
+    # REMOVE VERSÕES ANTIGAS (NO WINDOWS UM ARQUIVO AINDA MAPEADO NÃO PODE SER APAGADO)
+    for nome in os.listdir(pasta):
+        if nome.startswith(nome_base + '.') and nome.endswith('.bin') and nome != nome_bin:
+            try:
+                os.remove(os.path.join(pasta, nome))
+            except OSError:
+                pass
+
+    return caminho_meta
+
+
+class Catalogo:
+    """Visão somente-leitura (memória mapeada) de um catálogo compilado."""
+
+    def __init__(self, caminho_meta):
+        with open(caminho_meta, encoding='utf-8') as arquivo:
+            meta = json.load(arquivo)
+
+        self.origem_mtime_ns = meta['origem_mtime_ns']
+        self.origem_tamanho = meta['origem_tamanho']
+        self.versao = self.origem_mtime_ns
+        self.categorias = meta['categorias']
+        self.termos = meta['termos']
+        self._posicao_termos = {nome: {t: i for i, t in enumerate(ts)} for nome, ts in self.termos.items()}
+
+        caminho_bin = os.path.join(os.path.dirname(caminho_meta), meta['arquivo'])
+        # memmap NÃO ACEITA TAMANHO ZERO (ex.: ÍNDICE DE UMA COLUNA SEM NENHUM TERMO)
+        self._colunas = {
+            nome: np.memmap(caminho_bin, dtype=np.dtype(bloco['dtype']), mode='r',
+                            offset=bloco['offset'], shape=tuple(bloco['shape']))
+            if np.prod(bloco['shape']) else np.empty(bloco['shape'], dtype=np.dtype(bloco['dtype']))
+            for nome, bloco in meta['blocos'].items()
+        }
+        self.cores = self._colunas['cores']
+        self.cores_quantizadas = self._colunas['cores.quantizadas']
+        self._lab = None
+        self._colunas_delta_e = None
+
+    def __len__(self):
+        return self.cores.shape[0]
+
+    @property
+    def lab(self):
+        # L*a*b* (CIE, float32) DO CATÁLOGO INTEIRO, CONVERTIDO UMA ÚNICA VEZ POR VERSÃO
+        if self._lab is None:
+            self._lab = bgr_para_lab_cie(self.cores)
+        return self._lab
+
+    @property
+    def colunas_delta_e(self):
+        # TERMOS DO ΔE2000 POR LINHA (cores.colunas_delta_e: 6×N CONTÍGUO), TAMBÉM UMA ÚNICA VEZ POR VERSÃO
+        if self._colunas_delta_e is None:
+            self._colunas_delta_e = colunas_delta_e(self.lab)
+        return self._colunas_delta_e
+
+    @property
+    def colunas_quantizadas(self):
+        # colunas_delta_e DE CADA COR QUANTIZADA (cores_quantizadas INDEXA AS COLUNAS), COMPARTILHADAS NO PROCESSO
+        return colunas_delta_e_quantizadas(BITS_QUANTIZACAO)
+
+    def linhas_do_termo(self, coluna, termo):
+        # FATIA DO ÍNDICE INVERTIDO (LINHAS EM ORDEM CRESCENTE); VAZIA SE O TERMO NÃO EXISTE
+        i = self._posicao_termos[coluna].get(termo.strip().lower())
+        if i is None:
+            return np.empty(0, dtype=np.int32)
+        ponteiros = self._colunas[f'{coluna}.ponteiros']
+        return np.asarray(self._colunas[f'{coluna}.linhas'][ponteiros[i]:ponteiros[i + 1]])
+
+    def cores_do_termo(self, coluna, termo):
+        # CORES QUANTIZADAS DISTINTAS DAS LINHAS DO TERMO (CALCULADAS NA COMPILAÇÃO); VAZIA SE O TERMO NÃO EXISTE
+        i = self._posicao_termos[coluna].get(termo.strip().lower())
+        if i is None:
+            return np.empty(0, dtype=self.cores_quantizadas.dtype)
+        ponteiros = self._colunas[f'{coluna}.cores.ponteiros']
+        return np.asarray(self._colunas[f'{coluna}.cores'][ponteiros[i]:ponteiros[i + 1]])
+
+    def filtrar(self, filtros):
+        """Linhas que têm todos os termos pedidos ({coluna: termo}), em ordem crescente.
+
+        Começa pela lista mais curta e procura cada candidata nas outras com
+        searchsorted: o custo acompanha o número de resultados, não o catálogo.
+        """
+        listas = sorted((self.linhas_do_termo(coluna, termo) for coluna, termo in filtros.items()), key=len)
+        if not listas:
+            return np.arange(len(self), dtype=np.int32)
+        resultado = listas[0]
+        for lista in listas[1:]:
+            if len(resultado) == 0:
+                break
+            posicoes = np.minimum(np.searchsorted(lista, resultado), len(lista) - 1)
+            resultado = resultado[lista[posicoes] == resultado]
+        return resultado
+
+
+_catalogos = {}
+_lock = threading.Lock()
+
+
+def _compilado_em_dia(caminho_meta, estado):
+    try:
+        with open(caminho_meta, encoding='utf-8') as arquivo:
+            meta = json.load(arquivo)
+    except (OSError, ValueError):
+        return False
+    caminho_bin = os.path.join(os.path.dirname(caminho_meta), meta.get('arquivo', ''))
+    return (meta.get('formato') == FORMATO
+            and meta.get('origem_mtime_ns') == estado.st_mtime_ns
+            and meta.get('origem_tamanho') == estado.st_size
+            and os.path.exists(caminho_bin))
+
+
+def carregar_catalogo(caminho_csv=CAMINHO_CSV):
+    """Retorna o Catalogo do CSV, compartilhado entre chamadas.
+
+    Só um os.stat() por chamada no caso comum; recompila quando o CSV mudou.
+    """
+    caminho_csv = os.path.abspath(caminho_csv)
+    estado = os.stat(caminho_csv)
+
+    catalogo = _catalogos.get(caminho_csv)
+    if catalogo is not None and catalogo.origem_mtime_ns == estado.st_mtime_ns \
+            and catalogo.origem_tamanho == estado.st_size:
+        return catalogo
+
+    with _lock:
+        catalogo = _catalogos.get(caminho_csv)
+        if catalogo is not None and catalogo.origem_mtime_ns == estado.st_mtime_ns \
+                and catalogo.origem_tamanho == estado.st_size:
+            return catalogo
+
+        caminho_meta = _caminho_meta(caminho_csv)
+        if not _compilado_em_dia(caminho_meta, estado):
+            compilar_catalogo(caminho_csv)
+
+        catalogo = Catalogo(caminho_meta)
+        _catalogos[caminho_csv] = catalogo
+        return catalogo
+
+
+if __name__ == "__main__":
+    import sys
+
+    caminho = sys.argv[1] if len(sys.argv) > 1 else CAMINHO_CSV
+    print(f"Compilado em: {compilar_catalogo(caminho)}")
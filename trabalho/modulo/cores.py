@@ -0,0 +1,190 @@
+"""Conversões de cor vetorizadas (N×3) e distâncias perceptuais.
+
+Todas as funções aceitam uma única cor (3 valores) ou um array N×3 e fazem uma
+só chamada ao OpenCV/NumPy, em vez de montar uma imagem 1×1 por cor. Uma cor
+de entrada devolve uma cor de saída; N cores devolvem N×3.
+"""
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+# PESOS BT.601 NA ORDEM B, G, R (OS MESMOS DO cv2.COLOR_BGR2GRAY)
+PESOS_CINZA = np.array([0.114, 0.587, 0.299])
+
+
+def _converter(cores, codigo, dtype=np.uint8):
+    # N×3 (OU 3) -> IMAGEM N×1 -> cvtColor -> MESMA FORMA DA ENTRADA
+    cores = np.asarray(cores, dtype=dtype)
+    convertidas = cv2.cvtColor(np.ascontiguousarray(cores.reshape(-1, 1, 3)), codigo)
+    return convertidas.reshape(cores.shape)
+
+
+def bgr_para_lab(bgr):
+    # BGR uint8 -> L*a*b* DO OPENCV EM 8 BITS (L de 0 a 255, a e b deslocados de 128)
+    return _converter(bgr, cv2.COLOR_BGR2LAB)
+
+
+def bgr_para_hsv(bgr):
+    # BGR uint8 -> HSV DO OPENCV (H de 0 a 179, S e V de 0 a 255)
+    return _converter(bgr, cv2.COLOR_BGR2HSV)
+
+
+def bgr_para_cinza(bgr):
+    # LUMINÂNCIA (0-255, float) DE CADA COR
+    return np.asarray(bgr, dtype=np.float64) @ PESOS_CINZA
+
+
+def bgr_para_hex(bgr):
+    # N×3 BGR -> LISTA DE "#rrggbb" (RGB, COMO O HTML ESPERA)
+    cores = np.asarray(bgr, dtype=np.uint8).reshape(-1, 3)
+    return ['#%02x%02x%02x' % (r, g, b) for b, g, r in cores.tolist()]
+
+
+def bgr_para_lab_cie(bgr):
+    # N×3 BGR (0-255) -> N×3 CIE L*a*b* float32 (L de 0 a 100; a, b aprox. de -128 a 127)
+    bgr = np.asarray(bgr, dtype=np.float32).reshape(-1, 1, 3) / 255.0
+    return cv2.cvtColor(bgr, cv2.COLOR_BGR2LAB).reshape(-1, 3)
+
+
+# COLUNAS DE colunas_delta_e: L*, a*, b*, a*², b*² E CROMA C*ab DE CADA COR
+COLUNAS_DELTA_E = ('L', 'a', 'b', 'a2', 'b2', 'croma')
+BLOCO_DELTA_E = 16384  # cores por bloco em delta_e_2000_colunas (os temporários cabem no cache)
+_25_7 = np.float32(25.0 ** 7)
+
+
+def colunas_delta_e(lab):
+    # N×3 CIE L*a*b* -> 6×N float32 CONTÍGUO (COLUNAS_DELTA_E): OS TERMOS DO ΔE2000 QUE SÓ DEPENDEM DA COR,
+    # CALCULADOS UMA VEZ (ex.: POR VERSÃO DO CATÁLOGO) EM VEZ DE A CADA COMPARAÇÃO
+    lab = np.asarray(lab, dtype=np.float32).reshape(-1, 3)
+    colunas = np.empty((len(COLUNAS_DELTA_E), lab.shape[0]), dtype=np.float32)
+    colunas[:3] = lab.T
+    np.square(colunas[1], out=colunas[3])
+    np.square(colunas[2], out=colunas[4])
+    np.sqrt(colunas[3] + colunas[4], out=colunas[5])
+    return colunas
+
+
+def delta_e_2000_colunas(colunas, referencias):
+    """ΔE2000 de cada cor de `colunas` (colunas_delta_e) para cada uma das R `referencias` L*a*b*.
+
+    Retorna R×N float32. Fórmula de Sharma, Wu e Dalal (2005), escrita para o
+    caso "muitas cores contra poucas referências" (conferida contra a versão
+    direta da fórmula em testeCores.py): as referências são comparadas
+    numa só passada, em blocos de BLOCO_DELTA_E cores, e as matizes ficam em
+    radianos sem módulo nem np.where.
+    """
+    referencias = np.asarray(referencias, dtype=np.float32).reshape(-1, 3)
+    n = colunas.shape[1]
+    distancias = np.empty((referencias.shape[0], n), dtype=np.float32)
+    for inicio in range(0, n, BLOCO_DELTA_E):
+        fim = inicio + BLOCO_DELTA_E
+        distancias[:, inicio:fim] = _delta_e_2000_bloco(colunas[:, inicio:fim], referencias)
+    return distancias
+
+
+def _delta_e_2000_bloco(colunas, referencias):
+    # CORES (1×N) CONTRA REFERÊNCIAS (R×1), POR BROADCAST -> R×N
+    # (AS MÁSCARAS SÓ MULTIPLICAM ESCALARES float32: UM int DO PYTHON PROMOVERIA TUDO PARA float64)
+    L1, a1, b1, a1_2, b1_2, c1 = colunas
+    L2, a2, b2 = (referencias[:, i:i + 1] for i in range(3))
+
+    # CROMA E MATIZ COM A CORREÇÃO G DO EIXO a (1 + G, SEM hypot: a*² E b*² JÁ ESTÃO NAS COLUNAS)
+    c_media = (c1 + np.sqrt(a2 * a2 + b2 * b2)) * 0.5
+    c7 = c_media * c_media
+    c7 *= c7
+    c7 *= c_media * c_media * c_media
+    fator_g = 1.5 - 0.5 * np.sqrt(c7 / (c7 + _25_7))
+    fator_g2 = fator_g * fator_g
+    c1p = np.sqrt(fator_g2 * a1_2 + b1_2)
+    c2p = np.sqrt(fator_g2 * (a2 * a2) + b2 * b2)
+    a1p = fator_g * a1
+    a2p = fator_g * a2
+    h1p = np.arctan2(b1, a1p)  # RADIANOS EM (-pi, pi]
+    h2p = np.arctan2(b2, a2p)
+    produto_croma = c1p * c2p
+
+    # DIFERENÇAS (QUANDO |dh| > pi O CAMINHO CURTO TROCA O SINAL DE sen(dh/2)). |dh| > pi EQUIVALE A dh TER
+    # O SINAL OPOSTO AO DO PRODUTO VETORIAL (a1', b1) × (a2', b2), QUE É EXATAMENTE 0 PARA MATIZES OPOSTAS;
+    # NESSE EMPATE (|dh| = 180°) A FÓRMULA EM GRAUS [0, 360) SÓ TROCA O LADO QUANDO UMA DAS MATIZES É NEGATIVA
+    # AQUI. A COMPARAÇÃO DIRETA COM pi EM float32 ERRA ESSE CASO (PARES 10 E 14 DE SHARMA ET AL.)
+    dh = h2p - h1p
+    vetorial = a1p * b2 - b1 * a2p
+    longo = (dh * vetorial < 0) | ((vetorial == 0) & (h1p * h2p < 0))
+    dh_grande = 2 * np.sqrt(produto_croma) * np.sin(dh * 0.5) * (1 - np.float32(2) * longo)
+
+    # MÉDIAS (SEM CROMA: A SOMA DAS MATIZES, COMO NA FÓRMULA ORIGINAL)
+    cp_media = (c1p + c2p) * 0.5
+    h_media = (h1p + h2p) * 0.5 + np.float32(np.pi) * longo
+    h_media += (produto_croma == 0) * (h1p + h2p - h_media)
+
+    # PESOS
+    t = (1 - 0.17 * np.cos(h_media - np.float32(np.radians(30)))
+         + 0.24 * np.cos(2 * h_media)
+         + 0.32 * np.cos(3 * h_media + np.float32(np.radians(6)))
+         - 0.20 * np.cos(4 * h_media - np.float32(np.radians(63))))
+    graus = h_media * np.float32(180 / np.pi)
+    graus += np.float32(360) * (graus < 0) - np.float32(360) * (graus >= 360)  # [0, 360), COMO NA FÓRMULA EM GRAUS
+    desvio = (graus - 275) * (1 / 25)
+    d_theta = np.exp(-desvio * desvio) * np.float32(np.radians(30))
+    cp7 = cp_media * cp_media
+    cp7 *= cp7
+    cp7 *= cp_media * cp_media * cp_media
+    r_c = 2 * np.sqrt(cp7 / (cp7 + _25_7))
+    l50 = (L1 + L2) * 0.5 - 50
+    l50 *= l50
+    s_l = 1 + 0.015 * l50 / np.sqrt(20 + l50)
+    s_c = 1 + 0.045 * cp_media
+    s_h = 1 + 0.015 * cp_media * t
+    r_t = -np.sin(2 * d_theta) * r_c
+
+    termo_l = (L2 - L1) / s_l
+    termo_c = (c2p - c1p) / s_c
+    termo_h = dh_grande / s_h
+    return np.sqrt(termo_l * termo_l + termo_c * termo_c + termo_h * termo_h + r_t * termo_c * termo_h)
+
+
+class TabelaCores:
+    """Tabela de conversão pré-calculada para todas as cores BGR quantizadas.
+
+    Com `bits` bits por canal a tabela tem 2**(3*bits) cores (32768 com 5 bits),
+    convertidas uma única vez; depois qualquer quantidade de pixels (catálogo,
+    imagem inteira) é convertida com uma indexação do NumPy. Cada cor vira o
+    centro do seu intervalo, então o erro máximo é de meio intervalo por canal.
+    """
+
+    def __init__(self, codigo, bits=5, dtype=np.uint8):
+        self.bits = bits
+        self._deslocamento = 8 - bits
+        niveis = np.arange(2 ** bits, dtype=np.uint16) << self._deslocamento
+        if self._deslocamento:
+            niveis += 1 << (self._deslocamento - 1)
+        b, g, r = np.meshgrid(niveis, niveis, niveis, indexing='ij')
+        todas = np.stack([b, g, r], axis=-1).reshape(-1, 1, 3)
+        if dtype == np.uint8:
+            todas = todas.astype(np.uint8)
+        else:
+            todas = todas.astype(np.float32) / 255.0
+        convertidas = cv2.cvtColor(todas, codigo)
+        self.tabela = convertidas.reshape(todas.shape[0], -1)
+
+    def indices(self, bgr):
+        # ÍNDICE DE CADA PIXEL NA TABELA (MESMA FORMA DA ENTRADA SEM O ÚLTIMO EIXO)
+        bgr = np.asarray(bgr, dtype=np.uint8)
+        d, n = self._deslocamento, self.bits
+        b = (bgr[..., 0] >> d).astype(np.int32)
+        g = (bgr[..., 1] >> d).astype(np.int32)
+        r = (bgr[..., 2] >> d).astype(np.int32)
+        return (b << (2 * n)) | (g << n) | r
+
+
+@lru_cache(maxsize=None)
+def tabela_cores(codigo, bits=5, dtype=np.uint8):
+    # TABELAS COMPARTILHADAS NO PROCESSO: CADA (conversão, bits) É CALCULADA UMA VEZ
+    return TabelaCores(codigo, bits, dtype)
+
+
+@lru_cache(maxsize=None)
+def colunas_delta_e_quantizadas(bits=5):
+    # colunas_delta_e DO CENTRO DE CADA COR BGR QUANTIZADA, NA ORDEM DE TabelaCores.indices (5 BITS: 6×32768)
+    return colunas_delta_e(tabela_cores(cv2.COLOR_BGR2LAB, bits, np.float32).tabela)
@@ -0,0 +1,30 @@
+import cv2
+
+
+class SaidaDepuracao:
+    """Destino opcional para imagens e mensagens de depuração do pipeline.
+
+    As funções de análise só produzem quadros e textos de depuração quando
+    recebem uma saída; sem ela, nada é desenhado, copiado ou impresso.
+    """
+
+    def imagem(self, nome, img):
+        pass
+
+    def log(self, mensagem):
+        pass
+
+
+class SaidaJanela(SaidaDepuracao):
+    # COMPORTAMENTO ANTIGO: JANELAS DO OPENCV E print() (USO LOCAL, COM MONITOR)
+
+    def imagem(self, nome, img):
+        cv2.imshow(nome, img)
+
+    def log(self, mensagem):
+        print(mensagem)
+
+    def aguardar(self):
+        cv2.waitKey(0)
+        cv2.destroyAllWindows()
+
@@ -0,0 +1,16 @@
+"""Medidas de exemplo para usos sem foto (aquecimento, benchmark, testes manuais)."""
+
+# MEDIDAS FIXAS PARA A RECOMENDAÇÃO (verão claro)
+MEDIDAS_EXEMPLO = {
+    'tom_de_pele': (150, 170, 210),
+    'tom_de_cabelo': (40, 50, 60),
+    'tom_de_olho': (60, 80, 100),
+    'Tom de pele (escala 0-10)': 7,
+    'Tom de cabelo (escala 0-10)': 2,
+    'Tom dos olhos (escala 0-10)': 3,
+    'Intervalo de contraste': 5,
+    'Classificação': 'Contraste médio',
+    'Subtom': 'Frio',
+    'Intensidade': 'Média',
+    'Profundidade': 'Claro',
+}
@@ -0,0 +1,93 @@
+"""Exportação das imagens do OpenCV (visualizações, painéis) para download.
+
+  - para_pil monta a imagem PIL direto dos bytes BGR do array (frombuffer com
+    rawmode 'BGR'), sem codificar/decodificar PNG nem converter cores antes;
+  - codificar comprime exatamente uma vez por (imagem, formato, qualidade):
+    os bytes ficam guardados enquanto o array existir, então baixar de novo o
+    mesmo painel (a cada rerun do Streamlit) não comprime outra vez.
+
+As imagens exportadas são tratadas como imutáveis: um array alterado depois de
+codificado continuaria devolvendo os bytes antigos.
+"""
+import os
+import threading
+import weakref
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# FORMATO -> (EXTENSÃO DO imencode, TIPO MIME, PARÂMETRO DE QUALIDADE, QUALIDADE PADRÃO)
+FORMATOS = {
+    'png': ('.png', 'image/png', cv2.IMWRITE_PNG_COMPRESSION, 3),  # png: compressão 0-9 (sem perdas)
+    'jpeg': ('.jpg', 'image/jpeg', cv2.IMWRITE_JPEG_QUALITY, 90),
+    'webp': ('.webp', 'image/webp', cv2.IMWRITE_WEBP_QUALITY, 90),
+}
+EXTENSOES = {'.png': 'png', '.jpg': 'jpeg', '.jpeg': 'jpeg', '.webp': 'webp'}
+
+# (id do array, formato, qualidade) -> (weakref do array, bytes)
+_codificadas = {}
+_lock = threading.Lock()
+# CHAVES DE ARRAYS JÁ COLETADOS: O CALLBACK DO weakref SÓ ANOTA AQUI (list.append NÃO PRECISA DO LOCK, E O
+# CALLBACK PODE RODAR NA THREAD QUE JÁ SEGURA _lock); AS ENTRADAS SAEM NA PRÓXIMA codificar()
+_coletadas = []
+
+
+def formato_do_arquivo(nome, padrao='png'):
+    return EXTENSOES.get(os.path.splitext(nome)[1].lower(), padrao)
+
+
+def tipo_mime(formato):
+    return FORMATOS[formato][1]
+
+
+def para_pil(imagem):
+    """Imagem PIL (RGB, RGBA ou L) a partir de um array do OpenCV, numa única passada pelos pixels."""
+    imagem = np.ascontiguousarray(imagem, dtype=np.uint8)
+    altura, largura = imagem.shape[:2]
+    if imagem.ndim == 2:
+        # TONS DE CINZA: O PIL USA O PRÓPRIO BUFFER DO ARRAY
+        return Image.frombuffer('L', (largura, altura), imagem, 'raw', 'L', 0, 1)
+    if imagem.shape[2] == 4:
+        return Image.frombuffer('RGBA', (largura, altura), imagem, 'raw', 'BGRA', 0, 1)
+    return Image.frombuffer('RGB', (largura, altura), imagem, 'raw', 'BGR', 0, 1)
+
+
+def _comprimir(imagem, formato, qualidade):
+    extensao, _, parametro, _ = FORMATOS[formato]
+    ok, buffer = cv2.imencode(extensao, imagem, [parametro, int(qualidade)])
+    if not ok:
+        raise ValueError(f"Não foi possível codificar a imagem como {formato}")
+    return buffer.tobytes()
+
+
+def codificar(imagem, formato='png', qualidade=None):
+    """Bytes da imagem no `formato` ('png', 'jpeg' ou 'webp'), comprimidos uma única vez por array."""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconhecido: {formato} (use {', '.join(FORMATOS)})")
+    if qualidade is None:
+        qualidade = FORMATOS[formato][3]
+
+    chave = (id(imagem), formato, qualidade)
+    with _lock:
+        _limpar_coletadas()
+        guardado = _codificadas.get(chave)
+    # O id PODE SER REAPROVEITADO POR OUTRO ARRAY: CONFERE QUE A REFERÊNCIA AINDA É A MESMA IMAGEM
+    if guardado is not None and guardado[0]() is imagem:
+        return guardado[1]
+
+    dados = _comprimir(imagem, formato, qualidade)
+    # A ENTRADA SAI DO CACHE QUANDO O ARRAY É COLETADO
+    referencia = weakref.ref(imagem, lambda _, chave=chave: _coletadas.append(chave))
+    with _lock:
+        _codificadas[chave] = (referencia, dados)
+    return dados
+
+
+def _limpar_coletadas():
+    # CHAMADA COM _lock: A CHAVE PODE JÁ SER DE OUTRO ARRAY (id REAPROVEITADO), SÓ SAI SE A REFERÊNCIA MORREU
+    while _coletadas:
+        chave = _coletadas.pop()
+        guardado = _codificadas.get(chave)
+        if guardado is not None and guardado[0]() is None:
+            del _codificadas[chave]
@@ -1,9 +1,6 @@
 import streamlit as st
-import cv2
 import numpy as np
-import os
 from PIL import Image
-from processamento import extrair_dados_da_imagem
 from recomendacao import recomendar_roupas
 
 def mostrar_interface(medidas):
@@ -17,18 +14,12 @@ def mostrar_interface(medidas):
         st.image(imagem_np, caption="Imagem enviada", use_column_width=True)
         st.write("Medidas extraídas:", medidas)
 
-    sugestoes = recomendar_roupas(medidas)
+    cores_bgr, estacao = recomendar_roupas(medidas)
 
-    if sugestoes.empty:
+    if not cores_bgr:
         st.warning("Nenhuma sugestão encontrada para as suas medidas.")
         return
 
-    st.subheader("Sugestões de roupas:")
-    for _, linha in sugestoes.iterrows():
-        st.text(f"{linha['nome']} - {linha['cor']} - {linha['estilo']}")
-
-        caminho = os.path.join("data", "imagens_roupas", linha["imagem"])
-        if os.path.exists(caminho):
-            st.image(caminho, width=200)
-        else:
-            st.warning(f"Imagem {linha['imagem']} não encontrada.")
+    st.subheader(f"Sugestões de cores ({estacao}):")
+    for cor in cores_bgr:
+        st.text(f"BGR: {list(cor)}")
@@ -0,0 +1,56 @@
+"""Landmarks do MediaPipe como arrays do NumPy.
+
+Cada resultado (pose ou rosto) é convertido uma única vez para um array
+float32 N×3 (x, y, z normalizados); todas as medidas depois são operações de
+array sobre os conjuntos de índices abaixo.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+# ================================= POSE =================================
+# MESMOS VALORES DE mp.solutions.pose.PoseLandmark
+POSE_NARIZ = 0
+POSE_ORELHA_ESQUERDA = 7
+POSE_ORELHA_DIREITA = 8
+POSE_OMBRO_ESQUERDO = 11
+POSE_OMBRO_DIREITO = 12
+POSE_QUADRIL_ESQUERDO = 23
+POSE_QUADRIL_DIREITO = 24
+POSE_TORNOZELO_ESQUERDO = 27
+
+OMBROS = np.array([POSE_OMBRO_ESQUERDO, POSE_OMBRO_DIREITO])
+QUADRIS = np.array([POSE_QUADRIL_ESQUERDO, POSE_QUADRIL_DIREITO])
+ORELHAS = np.array([POSE_ORELHA_ESQUERDA, POSE_ORELHA_DIREITA])
+
+# ================================= ROSTO (FACE MESH) =================================
+ROSTO_PONTA_NARIZ = 4
+ROSTO_TOPO_TESTA = 10
+ROSTO_QUEIXO = 152
+QUEIXO = np.arange(152, 155)  # linha do queixo
+CONTORNO_ROSTO = np.arange(468)  # malha sem os pontos da íris
+OLHO_ESQUERDO = np.array([33, 133])  # cantos do olho
+MANDIBULA = np.array([234, 454])  # esquerda, direita
+LATERAL_TESTA = np.array([127, 356])  # esquerda, direita
+
+
+@dataclass(slots=True)
+class Landmarks:
+    pontos: np.ndarray  # N×3 float32 (x, y, z) normalizados pela imagem da detecção
+
+    @classmethod
+    def de_mediapipe(cls, lista):
+        # UMA ÚNICA PASSADA PELOS PROTOBUFS DE UM NormalizedLandmarkList
+        return cls(np.array([(lm.x, lm.y, lm.z) for lm in lista.landmark], dtype=np.float32))
+
+    def __len__(self):
+        return len(self.pontos)
+
+    @property
+    def xy(self):
+        return self.pontos[:, :2]
+
+    def distancia(self, indices, largura=1, altura=1):
+        # DISTÂNCIA ENTRE OS DOIS PONTOS DE `indices` (NORMALIZADA, OU EM PIXELS COM largura/altura)
+        a, b = self.xy[indices] * np.array([largura, altura], dtype=np.float32)
+        return float(np.hypot(*(a - b)))
@@ -0,0 +1,229 @@
+"""Análise em lote de imagens, sem interface gráfica.
+
+Recebe um diretório ou um glob, decodifica as imagens antecipadamente numa fila
+limitada, distribui entre processos worker (cada um com seus modelos do MediaPipe
+já aquecidos) e escreve um registro JSONL por imagem assim que ele fica pronto.
+
+Uso:
+    python lote.py ../data/imagens_testes -j 4 -o resultados.jsonl
+    python lote.py "../data/**/*.jpg"
+    python lote.py ../data/imagens_testes --trace lote.trace.json   # abrir em chrome://tracing
+    python lote.py fotos_de_grupo/ --pessoas 6   # um registro por pessoa, com o campo "pessoa"
+    python lote.py ../data/imagens_testes --memoria --trace lote.trace.json   # pico de memória por etapa
+"""
+import argparse
+import glob
+import importlib
+import json
+import os
+import queue
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import cv2
+import numpy as np
+
+from tempos import eventos_chrome, gravar_trace_chrome, memoria as memoria_por_etapa
+
+EXTENSOES = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+_FIM = None  # sentinela da fila de pré-carregamento
+
+# CONJUNTO DE MODELOS DO PROCESSO WORKER (criado uma vez no initializer) E SE AS ETAPAS MEDEM MEMÓRIA
+_modelos = None
+_memoria = False
+
+
+def listar_imagens(entrada):
+    # DIRETÓRIO -> TODAS AS IMAGENS DELE; QUALQUER OUTRA COISA É TRATADA COMO GLOB
+    if os.path.isdir(entrada):
+        caminhos = [os.path.join(entrada, nome) for nome in os.listdir(entrada)]
+    else:
+        caminhos = glob.glob(entrada, recursive=True)
+    return sorted(c for c in caminhos
+                  if os.path.isfile(c) and os.path.splitext(c)[1].lower() in EXTENSOES)
+
+
+def ler_imagem(caminho):
+    # np.fromfile + imdecode também aceita caminhos com acentos no Windows
+    dados = np.fromfile(caminho, dtype=np.uint8)
+    return cv2.imdecode(dados, cv2.IMREAD_COLOR)
+
+
+def inicializar_worker(max_rostos=1, memoria=False):
+    # IMPORTA O PIPELINE E AQUECE OS MODELOS ANTES DA PRIMEIRA IMAGEM CHEGAR
+    # OS ARRAYS DO TAMANHO DA ROI SÃO REAPROVEITADOS ENTRE AS IMAGENS DO WORKER
+    global _modelos, _memoria
+    importlib.import_module('processamento')  # CARREGA O PIPELINE (E O MEDIAPIPE) UMA VEZ POR WORKER
+    from modelos import ConjuntoModelos
+    _modelos = ConjuntoModelos(max_rostos=max_rostos, reutilizar_buffers=True)
+    _memoria = memoria
+
+
+def _novo_cronometro():
+    from tempos import Cronometro
+    return Cronometro(memoria=_memoria)
+
+
+def _analisar(caminho, imagem):
+    # RETORNA (registro JSONL, etapas do Cronometro ou None, pid do worker)
+    from processamento import extrair_dados_da_imagem
+    from recomendacao import classificar_estacao
+
+    try:
+        analise, _ = extrair_dados_da_imagem(imagem, _modelos, cronometro=_novo_cronometro())
+    except Exception as e:
+        return {'arquivo': caminho, 'erro': f"{type(e).__name__}: {e}"}, None, os.getpid()
+
+    medidas = analise.como_dict()
+    registro = {'arquivo': caminho}
+    registro.update(medidas)
+    registro['estação'] = classificar_estacao(medidas)
+    return registro, analise.tempos, os.getpid()
+
+
+def _analisar_pessoas(caminho, imagem):
+    # FOTO DE GRUPO: LISTA DE (registro, etapas, pid), UM POR PESSOA ENCONTRADA
+    from processamento import extrair_dados_de_pessoas
+    from recomendacao import classificar_estacao
+
+    try:
+        pessoas, _ = extrair_dados_de_pessoas(imagem, _modelos, _modelos.max_rostos,
+                                              cronometro=_novo_cronometro())
+    except Exception as e:
+        return [({'arquivo': caminho, 'erro': f"{type(e).__name__}: {e}"}, None, os.getpid())]
+
+    resultados = []
+    for i, analise in enumerate(pessoas, 1):
+        medidas = analise.como_dict()
+        registro = {'arquivo': caminho, 'pessoa': i}
+        registro.update(medidas)
+        registro['estação'] = classificar_estacao(medidas)
+        resultados.append((registro, analise.tempos, os.getpid()))
+    return resultados
+
+
+def analisar_lote(itens):
+    # [(nome, bytes da imagem)] -> [(registro, etapas, pid)]; A DECODIFICAÇÃO TAMBÉM ACONTECE NO WORKER
+    resultados = []
+    for nome, dados in itens:
+        imagem = cv2.imdecode(np.frombuffer(dados, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if imagem is None:
+            resultados.append(({'arquivo': nome, 'erro': 'não foi possível decodificar a imagem'}, None, os.getpid()))
+        else:
+            resultados.append(_analisar(nome, imagem))
+    return resultados
+
+
+def _pre_carregar(caminhos, fila):
+    # THREAD PRODUTORA: DECODIFICA À FRENTE DOS WORKERS; put() BLOQUEIA QUANDO A FILA ENCHE
+    for caminho in caminhos:
+        try:
+            imagem = ler_imagem(caminho)
+        except OSError:
+            imagem = None
+        fila.put((caminho, imagem))
+    fila.put(_FIM)
+
+
+def processar_lote(caminhos, saida, workers=None, pre_carregamento=8, trace=None, pessoas=1, memoria=False):
+    """Analisa `caminhos` em paralelo escrevendo uma linha JSON por imagem em `saida`.
+
+    Com `trace`, grava nesse caminho os tempos de cada etapa de todas as imagens
+    no formato trace event do Chrome (uma linha por worker).
+    Com `pessoas` > 1, cada foto pode ter até esse número de rostos e gera uma
+    linha por pessoa analisada.
+    Com `memoria`, as etapas também anotam o pico de memória (pico_kb, rss_kb) e
+    os bytes dos arrays de trabalho da análise do rosto (bytes_*), e cada linha
+    ganha o campo "memoria" com esses valores por etapa.
+    Retorna a quantidade de imagens processadas.
+    """
+    workers = workers or os.cpu_count() or 1
+    fila = queue.Queue(maxsize=pre_carregamento)
+    produtor = threading.Thread(target=_pre_carregar, args=(caminhos, fila), daemon=True)
+    produtor.start()
+
+    eventos = []
+
+    def escrever(registro, tempos=None, pid=None):
+        if memoria and tempos:
+            registro['memoria'] = memoria_por_etapa(tempos)
+        saida.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        saida.flush()
+        if trace is not None and tempos:
+            eventos.extend(eventos_chrome(tempos, pid=pid, tid=pid, args={'arquivo': registro['arquivo']}))
+
+    def escrever_resultado(resultado):
+        for item in (resultado if pessoas > 1 else [resultado]):
+            escrever(*item)
+
+    analisar = _analisar_pessoas if pessoas > 1 else _analisar
+    total = 0
+    pendentes = set()
+    with ProcessPoolExecutor(max_workers=workers, initializer=inicializar_worker,
+                             initargs=(pessoas, memoria)) as executor:
+        while True:
+            item = fila.get()
+            if item is _FIM:
+                break
+
+            caminho, imagem = item
+            if imagem is None:
+                escrever({'arquivo': caminho, 'erro': 'não foi possível decodificar a imagem'})
+                total += 1
+                continue
+
+            pendentes.add(executor.submit(analisar, caminho, imagem))
+
+            # LIMITA O QUE ESTÁ EM VOO PARA NÃO ACUMULAR IMAGENS DECODIFICADAS NA MEMÓRIA
+            if len(pendentes) >= 2 * workers:
+                prontos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+                for futuro in prontos:
+                    escrever_resultado(futuro.result())
+                    total += 1
+
+        for futuro in wait(pendentes).done:
+            escrever_resultado(futuro.result())
+            total += 1
+
+    if trace is not None:
+        gravar_trace_chrome(eventos, trace)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Análise de coloração pessoal em lote (JSONL).")
+    parser.add_argument("entrada", help="diretório de imagens ou padrão glob")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="processos worker (padrão: número de núcleos)")
+    parser.add_argument("-o", "--saida", default="-",
+                        help="arquivo JSONL de saída (padrão: stdout)")
+    parser.add_argument("--pre-carregamento", type=int, default=8,
+                        help="imagens decodificadas mantidas à frente dos workers")
+    parser.add_argument("--trace", default=None,
+                        help="grava os tempos por etapa neste arquivo (trace event JSON do Chrome)")
+    parser.add_argument("--pessoas", type=int, default=1,
+                        help="máximo de rostos por foto; acima de 1 gera um registro por pessoa")
+    parser.add_argument("--memoria", action="store_true",
+                        help="anota a memória de cada etapa no campo \"memoria\" (tracemalloc + RSS; mais lento)")
+    args = parser.parse_args(argv)
+
+    caminhos = listar_imagens(args.entrada)
+    if not caminhos:
+        print(f"Nenhuma imagem encontrada em '{args.entrada}'", file=sys.stderr)
+        return 1
+
+    if args.saida == "-":
+        total = processar_lote(caminhos, sys.stdout, args.workers, args.pre_carregamento, args.trace,
+                               args.pessoas, args.memoria)
+    else:
+        with open(args.saida, "w", encoding="utf-8") as saida:
+            total = processar_lote(caminhos, saida, args.workers, args.pre_carregamento, args.trace,
+                                   args.pessoas, args.memoria)
+
+    print(f"{total} imagens processadas", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
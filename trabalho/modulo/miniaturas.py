@@ -0,0 +1,128 @@
+"""Miniaturas das fotos de roupas, geradas uma vez e servidas por página.
+
+As miniaturas ficam em `<pasta das fotos>/.miniaturas/`, com um manifesto
+JSON que associa cada foto ao (mtime, tamanho, hash do conteúdo) e ao arquivo
+da miniatura. Fotos novas ou alteradas são reduzidas num pool de threads; as
+demais não são nem abertas.
+"""
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from cache import hash_conteudo
+
+EXTENSOES = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp')
+
+
+class LojaMiniaturas:
+
+    def __init__(self, pasta_origem, pasta_destino=None, lado=200, formato='WEBP', qualidade=80, workers=None):
+        self.pasta_origem = pasta_origem
+        self.pasta_destino = pasta_destino or os.path.join(pasta_origem, '.miniaturas')
+        self.lado = lado
+        self.formato = formato
+        self.qualidade = qualidade
+        self.workers = workers
+        self._caminho_manifesto = os.path.join(self.pasta_destino, 'manifesto.json')
+        self._manifesto = self._ler_manifesto()
+        self._ordem = self._ordenar()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ordem)
+
+    def _ler_manifesto(self):
+        try:
+            with open(self._caminho_manifesto, encoding='utf-8') as arquivo:
+                manifesto = json.load(arquivo)
+        except (OSError, ValueError):
+            return {}
+        # DESCARTA O MANIFESTO SE AS MINIATURAS FORAM GERADAS COM OUTRA CONFIGURAÇÃO
+        if manifesto.get('config') != self._config():
+            return {}
+        return manifesto.get('arquivos', {})
+
+    def _ordenar(self):
+        # SÓ ENTRAM NA GALERIA AS FOTOS QUE TÊM MINIATURA
+        return sorted(nome for nome, item in self._manifesto.items() if item.get('miniatura'))
+
+    def _config(self):
+        return {'lado': self.lado, 'formato': self.formato, 'qualidade': self.qualidade}
+
+    def _gravar_manifesto(self):
+        tmp = f"{self._caminho_manifesto}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as arquivo:
+            json.dump({'config': self._config(), 'arquivos': self._manifesto}, arquivo, ensure_ascii=False)
+        os.replace(tmp, self._caminho_manifesto)
+
+    def _gerar(self, nome):
+        # LÊ A FOTO UMA VEZ: HASH DO CONTEÚDO + MINIATURA (SE AINDA NÃO EXISTIR PARA ESSE HASH)
+        caminho = os.path.join(self.pasta_origem, nome)
+        with open(caminho, 'rb') as arquivo:
+            dados = arquivo.read()
+        chave = hash_conteudo(dados)
+        nome_miniatura = f"{chave}.{self.formato.lower()}"
+        destino = os.path.join(self.pasta_destino, nome_miniatura)
+
+        if not os.path.exists(destino):
+            with Image.open(caminho) as img:
+                # EM JPEG, draft() JÁ DECODIFICA EM RESOLUÇÃO REDUZIDA (1/2, 1/4 OU 1/8)
+                img.draft('RGB', (self.lado, self.lado))
+                img = img.convert('RGB')
+                img.thumbnail((self.lado, self.lado))
+                tmp = f"{destino}.{threading.get_ident()}.tmp"
+                img.save(tmp, format=self.formato, quality=self.qualidade)
+            os.replace(tmp, destino)
+
+        return chave, nome_miniatura
+
+    def sincronizar(self):
+        """Atualiza o manifesto com a pasta de origem. Retorna quantas miniaturas foram (re)feitas."""
+        with self._lock:
+            os.makedirs(self.pasta_destino, exist_ok=True)
+
+            atuais = {}
+            with os.scandir(self.pasta_origem) as entradas:
+                for entrada in entradas:
+                    if entrada.is_file() and os.path.splitext(entrada.name)[1].lower() in EXTENSOES:
+                        estado = entrada.stat()
+                        atuais[entrada.name] = (estado.st_mtime_ns, estado.st_size)
+
+            pendentes = [nome for nome, (mtime, tamanho) in atuais.items()
+                         if self._manifesto.get(nome, {}).get('mtime_ns') != mtime
+                         or self._manifesto.get(nome, {}).get('tamanho') != tamanho]
+            removidos = [nome for nome in self._manifesto if nome not in atuais]
+
+            if pendentes:
+                with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                    for nome, futuro in [(n, executor.submit(self._gerar, n)) for n in pendentes]:
+                        try:
+                            chave, nome_miniatura = futuro.result()
+                        except (OSError, ValueError, Image.DecompressionBombError):
+                            # ARQUIVO ILEGÍVEL: FICA FORA DA GALERIA ATÉ SER ALTERADO
+                            chave, nome_miniatura = None, None
+                        mtime, tamanho = atuais[nome]
+                        self._manifesto[nome] = {'mtime_ns': mtime, 'tamanho': tamanho,
+                                                 'hash': chave, 'miniatura': nome_miniatura}
+
+            for nome in removidos:
+                del self._manifesto[nome]
+
+            if pendentes or removidos:
+                self._gravar_manifesto()
+                self._ordem = self._ordenar()
+
+            return len(pendentes)
+
+    def pagina(self, numero, por_pagina):
+        # CAMINHOS DAS MINIATURAS DA PÁGINA `numero` (COMEÇANDO EM 0)
+        inicio = numero * por_pagina
+        with self._lock:
+            return [(nome, os.path.join(self.pasta_destino, self._manifesto[nome]['miniatura']))
+                    for nome in self._ordem[inicio:inicio + por_pagina]]
+
+    def total_paginas(self, por_pagina):
+        return max(1, -(-len(self._ordem) // por_pagina))
@@ -0,0 +1,150 @@
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class BuffersRascunho:
+    """Arrays de trabalho reaproveitados entre chamadas (ROI ampliada, LAB, HSV...).
+
+    obter() devolve sempre o mesmo array para o mesmo (nome, forma, dtype), com
+    o conteúdo da chamada anterior: quem usa deve sobrescrevê-lo inteiro (ex.:
+    como `dst` do OpenCV) e não guardá-lo depois que a análise terminar. Como os
+    modelos, não é thread-safe: cada ConjuntoModelos tem o seu.
+    """
+
+    def __init__(self):
+        self._arrays = {}
+
+    def obter(self, nome, forma, dtype=np.uint8):
+        chave = (nome, tuple(forma), np.dtype(dtype))
+        array = self._arrays.get(chave)
+        if array is None:
+            array = self._arrays[chave] = np.empty(forma, dtype=dtype)
+        return array
+
+    def bytes(self):
+        return sum(array.nbytes for array in self._arrays.values())
+
+
+class SemRascunho:
+    # MESMA INTERFACE, SEM REAPROVEITAR: UM ARRAY NOVO A CADA obter()
+    def obter(self, nome, forma, dtype=np.uint8):
+        return np.empty(forma, dtype=dtype)
+
+    def bytes(self):
+        return 0
+
+
+SEM_RASCUNHO = SemRascunho()
+
+
+class ConjuntoModelos:
+    """Grafos do MediaPipe (Pose + FaceMesh) inicializados uma única vez.
+
+    Um conjunto não é thread-safe: cada thread/worker deve usar o seu,
+    emprestado de um PoolModelos.
+
+    estatico=False liga o modo de rastreamento (vídeo): a detecção completa só
+    roda quando o rastreamento se perde, e os landmarks do quadro anterior
+    guiam o seguinte. Nesse modo os quadros precisam chegar em ordem e o
+    conjunto não deve ser usado para outras imagens.
+
+    max_rostos > 1 faz o FaceMesh devolver vários rostos numa única passada
+    (fotos de grupo); o Pose continua encontrando um único esqueleto.
+
+    reutilizar_buffers=True dá ao conjunto um BuffersRascunho: os arrays do
+    tamanho da ROI deixam de ser alocados a cada imagem.
+    """
+
+    def __init__(self, estatico=True, max_rostos=1, reutilizar_buffers=False):
+        # O MEDIAPIPE (E O MATPLOTLIB QUE ELE PUXA) SÓ É IMPORTADO QUANDO O PRIMEIRO CONJUNTO É CRIADO
+        import mediapipe as mp  # detecta as partes do corpo
+
+        mp_pose = mp.solutions.pose
+        mp_face_mesh = mp.solutions.face_mesh
+
+        self.estatico = estatico
+        self.max_rostos = max_rostos
+        self.rascunho = BuffersRascunho() if reutilizar_buffers else SEM_RASCUNHO
+        self.pose = mp_pose.Pose(static_image_mode=estatico)
+
+        # EM MODO ESTÁTICO O FACE MESH NÃO GUARDA ESTADO ENTRE IMAGENS, ENTÃO O
+        # MESMO GRAFO SERVE PARA A IMAGEM INTEIRA E PARA A ROI AMPLIADA
+        self.face_mesh = mp_face_mesh.FaceMesh(
+            static_image_mode=estatico,
+            max_num_faces=max_rostos,
+            refine_landmarks=True,
+            min_detection_confidence=0.5
+        )
+
+    def fechar(self):
+        self.pose.close()
+        self.face_mesh.close()
+
+
+class PoolModelos:
+    """Pool thread-safe de ConjuntoModelos.
+
+    Os conjuntos são criados sob demanda, até `tamanho`, e reaproveitados
+    pelas próximas requisições. Todos têm a mesma configuração (max_rostos).
+    """
+
+    def __init__(self, tamanho=None, max_rostos=1):
+        self.tamanho = tamanho or os.cpu_count() or 1
+        self.max_rostos = max_rostos
+        self._livres = queue.LifoQueue()
+        self._criados = 0
+        self._lock = threading.Lock()
+
+    def _criar_se_possivel(self):
+        with self._lock:
+            if self._criados >= self.tamanho:
+                return None
+            self._criados += 1
+        try:
+            return ConjuntoModelos(max_rostos=self.max_rostos)
+        except Exception:
+            with self._lock:
+                self._criados -= 1
+            raise
+
+    @contextmanager
+    def emprestar(self, timeout=None):
+        # PREFERE UM CONJUNTO JÁ AQUECIDO; SÓ CRIA OUTRO SE TODOS ESTIVEREM EM USO
+        try:
+            modelos = self._livres.get_nowait()
+        except queue.Empty:
+            modelos = self._criar_se_possivel()
+            if modelos is None:
+                modelos = self._livres.get(timeout=timeout)
+
+        try:
+            yield modelos
+        finally:
+            self._livres.put(modelos)
+
+    def fechar(self):
+        while True:
+            try:
+                modelos = self._livres.get_nowait()
+            except queue.Empty:
+                break
+            modelos.fechar()
+            with self._lock:
+                self._criados -= 1
+
+
+_pools = {}
+_pool_lock = threading.Lock()
+
+
+def obter_pool(tamanho=None, max_rostos=1):
+    # UM POOL POR CONFIGURAÇÃO NO PROCESSO, COMPARTILHADO POR processamento, app E SCRIPTS
+    with _pool_lock:
+        pool = _pools.get(max_rostos)
+        if pool is None:
+            pool = _pools[max_rostos] = PoolModelos(tamanho, max_rostos)
+        return pool
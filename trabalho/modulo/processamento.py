@@ -1,454 +1,654 @@
+from functools import lru_cache
+
 import cv2  # manipula imagens_roupas
-import mediapipe as mp  # detecta as partes do corpo
 import numpy as np
 
-
-medidas = {}
-def extrair_dados_da_imagem(imagem):
-    # RECEBE UMA IMAGEM BGR E RETORNA UM DICIONÁRIO COM MEDIDAS EXTRAÍDAS DELA
-    mp_pose = mp.solutions.pose
-    mp_face_mesh = mp.solutions.face_mesh
-
-    # CONVERTE PARA RGB
-    img_rgb = cv2.cvtColor(imagem, cv2.COLOR_BGR2RGB)
+from cores import bgr_para_cinza, bgr_para_hsv, bgr_para_lab, tabela_cores
+from landmarks import (CONTORNO_ROSTO, LATERAL_TESTA, MANDIBULA, OLHO_ESQUERDO, OMBROS, ORELHAS, POSE_NARIZ,
+                       POSE_OMBRO_ESQUERDO, POSE_QUADRIL_ESQUERDO, POSE_TORNOZELO_ESQUERDO, QUADRIS, QUEIXO,
+                       ROSTO_PONTA_NARIZ, ROSTO_QUEIXO, ROSTO_TOPO_TESTA, Landmarks)
+from modelos import SEM_RASCUNHO, obter_pool
+from resultado import ResultadoAnalise
+from tempos import Cronometro
+
+# MAIOR LADO (PIXELS) DA IMAGEM ENTREGUE AO POSE/FACE MESH; FOTOS MAIORES SÃO REDUZIDAS SÓ PARA A DETECÇÃO
+LADO_MAXIMO_DETECCAO = 1280
+
+# ABAIXO DESSA LARGURA (PIXELS NA DETECÇÃO) OS LANDMARKS DO ROSTO SÃO CONSIDERADOS POUCO CONFIÁVEIS
+LARGURA_MINIMA_ROSTO = 96
+
+# LADO MÍNIMO (PIXELS DA IMAGEM ORIGINAL) DA ROI EM VOLTA DO NARIZ, FOLGA EM VOLTA DO ROSTO E ZOOM DA ROI MÍNIMA
+ROI_MINIMA = 150
+FOLGA_ROI = 0.05
+ZOOM_ROI = 3
+# SEM ROSTO NA PRIMEIRA PASSADA: METADE DO LADO DA ROI EM LARGURAS DE ROSTO (ORELHA A ORELHA, DO POSE)
+MEIA_ROI_POR_LARGURA_ROSTO = 1.0
+
+# ETAPAS MARCADAS NO CRONOMETRO, NA ORDEM (face_mesh_roi SÓ APARECE COM PASSADA NA ROI: SEM ROSTO OU REFINAMENTO)
+ETAPAS_EXTRACAO = ('preparar_deteccao', 'pose', 'face_mesh', 'corpo', 'roi', 'pele', 'cabelo', 'olho',
+                   'vibrance', 'formato_rosto', 'classificar_tons')
+
+# CABELO: FAIXA HSV DO LOIRO, PRECISÃO DA TABELA DE CORES E MARGEM LATERAL DA CAIXA (FRAÇÃO DA LARGURA DO ROSTO)
+LOIRO_MIN = np.array([15, 40, 160])  # H, S, V
+LOIRO_MAX = np.array([45, 180, 255])
+BITS_TABELA_CABELO = 6
+MARGEM_CABELO = 0.5
+KERNEL_ROSTO = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (9, 9))
+
+# VIBRANCE: SATURAÇÃO ABAIXO DE 150 × 1.25 (TRUNCADA), O RESTO IGUAL; UMA TABELA EM VEZ DE PLANOS float32
+LUT_VIBRANCE = np.where(np.arange(256) < 150, np.arange(256) * 1.25, np.arange(256)).astype(np.uint8)
+
+# SUBTONS DE REFERÊNCIA
+subtons_bgr = {
+    "baixo contraste escuro": {
+        "Frio": [81, 113, 219],
+        "Neutro": [80, 117, 214],
+        "Quente": [66, 112, 207],
+        "Oliva": [66, 113, 185]
+    },
+    "baixo contraste claro": {
+        "Frio": [175, 188, 233],
+        "Neutro": [180, 196, 231],
+        "Quente": [170, 198, 230],
+        "Oliva": [180, 205, 235]
+    },
+    "medio contraste": {
+        "Frio": [138, 169, 255],
+        "Neutro": [135, 169, 254],
+        "Quente": [114, 158, 246],
+        "Oliva": [120, 169, 240]
+    }
+}
+
+# OS MESMOS SUBTONS JÁ EM L*a*b* (CONVERTIDOS UMA VEZ, NA IMPORTAÇÃO): grupo -> (nomes, array N×3)
+subtons_lab = {
+    grupo: (tuple(subtons), bgr_para_lab(list(subtons.values())).astype(np.float32))
+    for grupo, subtons in subtons_bgr.items()
+}
+
+
+def extrair_dados_da_imagem(imagem, modelos=None, depuracao=None, lado_maximo=LADO_MAXIMO_DETECCAO,
+                            refinar_rosto=False, cronometro=None):
+    # RECEBE UMA IMAGEM BGR E RETORNA (ResultadoAnalise, resultado da pose) COM AS MEDIDAS EXTRAÍDAS DELA
+    # modelos: ConjuntoModelos já aquecido; se omitido, um é emprestado do pool do processo
+    # depuracao: SaidaDepuracao opcional; sem ela nenhuma imagem ou mensagem de depuração é gerada
+    # lado_maximo: limite da imagem usada na detecção (None = resolução original)
+    # refinar_rosto: permite uma segunda passada do Face Mesh na ROI quando a primeira é pouco confiável
+    #                (quando a primeira não acha rosto nenhum, a passada na ROI sempre acontece)
+    # cronometro: Cronometro que recebe os tempos de cada etapa (um novo é criado se omitido);
+    #             as etapas também ficam em ResultadoAnalise.tempos
+    if modelos is None:
+        with obter_pool().emprestar() as modelos:
+            return extrair_dados_da_imagem(imagem, modelos, depuracao, lado_maximo, refinar_rosto, cronometro)
+
+    cronometro = Cronometro() if cronometro is None else cronometro
+    cronometro.reiniciar()
+    primeira_etapa = len(cronometro)
+    medidas = ResultadoAnalise()
+
+    # REDUZ SÓ A CÓPIA DA DETECÇÃO E CONVERTE PARA RGB; AS CORES CONTINUAM SENDO LIDAS DA IMAGEM ORIGINAL
+    proxy, escala = preparar_deteccao(imagem, lado_maximo)
+    img_rgb = cv2.cvtColor(proxy, cv2.COLOR_BGR2RGB)
+    if depuracao is not None and escala < 1:
+        depuracao.log(f"Detecção em {proxy.shape[1]}x{proxy.shape[0]} (escala {escala:.3f})")
+    pixels_deteccao = proxy.shape[0] * proxy.shape[1]
+    cronometro.marcar('preparar_deteccao', pixels=pixels_deteccao)
 
     # PROCESSA POSE E FACE
-    with mp_pose.Pose(static_image_mode=True) as pose, mp_face_mesh.FaceMesh(
-            static_image_mode=True,
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5
-    ) as face_mesh:
-
-        resultado = pose.process(img_rgb)
-        resultado_face = face_mesh.process(img_rgb)
+    resultado = modelos.pose.process(img_rgb)
+    cronometro.marcar('pose', pixels=pixels_deteccao)
+    resultado_face = modelos.face_mesh.process(img_rgb)
+    cronometro.marcar('face_mesh', pixels=pixels_deteccao)
+
+    # LANDMARKS CONVERTIDOS UMA ÚNICA VEZ PARA ARRAYS
+    pose = Landmarks.de_mediapipe(resultado.pose_landmarks) if resultado.pose_landmarks else None
+    rosto = None
+    if resultado_face.multi_face_landmarks:
+        rosto = Landmarks.de_mediapipe(resultado_face.multi_face_landmarks[0]).xy
 
     # ================================= CORPO =================================
-    if resultado.pose_landmarks:
-        try:
-            # ALTURA TOTAL (CABEÇA AO TORNOZELO)
-            topo = resultado.pose_landmarks.landmark[mp_pose.PoseLandmark.NOSE]
-            tornozelo = resultado.pose_landmarks.landmark[mp_pose.PoseLandmark.LEFT_ANKLE]
-            altura_total = round(abs(tornozelo.y - topo.y), 2)
-            medidas['altura_total'] = altura_total
-
-            # DISTANCIA OMBROS
-            l_shoulder = resultado.pose_landmarks.landmark[mp_pose.PoseLandmark.LEFT_SHOULDER]
-            r_shoulder = resultado.pose_landmarks.landmark[mp_pose.PoseLandmark.RIGHT_SHOULDER]
-            dx = (l_shoulder.x - r_shoulder.x)
-            dy = (l_shoulder.y - r_shoulder.y)
-            distancia = round(np.sqrt(dx ** 2 + dy ** 2), 2)
-            medidas['largura_ombros'] = distancia
-
-            # PROPORÇÃO TRONCO E PERNA
-            quadril = resultado.pose_landmarks.landmark[mp_pose.PoseLandmark.LEFT_HIP]
-            altura_tronco = abs(l_shoulder.y - quadril.y)
-            altura_pernas = abs(quadril.y - tornozelo.y)
-            proporcao_tronco_pernas = round(altura_tronco / altura_pernas, 2)
-            medidas['proporção'] = proporcao_tronco_pernas
-
-            # LARGURA QUADRIL
-            l_hip = resultado.pose_landmarks.landmark[mp_pose.PoseLandmark.LEFT_HIP]
-            r_hip = resultado.pose_landmarks.landmark[mp_pose.PoseLandmark.RIGHT_HIP]
-            dx_hip = (l_hip.x - r_hip.x)
-            dy_hip = (l_hip.y - r_hip.y)
-            largura_quadril = round(np.sqrt(dx_hip ** 2 + dy_hip ** 2), 2)
-            medidas['largura_quadril'] = largura_quadril
-
-            # DIFERENÇA OMBRO E QUADRIL
-            ombros = medidas.get('largura_ombros')
-            quadril = medidas.get('largura_quadril')
-            proporcao = medidas.get('proporção')
-            diferenca = abs(ombros - quadril)
-
-            # TIPO DE CORPO
-            if diferenca < 0.03:
-                if proporcao < 0.9:
-                    tipo_corpo = "Ampulheta"
-                else:
-                    tipo_corpo = "Retângulo"
-            elif ombros > quadril:
-                tipo_corpo = "Triângulo Invertido"
-            elif quadril > ombros:
-                tipo_corpo = "Pêra (Triângulo)"
-            else:
-                tipo_corpo = "Desconhecido"
+    if pose is not None:
+        medidas_corporais(pose, medidas, depuracao)
+    elif depuracao is not None:
+        depuracao.log("Landmarks corporais não detectados.")
+    cronometro.marcar('corpo')
 
-            medidas['tipo_corpo'] = tipo_corpo
+    if depuracao is not None:
+        depuracao.imagem("Imagem de Entrada", imagem)
 
-        except:
-            print("Não foi possível calcular todas as medidas corporais.")
+    # ================================= ROSTO  =================================
+    # OS LANDMARKS DO MEDIAPIPE SÃO NORMALIZADOS (0-1): MULTIPLICAR PELO TAMANHO DA IMAGEM ORIGINAL
+    # LEVA A DETECÇÃO FEITA NA CÓPIA REDUZIDA DIRETO PARA OS PIXELS EM RESOLUÇÃO CHEIA
+    # (rosto: x, y NORMALIZADOS DA ÚNICA PASSADA DO FACE MESH)
+    h, w, _ = imagem.shape
+
+    # NARIZ COMO CENTRO
+    if pose is not None:
+        centro = (pose.xy[POSE_NARIZ] * (w, h)).astype(int).tolist()
+    elif rosto is not None:
+        centro = (rosto[ROSTO_PONTA_NARIZ] * (w, h)).astype(int).tolist()  # ponto da ponta do nariz
     else:
-        print("Landmarks corporais não detectados.")
+        raise ValueError("Não foi possível localizar o nariz.")
+
+    # SEM ROSTO NA IMAGEM INTEIRA (CORPO INTEIRO, ROSTO PEQUENO) A PASSADA NA ROI DO NARIZ DO POSE É OBRIGATÓRIA;
+    # NUNCA REFINA EM MODO DE RASTREAMENTO (A ROI CONFUNDIRIA O ESTADO GUARDADO DO QUADRO ANTERIOR)
+    face_mesh_refino = modelos.face_mesh if (refinar_rosto or rosto is None) and modelos.estatico else None
+    largura_rosto = pose.distancia(ORELHAS, w, h) if rosto is None and pose is not None else 0
 
-    cv2.imshow("Imagem de Entrada", imagem)
+    analisar_rosto(imagem, centro, rosto, medidas, cronometro, depuracao, face_mesh_refino, modelos.rascunho,
+                   largura_deteccao=proxy.shape[1], largura_rosto=largura_rosto)
 
+    medidas.tempos = cronometro.etapas[primeira_etapa:]
+    return medidas, resultado
 
-    cv2.imshow("Imagem de Entrada", imagem)
 
-    # ================================= ROSTO  =================================
+def extrair_dados_de_pessoas(imagem, modelos=None, max_pessoas=4, depuracao=None,
+                             lado_maximo=LADO_MAXIMO_DETECCAO, cronometro=None, refinar_rosto=False):
+    # FOTO DE GRUPO: RETORNA ([ResultadoAnalise POR ROSTO, DA ESQUERDA PARA A DIREITA], resultado da pose)
+    # A REDUÇÃO, A CONVERSÃO PARA RGB, O POSE E O FACE MESH (max_num_faces=max_pessoas) RODAM UMA VEZ
+    # PARA A IMAGEM INTEIRA; PELE, CABELO, OLHOS E A CLASSIFICAÇÃO USAM O RECORTE DE CADA PESSOA.
+    # O POSE SÓ ENCONTRA UM ESQUELETO: AS MEDIDAS CORPORAIS VÃO PARA O ROSTO MAIS PRÓXIMO DO NARIZ DELE.
+    # modelos: ConjuntoModelos com max_rostos >= max_pessoas; se omitido, vem do pool dessa configuração
+    # cronometro: as etapas compartilhadas ficam em todas as pessoas; as do recorte, só na dona dele
+    # refinar_rosto: como em extrair_dados_da_imagem, por pessoa
+    if modelos is None:
+        with obter_pool(max_rostos=max_pessoas).emprestar() as modelos:
+            return extrair_dados_de_pessoas(imagem, modelos, max_pessoas, depuracao, lado_maximo, cronometro,
+                                            refinar_rosto)
+
+    cronometro = Cronometro() if cronometro is None else cronometro
+    cronometro.reiniciar()
+    primeira_etapa = len(cronometro)
+
+    proxy, _ = preparar_deteccao(imagem, lado_maximo)
+    img_rgb = cv2.cvtColor(proxy, cv2.COLOR_BGR2RGB)
+    pixels_deteccao = proxy.shape[0] * proxy.shape[1]
+    cronometro.marcar('preparar_deteccao', pixels=pixels_deteccao)
+
+    resultado = modelos.pose.process(img_rgb)
+    cronometro.marcar('pose', pixels=pixels_deteccao)
+    resultado_face = modelos.face_mesh.process(img_rgb)
+    cronometro.marcar('face_mesh', pixels=pixels_deteccao)
+
+    rostos = [Landmarks.de_mediapipe(face).xy for face in (resultado_face.multi_face_landmarks or [])]
+    if not rostos:
+        raise ValueError("Landmarks faciais não detectados.")
+    rostos.sort(key=lambda rosto: rosto[ROSTO_PONTA_NARIZ, 0])
+
+    # DONO DO ESQUELETO: ROSTO CUJA PONTA DO NARIZ ESTÁ MAIS PERTO DO NARIZ DO POSE
+    pose = Landmarks.de_mediapipe(resultado.pose_landmarks) if resultado.pose_landmarks else None
+    dono_pose = None
+    if pose is not None:
+        narizes = np.array([rosto[ROSTO_PONTA_NARIZ] for rosto in rostos])
+        dono_pose = int(np.argmin(np.linalg.norm(narizes - pose.xy[POSE_NARIZ], axis=1)))
+    cronometro.marcar('corpo')
+    compartilhadas = cronometro.etapas[primeira_etapa:]
+
+    face_mesh_refino = modelos.face_mesh if refinar_rosto and modelos.estatico else None
+    h, w, _ = imagem.shape
+    pessoas = []
+    for i, rosto in enumerate(rostos):
+        medidas = ResultadoAnalise()
+        if i == dono_pose:
+            medidas_corporais(pose, medidas, depuracao)
+
+        inicio_pessoa = len(cronometro)
+        centro = (rosto[ROSTO_PONTA_NARIZ] * (w, h)).astype(int).tolist()
+        try:
+            analisar_rosto(imagem, centro, rosto, medidas, cronometro, depuracao, face_mesh_refino,
+                           modelos.rascunho, largura_deteccao=proxy.shape[1])
+        except ValueError as e:  # ROSTO CORTADO NA BORDA, SEM PELE VISÍVEL...
+            if depuracao is not None:
+                depuracao.log(f"Pessoa {i + 1} ignorada: {e}")
+            continue
+        medidas.tempos = compartilhadas + cronometro.etapas[inicio_pessoa:]
+        pessoas.append(medidas)
+
+    if not pessoas:
+        raise ValueError("Nenhum rosto pôde ser analisado.")
+    return pessoas, resultado
+
+
+def medidas_corporais(pose, medidas, depuracao=None):
+    # PREENCHE EM `medidas` AS MEDIDAS DO CORPO A PARTIR DOS LANDMARKS DO POSE
+    try:
+        y = pose.pontos[:, 1]
+
+        # ALTURA TOTAL (CABEÇA AO TORNOZELO)
+        medidas.altura_total = round(float(abs(y[POSE_TORNOZELO_ESQUERDO] - y[POSE_NARIZ])), 2)
+
+        # DISTANCIA OMBROS
+        medidas.largura_ombros = round(pose.distancia(OMBROS), 2)
+
+        # PROPORÇÃO TRONCO E PERNA
+        altura_tronco = float(abs(y[POSE_OMBRO_ESQUERDO] - y[POSE_QUADRIL_ESQUERDO]))
+        altura_pernas = float(abs(y[POSE_QUADRIL_ESQUERDO] - y[POSE_TORNOZELO_ESQUERDO]))
+        medidas.proporcao = round(altura_tronco / altura_pernas, 2)
+
+        # LARGURA QUADRIL
+        medidas.largura_quadril = round(pose.distancia(QUADRIS), 2)
+
+        # DIFERENÇA OMBRO E QUADRIL
+        medidas.tipo_corpo = classificar_tipo_corpo(medidas.largura_ombros,
+                                                    medidas.largura_quadril,
+                                                    medidas.proporcao)
+    except:
+        if depuracao is not None:
+            depuracao.log("Não foi possível calcular todas as medidas corporais.")
+
+
+def analisar_rosto(imagem, centro, rosto, medidas, cronometro, depuracao=None, face_mesh_refino=None,
+                   rascunho=SEM_RASCUNHO, largura_deteccao=0, largura_rosto=0):
+    # PELE, CABELO, OLHO, VIBRANCE, FORMATO DO ROSTO E CLASSIFICAÇÃO DE UMA PESSOA, NO RECORTE EM VOLTA DE `centro`
+    # centro: (x, y) DO NARIZ EM PIXELS DA IMAGEM ORIGINAL; rosto: LANDMARKS NORMALIZADOS (OU None)
+    # face_mesh_refino: FaceMesh para uma segunda passada na ROI ampliada, feita só quando a primeira é pouco
+    #                   confiável (confianca_baixa); None = nunca refina
+    # largura_deteccao: largura (pixels) da imagem da primeira passada
+    # largura_rosto: largura do rosto (pixels da imagem original) vinda do pose, usada quando rosto é None
+    # rascunho: de onde vêm os arrays do tamanho da ROI (BuffersRascunho do ConjuntoModelos para reaproveitá-los)
     h, w, _ = imagem.shape
-    # NARIZ COMO CENTRO
-    nariz = None
-    if resultado.pose_landmarks:
-        nariz = resultado.pose_landmarks.landmark[mp_pose.PoseLandmark.NOSE]
-        cx, cy = int(nariz.x * w), int(nariz.y * h)
-    elif resultado_face.multi_face_landmarks:
-        face_landmarks = resultado_face.multi_face_landmarks[0]
-        nariz_face = face_landmarks.landmark[4]  # ponto da ponta do nariz
-        cx, cy = int(nariz_face.x * w), int(nariz_face.y * h)
-    else:
-        print("Não foi possível localizar o nariz.")
 
-    # DEFINIR ROI (zoom 3x ao redor do nariz)
-    zoom_factor = 3
-    roi_size = 150  # TAMANHO (pixels)
-    x1 = max(cx - roi_size // 2, 0)
-    y1 = max(cy - roi_size // 2, 0)
-    x2 = min(cx + roi_size // 2, w)
-    y2 = min(cy + roi_size // 2, h)
+    # DEFINIR ROI: QUADRADO EM VOLTA DO NARIZ QUE CONTÉM O ROSTO DA PRIMEIRA PASSADA (ver caixa_roi_do_rosto),
+    # SEMPRE AMPLIADO PARA lado_roi × lado_roi (zoom 3x NA ROI MÍNIMA)
+    lado_roi = ROI_MINIMA * ZOOM_ROI
+    caixa_roi = caixa_roi_do_rosto(rosto, centro, (w, h), largura_rosto)
+    x1, y1, x2, y2 = caixa_roi
 
     roi = imagem[y1:y2, x1:x2]
-
-    # AMPLIAR A ROI (zoom no rosto)
-    if roi.size > 0:
-        roi_ampliada = cv2.resize(roi, (roi_size * zoom_factor, roi_size * zoom_factor))
-
-        # APLICAR FACE MESH NA ROI AMPLIADA
-        with mp_face_mesh.FaceMesh(
-                static_image_mode=True,
-                max_num_faces=1,
-                refine_landmarks=True,
-                min_detection_confidence=0.5
-        ) as face_mesh:
-            roi_rgb = cv2.cvtColor(roi_ampliada, cv2.COLOR_BGR2RGB)
-            resultado_face = face_mesh.process(roi_rgb)
-
-            if resultado_face.multi_face_landmarks:
-                face_landmarks = resultado_face.multi_face_landmarks[0]
-
-                ponto_nariz = face_landmarks.landmark[4]  # ponta do nariz
-                h_roi, w_roi, _ = roi_ampliada.shape
-                x_nose, y_nose = int(ponto_nariz.x * w_roi), int(ponto_nariz.y * h_roi)
-
-                offset = 8  # área mais precisa
-                x1 = max(x_nose - offset, 0)
-                y1 = max(y_nose - offset, 0)
-                x2 = min(x_nose + offset, w_roi)
-                y2 = min(y_nose + offset, h_roi)
-
-                coordenadas_roi = (x1, y1, x2, y2)  # salva para usar no rosto saturado
-                regiao_pele = roi_ampliada[y1:y2, x1:x2]
-
-                if regiao_pele.size > 0:
-                    # APLICA FILTRO HSV
-                    regiao_hsv = cv2.cvtColor(regiao_pele, cv2.COLOR_BGR2HSV)
-                    mask_pele = cv2.inRange(regiao_hsv, (0, 30, 60), (25, 150, 255))
-                    regiao_filtrada = cv2.bitwise_and(regiao_pele, regiao_pele, mask=mask_pele)
-
-                    # CALCULA MÉDIA DOS PIXELS DA PELE
-                    tom_pele = cv2.mean(regiao_filtrada, mask=mask_pele)[:3]
-                    medidas['tom_de_pele'] = np.array(tom_pele).astype(int)
-
-                    # MOSTRA IMAGEM
-                    debug_img = roi_ampliada.copy()
-                    cv2.rectangle(debug_img, (x1, y1), (x2, y2), (0, 255, 0), 2)
-            else:
-                print("Landmarks faciais não detectados.")
+    if roi.size == 0:
+        raise ValueError("Região do rosto fora da imagem.")
+
+    # AMPLIAR A ROI (zoom no rosto; ROSTOS GRANDES SÃO REDUZIDOS, COM INTER_AREA)
+    interpolacao = cv2.INTER_AREA if max(roi.shape[:2]) > lado_roi else cv2.INTER_LINEAR
+    roi_ampliada = cv2.resize(roi, (lado_roi, lado_roi), dst=rascunho.obter('roi_ampliada', (lado_roi, lado_roi, 3)),
+                              interpolation=interpolacao)
+    cronometro.marcar('roi', pixels=lado_roi * lado_roi, **_bytes_rascunho(cronometro, rascunho, roi_ampliada))
+
+    # REFINAMENTO OPCIONAL: SEGUNDA PASSADA DO FACE MESH NA ROI AMPLIADA, SÓ SE A PRIMEIRA FOI FRACA
+    pontos_roi = None
+    if face_mesh_refino is not None and confianca_baixa(rosto, largura_deteccao):
+        roi_rgb = cv2.cvtColor(roi_ampliada, cv2.COLOR_BGR2RGB, dst=rascunho.obter('roi_rgb', roi_ampliada.shape))
+        resultado_roi = face_mesh_refino.process(roi_rgb)
+        if resultado_roi.multi_face_landmarks:
+            # COM VÁRIOS ROSTOS NA ROI (FOTO DE GRUPO), FICA O DE NARIZ MAIS PERTO DO CENTRO DELA
+            candidatos = [Landmarks.de_mediapipe(face).xy for face in resultado_roi.multi_face_landmarks]
+            melhor = min(candidatos, key=lambda pontos: np.abs(pontos[ROSTO_PONTA_NARIZ] - 0.5).sum())
+            pontos_roi = melhor * lado_roi
+            rosto = roi_para_normalizado(pontos_roi, caixa_roi, lado_roi, (w, h))
+            if depuracao is not None:
+                depuracao.log("Landmarks do rosto refinados na ROI ampliada.")
+        cronometro.marcar('face_mesh_roi', pixels=lado_roi * lado_roi, **_bytes_rascunho(cronometro, rascunho))
+
+    if rosto is None:
+        raise ValueError("Landmarks faciais não detectados.")
+
+    # CAMINHO NORMAL: PROJETA OS LANDMARKS DA IMAGEM INTEIRA NA ROI AMPLIADA (QUE CONTÉM TODOS ELES)
+    if pontos_roi is None:
+        pontos_roi = projetar_na_roi(rosto, caixa_roi, lado_roi, (w, h))
+
+    h_roi, w_roi, _ = roi_ampliada.shape
+    x_nose, y_nose = pontos_roi[ROSTO_PONTA_NARIZ].astype(int).tolist()  # ponta do nariz
+
+    offset = 8  # área mais precisa
+    x1 = max(x_nose - offset, 0)
+    y1 = max(y_nose - offset, 0)
+    x2 = min(x_nose + offset, w_roi)
+    y2 = min(y_nose + offset, h_roi)
+
+    regiao_pele = roi_ampliada[y1:y2, x1:x2]
+    medidas.tom_de_pele = media_pele(regiao_pele)
+
+    # MOSTRA IMAGEM
+    if depuracao is not None:
+        debug_img = roi_ampliada.copy()
+        cv2.rectangle(debug_img, (x1, y1), (x2, y2), (0, 255, 0), 2)
+    cronometro.marcar('pele', pixels=regiao_pele.shape[0] * regiao_pele.shape[1])
 
     # =================================CABELO =================================
-    if face_landmarks:
-        try:
-            h_roi, w_roi, _ = roi_ampliada.shape
-
-            # ENCONTRA LINHA DO QUEIXO
-            ponto_queixo = max(
-                [(int(lm.x * w_roi), int(lm.y * h_roi)) for lm in face_landmarks.landmark[152:155]],
-                key=lambda p: p[1]
-            )
-
-            # CONVERTE PARA HSV (Matiz, Saturação, Valor)
-            hsv = cv2.cvtColor(roi_ampliada, cv2.COLOR_BGR2HSV)
-
-            # MASCARA LOIRO
-            loiro_min = np.array([15, 40, 160])  # H, S, V
-            loiro_max = np.array([45, 180, 255])
-            mask_loiro = cv2.inRange(hsv, loiro_min, loiro_max)
-
-            # MASCARA MORENO
-            gray = cv2.cvtColor(roi_ampliada, cv2.COLOR_BGR2GRAY)
-            _, mask_escura = cv2.threshold(gray, 90, 255, cv2.THRESH_BINARY_INV)
-
-            # MASCARA DO ROSTO
-            mask_rosto = np.zeros_like(gray)
-            pontos_rosto = np.array([
-                (int(lm.x * w_roi), int(lm.y * h_roi)) for lm in face_landmarks.landmark[:468]
-            ])
-            cv2.fillConvexPoly(mask_rosto, pontos_rosto, 255)
-            kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (9, 9))
-            mask_rosto = cv2.dilate(mask_rosto, kernel)
-
-            # ISOLA A MASCARA DO CABELO
-            mask_cabelo_total = cv2.bitwise_or(mask_loiro, mask_escura)
-            mask_cabelo = cv2.subtract(mask_cabelo_total, mask_rosto)
-
-            # RESTRINGE ÁREA ACIMA DO QUEIXO
-            mask_regiao = np.zeros_like(gray)
-            cv2.rectangle(mask_regiao, (0, 0), (w_roi, ponto_queixo[1] - 10), 255, -1)
-            mask_cabelo = cv2.bitwise_and(mask_cabelo, mask_regiao)
-
-            # ENCONTRA CONTORNOS
-            contornos, _ = cv2.findContours(mask_cabelo, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            if contornos:
-                maior_contorno = max(contornos, key=cv2.contourArea)
-                mascara_final = np.zeros_like(gray)
-                cv2.drawContours(mascara_final, [maior_contorno], -1, 255, -1)
-
-                # MOSTRA IMAGEM
-                cv2.drawContours(debug_img, [maior_contorno], -1, (0, 255, 0), 2)
-                cv2.line(debug_img, (0, ponto_queixo[1] - 10), (w_roi, ponto_queixo[1] - 10), (0, 0, 255), 2)
-                area_cabelo = cv2.countNonZero(mascara_final)
-                limite_area_minima = 500  # Ajuste conforme seus testes (valor empírico)
-
-                if area_cabelo < limite_area_minima:
-                    medidas['pouco_cabelo'] = True
-                    medidas['tom_de_cabelo'] = None
-                else:
-                    # EXTRAIR PIXELS DO CABELO
-                    pixels_cabelo = cv2.bitwise_and(roi_ampliada, roi_ampliada, mask=mascara_final)
-                    media_cabelo = cv2.mean(pixels_cabelo, mask=mascara_final)[:3]
-                    medidas['tom_de_cabelo'] = np.array(media_cabelo).astype(int)
-                    medidas['pouco_cabelo'] = False
-
+    pixels_cabelo = 0
+    mascaras_cabelo = []
+    try:
+        # SÓ A CAIXA EM VOLTA DA TESTA/TÊMPORAS, ACIMA DO QUEIXO, É ANALISADA
+        cx0, cy0, cx1, cy1 = caixa_cabelo(pontos_roi, roi_ampliada.shape)
+        recorte = roi_ampliada[cy0:cy1, cx0:cx1]
+        pixels_cabelo = recorte.shape[0] * recorte.shape[1]
+        if recorte.size == 0:
+            raise ValueError("Região do cabelo vazia.")
+
+        # MASCARA LOIRO + MORENO EM UMA PASSADA DA TABELA
+        mask_cabelo_total = mascara_cabelo(recorte)
+
+        # MASCARA DO ROSTO (SÓ NO RECORTE)
+        mask_rosto = np.zeros_like(mask_cabelo_total)
+        pontos_rosto = (pontos_roi[CONTORNO_ROSTO] - (cx0, cy0)).astype(np.int32)
+        cv2.fillConvexPoly(mask_rosto, pontos_rosto, 255)
+        mask_rosto = cv2.dilate(mask_rosto, KERNEL_ROSTO)
+
+        # ISOLA A MASCARA DO CABELO
+        mask_cabelo = cv2.subtract(mask_cabelo_total, mask_rosto)
+        mascaras_cabelo = [mask_cabelo_total, mask_rosto, mask_cabelo]
+
+        # ENCONTRA CONTORNOS
+        contornos, _ = cv2.findContours(mask_cabelo, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if contornos:
+            maior_contorno = max(contornos, key=cv2.contourArea)
+            mascara_final = np.zeros_like(mask_cabelo)
+            cv2.drawContours(mascara_final, [maior_contorno], -1, 255, -1)
+            mascaras_cabelo.append(mascara_final)
+
+            # MOSTRA IMAGEM
+            if depuracao is not None:
+                cv2.drawContours(debug_img, [maior_contorno], -1, (0, 255, 0), 2, offset=(cx0, cy0))
+                cv2.line(debug_img, (0, cy1 - 1), (w_roi, cy1 - 1), (0, 0, 255), 2)
+            area_cabelo = cv2.countNonZero(mascara_final)
+            limite_area_minima = 500  # Ajuste conforme seus testes (valor empírico)
+
+            if area_cabelo < limite_area_minima:
+                medidas.pouco_cabelo = True
+                medidas.tom_de_cabelo = None
             else:
-                medidas['pouco_cabelo'] = True
-
-        except Exception as e:
-            print(f"Erro na análise de cabelo: {str(e)}")
-            medidas['pouco_cabelo'] = True
+                # EXTRAIR PIXELS DO CABELO
+                media_cabelo = cv2.mean(recorte, mask=mascara_final)[:3]
+                medidas.tom_de_cabelo = tuple(int(c) for c in media_cabelo)
+                medidas.pouco_cabelo = False
 
-    # ================================= OLHO =================================
-    olho_esquerdo = [33, 133]
-    olho_direito = [362, 263]
+        else:
+            medidas.pouco_cabelo = True
 
-    for face_landmarks in resultado_face.multi_face_landmarks:
-        h, w, _ = roi_ampliada.shape
+    except Exception as e:
+        if depuracao is not None:
+            depuracao.log(f"Erro na análise de cabelo: {str(e)}")
+        medidas.pouco_cabelo = True
+    cronometro.marcar('cabelo', pixels=pixels_cabelo,
+                      bytes_mascaras=sum(m.nbytes for m in mascaras_cabelo) if cronometro.memoria else None)
 
-        # COR DO OLHO ESQUERDO
-        left_eye_coords = np.array([(int(face_landmarks.landmark[i].x * w),
-                                     int(face_landmarks.landmark[i].y * h)) for i in olho_esquerdo])
+    # ================================= OLHO =================================
+    # COR DO OLHO ESQUERDO
+    left_eye_coords = pontos_roi[OLHO_ESQUERDO].astype(int)
 
-        # REGIÃO EM VOLTA DO OLHO
-        min_x = int(min(left_eye_coords[:, 0]))
-        max_x = int(max(left_eye_coords[:, 0]))
-        min_y = int(min(left_eye_coords[:, 1]))
-        max_y = int(max(left_eye_coords[:, 1]))
+    # REGIÃO EM VOLTA DO OLHO
+    min_x, min_y = left_eye_coords.min(axis=0).tolist()
+    max_x, max_y = left_eye_coords.max(axis=0).tolist()
 
-        # EXTRAI A COR DO OLHO
-        eye_region = roi_ampliada[min_y - 5: max_y + 5, min_x - 5: max_x + 5]
+    # EXTRAI A COR DO OLHO
+    eye_region = roi_ampliada[max(min_y - 5, 0): max_y + 5, max(min_x - 5, 0): max_x + 5]
+    if eye_region.size == 0:
+        raise ValueError("Olho fora da região analisada.")
 
-        # CALCULA A MÉDIA
-        average_color = np.mean(eye_region, axis=(0, 1))
-        medidas['tom_de_olho'] = np.round(average_color).astype(int)
+    # CALCULA A MÉDIA
+    average_color = np.mean(eye_region, axis=(0, 1))
+    medidas.tom_de_olho = tuple(int(c) for c in np.round(average_color))
 
-        # ADICIONA NA IMAGEM
+    # ADICIONA NA IMAGEM
+    if depuracao is not None:
         cv2.rectangle(debug_img, (min_x, min_y), (max_x, max_y), (0, 255, 0), 1)
-        cv2.imshow("Rosto analisado", debug_img)
+        depuracao.imagem("Rosto analisado", debug_img)
+    cronometro.marcar('olho', pixels=eye_region.shape[0] * eye_region.shape[1])
 
-    # =================================CONTRASTE =================================
-    def bgr_to_gray_scale_0_10(bgr):
-        gray = int(0.114 * bgr[0] + 0.587 * bgr[1] + 0.299 * bgr[2])
-        escala = np.clip(round(gray / 255 * 10), 0, 10)
-        return escala
+    # ================================= ROSTO COM MAIOR VIBRAÇÃO =================================
+    imagem_realcada = vibrance_contraste_suave(roi_ampliada, rascunho)
 
-    # OBTÉM ESCALA DE CINZA DOS TONS
-    if 'tom_de_pele' in medidas and 'tom_de_cabelo' in medidas and medidas['tom_de_cabelo'] is not None:
-        escala_pele = bgr_to_gray_scale_0_10(medidas['tom_de_pele'])
-        escala_cabelo = bgr_to_gray_scale_0_10(medidas['tom_de_cabelo'])
-        escala_olhos = bgr_to_gray_scale_0_10(medidas['tom_de_olho'])
-    else:  # caso a pessoa não tenha cabelo ou tenha o cabelo com tom semelhante a pele
-        escala_pele = bgr_to_gray_scale_0_10(medidas['tom_de_pele'])
-        escala_cabelo = escala_pele
-        escala_olhos = bgr_to_gray_scale_0_10(medidas['tom_de_olho'])
+    # MESMA REGIÃO DA PELE, AGORA NA IMAGEM REALÇADA
+    regiao_pele = imagem_realcada[y1:y2, x1:x2]
+    medidas.cor_saturada = media_pele(regiao_pele)
 
-    # ENCONTRA TONS EXTREMOS
-    tons = [escala_pele, escala_cabelo, escala_olhos]
-    tom_min = min(tons)
-    tom_max = max(tons)
-    intervalo = tom_max - tom_min
+    # MOSTRA A IMAGEM REALÇADA
+    if depuracao is not None:
+        debug_img = imagem_realcada.copy()
+        cv2.rectangle(debug_img, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        depuracao.imagem("Rosto novo", debug_img)
+    cronometro.marcar('vibrance', pixels=lado_roi * lado_roi, **_bytes_rascunho(cronometro, rascunho))
 
-    # CLASSIFICA O CONTRASTE
-    if intervalo <= 3:
-        if escala_pele <= 6:
-            contraste = "Baixo contraste escuro"
+    # =========== FORMATO DO ROSTO ===========
+    # LANDMARKS DA IMAGEM INTEIRA EM PIXELS DA IMAGEM ORIGINAL
+    pontos = (rosto * (w, h)).astype(int)
+    medidas.formato_rosto = classificar_formato_rosto(pontos)
+    cronometro.marcar('formato_rosto')
+
+    # ================= CONTRASTE, SUBTOM, INTENSIDADE E PROFUNDIDADE =================
+    if medidas.tom_de_pele is None:
+        raise ValueError("Não foi possível extrair o tom de pele.")
+    classificar_tons(medidas)
+    cronometro.marcar('classificar_tons')
+
+
+def _bytes_rascunho(cronometro, rascunho, roi_ampliada=None):
+    # COM cronometro.memoria: BYTES DOS ARRAYS DE TRABALHO GUARDADOS NO rascunho (E DA ROI AMPLIADA) NESTA ETAPA
+    if not cronometro.memoria:
+        return {}
+    contagens = {'bytes_rascunho': rascunho.bytes()}
+    if roi_ampliada is not None:
+        contagens['bytes_roi'] = roi_ampliada.nbytes
+    return contagens
+
+
+def preparar_deteccao(imagem, lado_maximo=LADO_MAXIMO_DETECCAO):
+    # RETORNA (imagem para detecção, escala em relação à original); SÓ REDUZ, NUNCA AMPLIA
+    h, w = imagem.shape[:2]
+    if not lado_maximo or max(h, w) <= lado_maximo:
+        return imagem, 1.0
+
+    escala = lado_maximo / max(h, w)
+    tamanho = (max(1, round(w * escala)), max(1, round(h * escala)))
+    return cv2.resize(imagem, tamanho, interpolation=cv2.INTER_AREA), escala
+
+
+def projetar_na_roi(rosto, caixa_roi, lado_roi, tamanho_imagem):
+    # NORMALIZADO NA IMAGEM INTEIRA -> PIXELS DA ROI AMPLIADA (cada eixo tem a sua escala se a ROI foi cortada na borda)
+    x1, y1, x2, y2 = caixa_roi
+    w, h = tamanho_imagem
+    escala = np.array([lado_roi / (x2 - x1), lado_roi / (y2 - y1)], dtype=np.float32)
+    return (rosto * (w, h) - (x1, y1)) * escala
+
+
+def roi_para_normalizado(pontos_roi, caixa_roi, lado_roi, tamanho_imagem):
+    # INVERSA DE projetar_na_roi
+    x1, y1, x2, y2 = caixa_roi
+    w, h = tamanho_imagem
+    escala = np.array([(x2 - x1) / lado_roi, (y2 - y1) / lado_roi], dtype=np.float32)
+    return (pontos_roi * escala + (x1, y1)) / (w, h)
+
+
+def confianca_baixa(rosto, largura_deteccao):
+    # SEM ROSTO, OU ROSTO COM MENOS DE LARGURA_MINIMA_ROSTO PIXELS NA IMAGEM DE DETECÇÃO
+    if rosto is None:
+        return True
+    largura = abs(np.diff(rosto[MANDIBULA, 0])[0]) * largura_deteccao
+    return largura < LARGURA_MINIMA_ROSTO
+
+
+def caixa_roi_do_rosto(rosto, centro, tamanho_imagem, largura_rosto=0):
+    # (x1, y1, x2, y2) NA IMAGEM ORIGINAL: QUADRADO CENTRADO NO NARIZ COM TODOS OS LANDMARKS DO ROSTO E A CAIXA
+    # DO CABELO (caixa_cabelo) DA PRIMEIRA PASSADA, MAIS FOLGA_ROI; ASSIM PELE, OLHO E CABELO PROJETADOS CAEM
+    # SEMPRE DENTRO DA ROI. NUNCA MENOR QUE ROI_MINIMA; SEM ROSTO, O LADO VEM DE largura_rosto (ORELHAS DO POSE)
+    w, h = tamanho_imagem
+    cx, cy = centro
+    meio = max(ROI_MINIMA // 2, int(np.ceil(largura_rosto * MEIA_ROI_POR_LARGURA_ROSTO)))
+    if rosto is not None:
+        pixels = rosto * (w, h)
+        cabelo_x0, cabelo_y0, cabelo_x1, _ = caixa_cabelo(pixels, (h, w))
+        esquerda, topo = np.minimum(pixels.min(axis=0), (cabelo_x0, cabelo_y0)).tolist()
+        direita, base = np.maximum(pixels.max(axis=0), (cabelo_x1, 0)).tolist()
+        alcance = max(cx - esquerda, direita - cx, cy - topo, base - cy) * (1 + FOLGA_ROI)
+        meio = max(meio, int(np.ceil(alcance)))
+    return max(cx - meio, 0), max(cy - meio, 0), min(cx + meio, w), min(cy + meio, h)
+
+
+def caixa_cabelo(pontos_roi, forma_roi):
+    # (x0, y0, x1, y1) NA ROI AMPLIADA: LARGURA DAS TÊMPORAS/MANDÍBULA + MARGEM_CABELO DE CADA LADO,
+    # DO ALTO DA TESTA (MENOS MEIA ALTURA DO ROSTO) ATÉ 10 PIXELS ACIMA DO QUEIXO
+    h_roi, w_roi = forma_roi[:2]
+    laterais = pontos_roi[np.concatenate([LATERAL_TESTA, MANDIBULA]), 0]
+    largura = laterais.max() - laterais.min()
+    topo = pontos_roi[ROSTO_TOPO_TESTA, 1]
+    queixo = pontos_roi[QUEIXO, 1].max()
+
+    x0 = max(int(laterais.min() - MARGEM_CABELO * largura), 0)
+    x1 = min(int(laterais.max() + MARGEM_CABELO * largura), w_roi)
+    y0 = max(int(topo - 0.5 * (queixo - topo)), 0)
+    y1 = min(int(queixo) - 10 + 1, h_roi)
+    return x0, y0, x1, y1
+
+
+@lru_cache(maxsize=1)
+def tabela_cabelo():
+    # PARA CADA COR BGR QUANTIZADA: 255 SE FOR LOIRO (FAIXA HSV) OU ESCURO (CINZA <= 90), SENÃO 0
+    hsv = tabela_cores(cv2.COLOR_BGR2HSV, BITS_TABELA_CABELO)
+    cinza = tabela_cores(cv2.COLOR_BGR2GRAY, BITS_TABELA_CABELO)
+    loiro = np.all((hsv.tabela >= LOIRO_MIN) & (hsv.tabela <= LOIRO_MAX), axis=1)
+    escuro = cinza.tabela[:, 0] <= 90
+    return hsv, np.where(loiro | escuro, 255, 0).astype(np.uint8)
+
+
+def mascara_cabelo(regiao):
+    # MÁSCARA uint8 (0/255) DOS PIXELS COM COR DE CABELO, COM UMA ÚNICA INDEXAÇÃO
+    tabela, valores = tabela_cabelo()
+    return valores[tabela.indices(regiao)]
+
+
+def classificar_tipo_corpo(ombros, quadril, proporcao):
+    diferenca = abs(ombros - quadril)
+
+    # TIPO DE CORPO
+    if diferenca < 0.03:
+        if proporcao < 0.9:
+            return "Ampulheta"
         else:
-            contraste = "Baixo contraste claro"
-    elif intervalo <= 5:
-        contraste = "Contraste médio"
+            return "Retângulo"
+    elif ombros > quadril:
+        return "Triângulo Invertido"
+    elif quadril > ombros:
+        return "Pêra (Triângulo)"
     else:
-        contraste = "Alto contraste"
+        return "Desconhecido"
 
-    # ADICIONA NO DICIONÁRIO
-    medidas["Tom de pele (escala 0-10)"] = escala_pele
-    medidas["Tom de cabelo (escala 0-10)"] = escala_cabelo
-    medidas["Tom dos olhos (escala 0-10)"] = escala_olhos
-    medidas["Intervalo de contraste"] = intervalo
-    medidas["Classificação"] = contraste
 
-    # ================================= ROSTO COM MAIOR VIBRAÇÃO =================================
-    def vibrance_contraste_suave(roi_ampliada):
-        lab = cv2.cvtColor(roi_ampliada, cv2.COLOR_BGR2LAB)
-        l, a, b = cv2.split(lab)
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        l_clahe = clahe.apply(l)
-        img_clahe = cv2.merge((l_clahe, a, b))
-        img_bgr_clahe = cv2.cvtColor(img_clahe, cv2.COLOR_LAB2BGR)
-
-        # conversão para HSV
-        hsv = cv2.cvtColor(img_bgr_clahe, cv2.COLOR_BGR2HSV).astype("float32")
-        h, s, v = cv2.split(hsv)
-
-        # vibrance: aumenta onde a saturação é baixa
-        vibrance_mask = s < 150  # onde a saturação é média ou baixa
-        s[vibrance_mask] *= 1.25  # aumento seletivo
-        s = np.clip(s, 0, 255)
-
-        hsv_vibrant = cv2.merge([h, s, v])
-        result_bgr = cv2.cvtColor(hsv_vibrant.astype("uint8"), cv2.COLOR_HSV2BGR)
-
-        return result_bgr
-
-    # CARREGA A IMAGEM
-    img = cv2.imread("/mnt/data/45c92eeb-79d9-4194-90d0-83d1a410258b.png")
-    imagem_realcada = vibrance_contraste_suave(roi_ampliada)
-
-    # APLICA FACE MESH A NA IMAGEM REALÇADA
-    coordenadas_roi = (x1, y1, x2, y2)
-    regiao_pele = imagem_realcada[y1:y2, x1:x2]
+def media_pele(regiao_pele):
+    # MÉDIA BGR DOS PIXELS COM COR DE PELE (FILTRO HSV); None SE A REGIÃO ESTIVER VAZIA
+    if regiao_pele.size == 0:
+        return None
 
-    if regiao_pele.size > 0:
-        # APLICA FILTRO HSV
-        regiao_hsv = cv2.cvtColor(regiao_pele, cv2.COLOR_BGR2HSV)
-        mask_pele = cv2.inRange(regiao_hsv, (0, 30, 60), (25, 150, 255))
-        regiao_filtrada = cv2.bitwise_and(regiao_pele, regiao_pele, mask=mask_pele)
+    regiao_hsv = cv2.cvtColor(regiao_pele, cv2.COLOR_BGR2HSV)
+    mask_pele = cv2.inRange(regiao_hsv, (0, 30, 60), (25, 150, 255))
 
-        # CALCULA MÉDIA DO TOM DA PELE
-        tom_pele = cv2.mean(regiao_filtrada, mask=mask_pele)[:3]
-        medidas['cor_saturada'] = np.array(tom_pele).astype(int)
+    tom_pele = cv2.mean(regiao_pele, mask=mask_pele)[:3]
+    return tuple(int(c) for c in tom_pele)
 
-        # MOSTRA A IMAGEM REALÇADA
-        debug_img = imagem_realcada.copy()
-        cv2.rectangle(debug_img, (x1, y1), (x2, y2), (0, 255, 0), 2)
-        cv2.imshow("Rosto novo", debug_img)
 
-    # ================================= COMPARANDO RESULTADOS =================================
-    # SUBTONS DE REFERÊNCIA
-    subtons_bgr = {
-        "baixo contraste escuro": {
-            "Frio": [81, 113, 219],
-            "Neutro": [80, 117, 214],
-            "Quente": [66, 112, 207],
-            "Oliva": [66, 113, 185]
-        },
-        "baixo contraste claro": {
-            "Frio": [175, 188, 233],
-            "Neutro": [180, 196, 231],
-            "Quente": [170, 198, 230],
-            "Oliva": [180, 205, 235]
-        },
-        "medio contraste": {
-            "Frio": [138, 169, 255],
-            "Neutro": [135, 169, 254],
-            "Quente": [114, 158, 246],
-            "Oliva": [120, 169, 240]
-        }
-    }
+def vibrance_contraste_suave(roi_ampliada, rascunho=SEM_RASCUNHO):
+    # CLAHE NO L* E VIBRANCE NA SATURAÇÃO, TROCANDO SÓ UM CANAL POR VEZ (SEM split/merge NEM CÓPIAS float32)
+    forma, plano = roi_ampliada.shape, roi_ampliada.shape[:2]
+    lab = cv2.cvtColor(roi_ampliada, cv2.COLOR_BGR2LAB, dst=rascunho.obter('lab', forma))
+    l = cv2.extractChannel(lab, 0, dst=rascunho.obter('canal', plano))
+    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+    l_clahe = clahe.apply(l, dst=rascunho.obter('canal_realcado', plano))
+    cv2.insertChannel(l_clahe, lab, 0)
+    img_bgr_clahe = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR, dst=rascunho.obter('bgr_clahe', forma))
 
-    # CONVERTE BGR PARA LAB (luminosidade e componente de cores)
-    def bgr_para_lab(bgr):
-        pix = np.uint8([[bgr]])
-        lab = cv2.cvtColor(pix, cv2.COLOR_BGR2LAB)
-        return lab[0, 0]
-
-    # DISTÂNCIA EUCLIDIANA ENTRE 2 TONS LAB
-    def distancia_lab(lab1, lab2):
-        return np.linalg.norm(np.array(lab1, float) - np.array(lab2, float))
-
-    # CLASSIFICAÇÃO DO SUBTOM BASEADO NO BGR DE ENTRADA
-    def classificar_subtom(bgr_input):
-        if medidas["Classificação"] == "Baixo contraste escuro":
-            subtons_select = subtons_bgr["baixo contraste escuro"]
-        if medidas["Classificação"] == "Baixo contraste claro":
-            subtons_select = subtons_bgr["baixo contraste claro"]
-        else:
-            subtons_select = subtons_bgr["medio contraste"]
+    # conversão para HSV
+    hsv = cv2.cvtColor(img_bgr_clahe, cv2.COLOR_BGR2HSV, dst=rascunho.obter('hsv', forma))
+    s = cv2.extractChannel(hsv, 1, dst=rascunho.obter('canal', plano))
 
-        # CONVERTE OS SUBTONS PARA LAB
-        subtons_lab = {nome: bgr_para_lab(bgr) for nome, bgr in subtons_select.items()}
+    # vibrance: aumenta onde a saturação é baixa (< 150), pela tabela
+    s_vibrante = cv2.LUT(s, LUT_VIBRANCE, dst=rascunho.obter('canal_realcado', plano))
+    cv2.insertChannel(s_vibrante, hsv, 1)
 
-        # CONVERTE O TOM DE ENTRADA PARA LAB
-        lab_input = bgr_para_lab(bgr_input)
+    result_bgr = cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR, dst=rascunho.obter('vibrance', forma))
 
-        # CALCULA AS DISTÂNCIAS E ENCONTRA O SUBTOM MAIS PRÓXIMO
-        distancias = {
-            nome: distancia_lab(lab_input, lab_base)
-            for nome, lab_base in subtons_lab.items()
-        }
-        subtom_proximo = min(distancias, key=distancias.get)
+    return result_bgr
 
-        return subtom_proximo, distancias
 
-    # APLICA NA COR SATURADA E ADICIONA NO DICIONÁRIO
-    subtom, dist = classificar_subtom(medidas['cor_saturada'])
-    medidas['Subtom'] = subtom
-    for k, v in dist.items():
-        v = int(v)
-        dist[k] = v
-    medidas['Distâncias'] = dist
+def classificar_formato_rosto(pontos):
+    # pontos: N×2 EM PIXELS; AS TRÊS MEDIDAS PRINCIPAIS (altura, mandíbula, testa) SAEM DE UMA SÓ OPERAÇÃO
+    pontos = np.asarray(pontos, dtype=np.float64)
+    inicio = pontos[[ROSTO_TOPO_TESTA, MANDIBULA[0], LATERAL_TESTA[0]]]
+    fim = pontos[[ROSTO_QUEIXO, MANDIBULA[1], LATERAL_TESTA[1]]]
+    altura_rosto, largura_mandibula, largura_testa = np.linalg.norm(inicio - fim, axis=1).tolist()
+    # classificar
+    prop = altura_rosto / largura_mandibula
 
-    # =========== FORMATO DO ROSTO ===========
-    def calcular_distancia(p1, p2):
-        return np.linalg.norm(np.array(p1) - np.array(p2))
+    if largura_testa > largura_mandibula and prop > 1.3:
+        return 'Coração'
+    elif abs(largura_testa - largura_mandibula) < 15 and prop > 1.3:
+        return 'Oval'
+    elif abs(largura_testa - largura_mandibula) < 15 and prop < 1.2:
+        return 'Redondo'
+    else:
+        return 'Quadrado'
+
+
+def bgr_to_gray_scale_0_10(bgr):
+    # UMA COR OU N×3 -> ESCALA DE CINZA DE 0 A 10
+    gray = np.floor(bgr_para_cinza(bgr))
+    escala = np.clip(np.round(gray / 255 * 10), 0, 10)
+    return escala.astype(int) if np.ndim(escala) else int(escala)
 
-    if resultado_face.multi_face_landmarks:
-        for rosto in resultado_face.multi_face_landmarks:
-            h, w, _ = imagem.shape
-            pontos = [(int(p.x * w), int(p.y * h)) for p in rosto.landmark]
-            # pontos principais
-            topo_testa = pontos[10]
-            queixo = pontos[152]
-            mandibula_esq = pontos[234]
-            mandibula_dir = pontos[454]
-            lateral_testa_esq = pontos[127]
-            lateral_testa_dir = pontos[356]
-            # medidas principais
-            altura_rosto = calcular_distancia(topo_testa, queixo)
-            largura_mandibula = calcular_distancia(mandibula_esq, mandibula_dir)
-            largura_testa = calcular_distancia(lateral_testa_esq, lateral_testa_dir)
-            # classificar
-            prop = altura_rosto / largura_mandibula
-
-            if largura_testa > largura_mandibula and prop > 1.3:
-                formato = 'Coração'
-            elif abs(largura_testa - largura_mandibula) < 15 and prop > 1.3:
-                formato = 'Oval'
-            elif abs(largura_testa - largura_mandibula) < 15 and prop < 1.2:
-                formato = 'Redondo'
-            else:
-                formato = 'Quadrado'
-            medidas['Formato do rosto'] = formato
 
+# CLASSIFICAÇÃO DO SUBTOM BASEADO NO BGR DE ENTRADA
+def classificar_subtom(bgr_input, classificacao):
+    if classificacao == "Baixo contraste escuro":
+        grupo = "baixo contraste escuro"
+    if classificacao == "Baixo contraste claro":
+        grupo = "baixo contraste claro"
     else:
-        print('Nenhum rosto detectado')
+        grupo = "medio contraste"
+    nomes, referencias = subtons_lab[grupo]
 
-    # ============ INTENSIDADE ==============
-    def intensidade_saturacao(bgr):
-        hsv = cv2.cvtColor(np.uint8([[bgr]]), cv2.COLOR_BGR2HSV)
-        return hsv[0, 0, 1]  # Saturação varia de 0 a 255
+    # CONVERTE O TOM DE ENTRADA PARA LAB
+    lab_input = bgr_para_lab(bgr_input).astype(np.float32)
+
+    # DISTÂNCIA EUCLIDIANA PARA TODAS AS REFERÊNCIAS DE UMA VEZ E O SUBTOM MAIS PRÓXIMO
+    # (ESCOLHIDO PELAS DISTÂNCIAS REAIS; SÓ AS EXIBIDAS SÃO ARREDONDADAS PARA INTEIRO)
+    valores = np.linalg.norm(referencias - lab_input, axis=1)
+    subtom_proximo = nomes[int(np.argmin(valores))]
+    distancias = dict(zip(nomes, valores.astype(int).tolist()))
+
+    return subtom_proximo, distancias
+
+
+def classificar_tons(medidas):
+    # PREENCHE CONTRASTE, SUBTOM, INTENSIDADE E PROFUNDIDADE A PARTIR DOS TONS JÁ EXTRAÍDOS
+    tom_de_cabelo = medidas.tom_de_cabelo
+
+    # PELE, OLHOS E CABELO CONVERTIDOS JUNTOS
+    # (caso a pessoa não tenha cabelo ou tenha o cabelo com tom semelhante a pele, o cabelo usa o tom da pele)
+    tons = np.array([medidas.tom_de_pele, medidas.tom_de_olho,
+                     tom_de_cabelo if tom_de_cabelo is not None else medidas.tom_de_pele], dtype=np.uint8)
+    saturacoes = bgr_para_hsv(tons)[:, 1].astype(int)  # Saturação varia de 0 a 255
+    luminosidades = bgr_para_lab(tons)[:, 0].astype(int)  # Luminância (0 a 255)
+
+    # =================================CONTRASTE =================================
+    # OBTÉM ESCALA DE CINZA DOS TONS
+    escala_pele, escala_olhos, escala_cabelo = bgr_to_gray_scale_0_10(tons).tolist()
 
-    s_p = intensidade_saturacao(medidas['tom_de_pele'])
-    s_o = intensidade_saturacao(medidas['tom_de_olho'])
-    s_c = intensidade_saturacao(medidas['tom_de_cabelo']) if medidas['tom_de_cabelo'] is not None else s_p  # fallback
+    # ENCONTRA TONS EXTREMOS
+    tons = [escala_pele, escala_cabelo, escala_olhos]
+    intervalo = max(tons) - min(tons)
+
+    # CLASSIFICA O CONTRASTE
+    if intervalo <= 3:
+        if escala_pele <= 6:
+            contraste = "Baixo contraste escuro"
+        else:
+            contraste = "Baixo contraste claro"
+    elif intervalo <= 5:
+        contraste = "Contraste médio"
+    else:
+        contraste = "Alto contraste"
+
+    medidas.escala_pele = escala_pele
+    medidas.escala_cabelo = escala_cabelo
+    medidas.escala_olhos = escala_olhos
+    medidas.intervalo_contraste = intervalo
+    medidas.classificacao = contraste
+
+    # ================================= COMPARANDO RESULTADOS =================================
+    # APLICA NA COR SATURADA
+    cor_saturada = medidas.cor_saturada if medidas.cor_saturada is not None else medidas.tom_de_pele
+    medidas.subtom, medidas.distancias = classificar_subtom(cor_saturada, contraste)
+
+    # ============ INTENSIDADE ==============
+    s_p, s_o, s_c = saturacoes.tolist()
 
     # Peso maior na pele
     intensidade_media = (0.5 * s_p + 0.3 * s_o + 0.2 * s_c)
@@ -460,18 +660,11 @@ def extrair_dados_da_imagem(imagem):
     else:
         intensidade = "Baixa"
 
-    medidas['Intensidade'] = intensidade
-    medidas['Valor Saturação'] = int(intensidade_media)
+    medidas.intensidade = intensidade
+    medidas.valor_saturacao = int(intensidade_media)
 
     # =============== profundidade ==============
-
-    def obter_luminosidade(bgr):
-        lab = cv2.cvtColor(np.uint8([[bgr]]), cv2.COLOR_BGR2LAB)
-        return lab[0, 0, 0]  # Luminância (0 a 255)
-
-    l_p = obter_luminosidade(medidas['tom_de_pele'])
-    l_o = obter_luminosidade(medidas['tom_de_olho'])
-    l_c = obter_luminosidade(medidas['tom_de_cabelo']) if medidas['tom_de_cabelo'] is not None else l_p
+    l_p, l_o, l_c = luminosidades.tolist()
 
     # Peso maior na pele e cabelo
     luminosidade = (0.5 * l_p + 0.3 * l_c + 0.2 * l_o)
@@ -481,13 +674,15 @@ def extrair_dados_da_imagem(imagem):
     else:
         profundidade = "Escuro"
 
-    medidas["Profundidade"] = profundidade
-    medidas["Luminosidade Média"] = int(luminosidade)
+    medidas.profundidade = profundidade
+    medidas.luminosidade_media = int(luminosidade)
 
-    return medidas, resultado
+    return medidas
 
 
 def visualizar_resultados(imagem, resultado, tom_de_pele=None, pouco_cabelo=None, tom_de_cabelo=None, tom_de_olho=None):
+    import mediapipe as mp  # só aqui: importar processamento não carrega o MediaPipe
+
     mp_drawing = mp.solutions.drawing_utils
     mp_pose = mp.solutions.pose
 
@@ -1,143 +1,214 @@
-import os
-import pandas as pd
-import cv2
 import numpy as np
 
-
-def recomendar_roupas(dicionario):
-    base_dir = os.path.dirname(__file__)
-    caminho_csv = os.path.abspath(os.path.join(base_dir, '../../trabalho/data/catalogo_roupas.csv'))
-
-    print("\nLendo CSV em:", caminho_csv)
-    catalogo = pd.read_csv(caminho_csv)
-
-    # Mostra o conteúdo lido
-    catalogo.columns = catalogo.columns.str.strip().str.lower()
-    print(catalogo.head())
-
-    # Regras de recomendação
-    # print("📦 Dicionário recebido:", dicionario)
-
-    # Cria cópia do catálogo
-    roupas_filtradas = catalogo.copy()
-
-    # Regras de recomendação
-    classificacao = dicionario.get('Classificação', '').lower()
-    subtom = dicionario.get('Subtom', '').lower()
-
-    def classificar_paleta(medidas):
-        subtom = medidas["Subtom"]
-        contraste = medidas["Classificação"]
-        intensidade = medidas["Intensidade"]
-        profundidade = medidas["Profundidade"]
-
-        if subtom == "Quente":
-            if intensidade == "Alta":
-                if profundidade == "Claro":
-                    return "Primavera Brilhante", roupas_filtradas[
-                        roupas_filtradas['estação'].str.contains("primavera brilhante", case=False)]
-
-            elif intensidade == "Baixa":
-                if profundidade == "Escuro":
-                    return "Outono Suave", roupas_filtradas[
-                        roupas_filtradas['estação'].str.contains("outono suave", case=False)]
-                else:
-                    return "Primavera Suave", roupas_filtradas[
-                        roupas_filtradas['estação'].str.contains("primavera suave", case=False)]
-
-            elif intensidade == "Média":
-                if profundidade == "Claro":
-                    return "Primavera Clara", roupas_filtradas[
-                        roupas_filtradas['estação'].str.contains("primavera clara", case=False)]
-                else:
-                    return "Outono Puro", roupas_filtradas[
-                        roupas_filtradas['estação'].str.contains("outono puro", case=False)]
-
-        elif subtom == "Frio":
-            if intensidade == "Alta":
-                if contraste == "Médio contraste" or "Baixo contraste escuro":
-                    return "Inverno Brilhante", roupas_filtradas[
-                        roupas_filtradas['estação'].str.contains("inverno brilhante", case=False)]
-            elif intensidade == "Baixa":
-                if profundidade == "Claro":
-                    return "Verão Suave", roupas_filtradas[
-                        roupas_filtradas['estação'].str.contains("verão suave", case=False)]
-                else:
-                    return "Inverno Profundo", roupas_filtradas[
-                        roupas_filtradas['estação'].str.contains("inverno profundo", case=False)]
-            elif intensidade == 'Média':
-                if profundidade == "Claro":
-                    return "Verão Claro", roupas_filtradas[
-                        roupas_filtradas['estação'].str.contains("verão claro", case=False)]
-                else:
-                    return "Inverno Puro", roupas_filtradas[
-                        roupas_filtradas['estação'].str.contains("inverno puro", case=False)]
-
-        elif subtom == "Neutro":
-            if profundidade == "Claro":
-                return "Verão Suave", roupas_filtradas[
-                    roupas_filtradas['estação'].str.contains("verão suave", case=False)]
+from catalogo import CAMINHO_CSV, carregar_catalogo
+from cores import bgr_para_lab_cie, delta_e_2000_colunas
+
+# PESOS DA NOTA DE HARMONIA (somam 1)
+PESO_PELE = 0.4       # roupa bem distinta da pele (não "apaga" o rosto)
+PESO_CONTRASTE = 0.4  # diferença de luminosidade roupa x cabelo parecida com o contraste pessoal
+PESO_OLHOS = 0.2      # cores que ecoam a cor dos olhos
+
+# ATÉ ESSE NÚMERO DE LINHAS TODAS RECEBEM A NOTA EXATA; ACIMA, O TOP-K É ESCOLHIDO PELAS CORES QUANTIZADAS
+LINHAS_RANKING_EXATO = 2048
+CANDIDATOS_POR_VAGA = 8  # linhas escolhidas pela nota quantizada para cada uma das k vagas
+LIMITE_RECOMENDACOES = 60  # cores devolvidas por recomendar_cores (None = a estação inteira)
+
+
+def classificar_estacao(medidas):
+    # REGRAS DA PALETA SAZONAL: RETORNA A ESTAÇÃO EM MINÚSCULAS (como na coluna 'estação') OU None
+    subtom = medidas.get("Subtom", "").lower()
+    intensidade = medidas.get("Intensidade", "").lower()
+    profundidade = medidas.get("Profundidade", "").lower()
+
+    if subtom == "quente":
+        if intensidade == "alta":
+            if profundidade == "claro":
+                return "primavera brilhante"
+        elif intensidade == "baixa":
+            if profundidade == "escuro":
+                return "outono suave"
             else:
-                return "Outono Suave", roupas_filtradas[
-                    roupas_filtradas['estação'].str.contains("outono suave", case=False)]
-
-        elif subtom == "Oliva":
-            if profundidade == "Claro":
-                return "Primavera Suave", roupas_filtradas[
-                    roupas_filtradas['estação'].str.contains("primavera suave", case=False)]
+                return "primavera suave"
+        elif intensidade == "média":
+            if profundidade == "claro":
+                return "primavera clara"
             else:
-                return "Outono Profundo", roupas_filtradas[
-                    roupas_filtradas['estação'].str.contains("outono profundo", case=False)]
-        else:
-            return "Paleta não identificada"
-
-
-    print(f"Paleta Sazonal = {classificar_paleta(dicionario)}\n")
-
-    # DEBUG: Mostra valores únicos das colunas de filtragem
-    print("\n🧪 Valores únicos de 'contraste':", catalogo['contraste'].unique())
-    print("🧪 Valores únicos de 'estação':", catalogo['estação'].unique())
-
-    # Converte string "[146 28 63]" para lista [146, 28, 63]
-    roupas_filtradas["cor bgr"] = roupas_filtradas["cor bgr"].apply(lambda x: list(map(int, x.strip("[]").split())))
-
-    # Filtra por tipo, se necessário
-    roupas_filtradas = roupas_filtradas[roupas_filtradas["tipo"] == "camisa"]
+                return "outono puro"
+
+    elif subtom == "frio":
+        if intensidade == "alta":
+            return "inverno brilhante"
+        elif intensidade == "baixa":
+            if profundidade == "claro":
+                return "verão suave"
+            else:
+                return "inverno profundo"
+        elif intensidade == "média":
+            if profundidade == "claro":
+                return "verão claro"
+            else:
+                return "inverno puro"
 
-    # Resultado final
-    if not roupas_filtradas.empty:
-        print("\n👕 ROUPAS FILTRADAS:")
-        print(roupas_filtradas)
+    elif subtom == "neutro":
+        if profundidade == "claro":
+            return "verão suave"
+        else:
+            return "outono suave"
 
-        cores_bgr = []
+    elif subtom == "oliva":
+        if profundidade == "claro":
+            return "primavera suave"
+        else:
+            return "outono profundo"
+
+    return None
+
+
+def filtrar_catalogo(catalogo, estacao, tipo=None, contraste=None):
+    # ÍNDICES DAS LINHAS DO CATÁLOGO DA ESTAÇÃO (E DO TIPO/CONTRASTE, SE PEDIDOS), NA ORDEM DO CSV
+    # contraste: um termo da coluna, ex. "contraste médio" (também casa "contraste baixo/contraste médio")
+    filtros = {'estação': estacao}
+    if tipo is not None:
+        filtros['tipo'] = tipo
+    if contraste is not None:
+        filtros['contraste'] = contraste
+    return catalogo.filtrar(filtros)
+
+
+def ranquear_cores(catalogo, medidas, indices, k=None, cores_presentes=None):
+    """Ordena as linhas `indices` do catálogo pela harmonia com os tons da pessoa.
+
+    Usa os termos do ΔE2000 de cada linha, calculados uma vez por versão do
+    catálogo (Catalogo.colunas_delta_e). Retorna (indices, notas) do melhor
+    para o pior, limitados aos `k` melhores quando `k` é informado.
+
+    Com `k` e mais de LINHAS_RANKING_EXATO linhas, os candidatos são
+    escolhidos pela nota das cores quantizadas (5 bits por canal): ela é
+    calculada uma vez por cor presente (poucas centenas por estação), e as
+    melhores cores entram inteiras até somarem k × CANDIDATOS_POR_VAGA linhas.
+    Só esses candidatos recebem a nota exata, que escolhe os `k`, dá a ordem e
+    as notas retornadas; um candidato perdido na quantização custa no máximo
+    alguns milésimos na nota do k-ésimo lugar.
+    cores_presentes: superconjunto das cores quantizadas de `indices`
+                     (ex.: Catalogo.cores_do_termo da estação); se omitido, é calculado
+    """
+    indices = np.asarray(indices)
+    if 'tom_de_pele' not in medidas or len(indices) == 0:
+        return indices[:k], np.zeros(len(indices[:k]), dtype=np.float32)
+
+    cabelo = medidas.get('tom_de_cabelo')
+    # PELE, OLHOS E CABELO CONVERTIDOS NUMA SÓ CHAMADA (SEM CABELO, VALE O L* DA PELE)
+    pele, olho, cabelo = bgr_para_lab_cie([
+        medidas['tom_de_pele'],
+        medidas.get('tom_de_olho', medidas['tom_de_pele']),
+        cabelo if cabelo is not None else medidas['tom_de_pele'],
+    ])
+    # CONTRASTE PESSOAL (escala 0-10) -> DIFERENÇA DE L* DESEJADA (0-100)
+    tons = (pele, olho, cabelo[0], 10.0 * medidas.get('Intervalo de contraste', 0))
+
+    if k is not None and k < len(indices) and len(indices) > LINHAS_RANKING_EXATO:
+        # NOTA UMA VEZ POR COR QUANTIZADA PRESENTE; AS CORES DA MELHOR PARA A PIOR ATÉ JUNTAR
+        # k × CANDIDATOS_POR_VAGA LINHAS (SEM argpartition SOBRE AS LINHAS, E JÁ NA ORDEM DO CSV)
+        colunas_quantizadas = catalogo.colunas_quantizadas
+        quantizadas = np.take(catalogo.cores_quantizadas, indices)
+        linhas_por_cor = np.bincount(quantizadas, minlength=colunas_quantizadas.shape[1])
+        if cores_presentes is None:
+            cores_presentes = np.flatnonzero(linhas_por_cor)
+        notas_por_cor = _notas_harmonia(np.take(colunas_quantizadas, cores_presentes, axis=1), *tons)
+        melhores_cores = cores_presentes[np.argsort(-notas_por_cor, kind='stable')]
+        acumuladas = np.cumsum(np.take(linhas_por_cor, melhores_cores))
+        ultima = np.searchsorted(acumuladas, k * CANDIDATOS_POR_VAGA)
+        escolhidas = np.zeros(colunas_quantizadas.shape[1], dtype=bool)
+        escolhidas[melhores_cores[:ultima + 1]] = True
+        indices = indices[np.take(escolhidas, quantizadas)]
+
+    notas = _notas_harmonia(np.take(catalogo.colunas_delta_e, indices, axis=1), *tons)
+
+    # TOP-K SEM ORDENAR O CONJUNTO INTEIRO
+    if k is not None and k < len(notas):
+        melhores = np.argpartition(-notas, k - 1)[:k]
+        ordem = melhores[np.argsort(-notas[melhores], kind='stable')]
+    else:
+        ordem = np.argsort(-notas, kind='stable')
+    return indices[ordem], notas[ordem]
+
+
+def _notas_harmonia(colunas, pele, olho, l_cabelo, alvo_contraste):
+    # NOTA (0-1) DE CADA COR DE `colunas` (cores.colunas_delta_e); PELE E OLHOS COMPARADOS NA MESMA PASSADA
+    distancia_pele, distancia_olhos = delta_e_2000_colunas(colunas, [pele, olho])
+    nota_pele = np.minimum(distancia_pele / 40, 1)
+    nota_contraste = 1 - np.minimum(np.abs(np.abs(colunas[0] - l_cabelo) - alvo_contraste) / 50, 1)
+    nota_olhos = 1 - np.minimum(distancia_olhos / 60, 1)
+    return PESO_PELE * nota_pele + PESO_CONTRASTE * nota_contraste + PESO_OLHOS * nota_olhos
+
+
+def recomendar_cores(medidas, caminho_csv=CAMINHO_CSV, tipo=None, limite=LIMITE_RECOMENDACOES, cronometro=None,
+                     contraste=None):
+    # RETORNA (cores_bgr uint8 N×3, notas, estacao) DO MELHOR PARA O PIOR; estacao None SE NÃO HOUVER REGRA
+    # limite: quantas cores no máximo (None = todas as da estação, com nota exata para cada linha)
+    # cronometro: Cronometro opcional que recebe os tempos de cada etapa
+    if cronometro is not None:
+        cronometro.reiniciar()
+    catalogo = carregar_catalogo(caminho_csv)
+    if cronometro is not None:
+        cronometro.marcar('carregar_catalogo', linhas=len(catalogo))
+    estacao = classificar_estacao(medidas)
+    if estacao is None:
+        return np.empty((0, 3), dtype=np.uint8), np.empty(0, dtype=np.float32), None
+
+    indices = filtrar_catalogo(catalogo, estacao, tipo, contraste)
+    if cronometro is not None:
+        cronometro.marcar('filtrar_catalogo', linhas=len(indices))
+    indices, notas = ranquear_cores(catalogo, medidas, indices, limite, catalogo.cores_do_termo('estação', estacao))
+    cores = catalogo.cores[indices]
+    if cronometro is not None:
+        cronometro.marcar('ranquear_cores', linhas=len(indices))
+    return cores, notas, estacao
+
+
+def recomendar_roupas(dicionario, depuracao=None, caminho_csv=CAMINHO_CSV):
+    # RETORNA (cores_bgr, estacao): ATÉ 20 CORES DE CAMISAS DA ESTAÇÃO DA PESSOA
+    # depuracao: SaidaDepuracao opcional que recebe o resumo do catálogo e o painel "20 Cores"
+    cores, notas, estacao = recomendar_cores(dicionario, caminho_csv, tipo="camisa", limite=20)
+    cores_bgr = [tuple(cor) for cor in cores.tolist()]
+
+    if depuracao is not None:
+        catalogo = carregar_catalogo(caminho_csv)
+        depuracao.log(f"\nCatálogo: {caminho_csv} ({len(catalogo)} linhas)")
+        depuracao.log(f"Paleta Sazonal = {estacao}\n")
+
+        # DEBUG: Mostra valores únicos das colunas de filtragem
+        depuracao.log(f"\n🧪 Termos de 'contraste': {catalogo.termos['contraste']}")
+        depuracao.log(f"🧪 Termos de 'estação': {catalogo.termos['estação']}")
+
+        # Resultado final
+        if cores_bgr:
+            depuracao.log("\n👕 CORES FILTRADAS:")
+            for cor, nota in zip(cores_bgr, notas):
+                depuracao.log(f"{cor}: {nota:.3f}")
+            depuracao.imagem("20 Cores", desenhar_painel_cores(cores))
+        else:
+            depuracao.log("⚠️ Nenhuma roupa recomendada.")
 
-        for _, row in roupas_filtradas.iterrows():
-            if isinstance(row['cor bgr'], list) and len(row['cor bgr']) == 3:
-                cor = tuple(row['cor bgr'])
-                cores_bgr.append(cor)
-            if len(cores_bgr) == 20:
-                break
+    return cores_bgr, estacao
 
-        # === Exibir em grid ===
-        quadrado = 100
-        espaco = 20
-        colunas = 5
-        linhas = 4
 
-        largura_total = colunas * (quadrado + espaco) + espaco
-        altura_total = linhas * (quadrado + espaco) + espaco
+def desenhar_painel_cores(cores_bgr, colunas=5, linhas=4, quadrado=100, espaco=20):
+    # === Exibir em grid === (TODOS OS QUADRADOS DE UMA VEZ, SEM UM cv2.rectangle POR COR)
+    passo = quadrado + espaco
+    largura_total = colunas * passo + espaco
+    altura_total = linhas * passo + espaco
 
-        painel = np.full((altura_total, largura_total, 3), 255, dtype=np.uint8)
+    # GRADE linhas×colunas COM AS CORES (POSIÇÕES SOBRANDO FICAM BRANCAS)
+    cores = np.asarray(cores_bgr, dtype=np.uint8).reshape(-1, 3)[:colunas * linhas]
+    grade = np.full((colunas * linhas, 3), 255, dtype=np.uint8)
+    grade[:len(cores)] = cores
+    grade = grade.reshape(linhas, colunas, 3)
 
-        for i, cor in enumerate(cores_bgr):
-            linha = i // colunas
-            coluna = i % colunas
-            x = espaco + coluna * (quadrado + espaco)
-            y = espaco + linha * (quadrado + espaco)
-            cv2.rectangle(painel, (x, y), (x + quadrado, y + quadrado), color=cor, thickness=-1)
+    # CADA CÉLULA (passo×passo) = QUADRADO DE (quadrado+1)² (O cv2.rectangle INCLUI A BORDA) + ESPAÇO BRANCO
+    blocos = np.full((linhas, passo, colunas, passo, 3), 255, dtype=np.uint8)
+    blocos[:, :quadrado + 1, :, :quadrado + 1] = grade[:, None, :, None, :]
 
-        cv2.imshow("20 Cores", painel)
-        cv2.waitKey(0)
-        cv2.destroyAllWindows()
-    else:
-        print("⚠️ Nenhuma roupa recomendada.")
+    painel = np.full((altura_total, largura_total, 3), 255, dtype=np.uint8)
+    painel[espaco:, espaco:] = blocos.reshape(linhas * passo, colunas * passo, 3)
+    return painel
@@ -0,0 +1,101 @@
+import json
+from dataclasses import dataclass
+from typing import Optional
+
+# NOME DE CADA CAMPO NO DICIONÁRIO "medidas" USADO PELA INTERFACE E PELA RECOMENDAÇÃO
+CHAVES = {
+    'altura_total': 'altura_total',
+    'largura_ombros': 'largura_ombros',
+    'proporcao': 'proporção',
+    'largura_quadril': 'largura_quadril',
+    'tipo_corpo': 'tipo_corpo',
+    'tom_de_pele': 'tom_de_pele',
+    'pouco_cabelo': 'pouco_cabelo',
+    'tom_de_cabelo': 'tom_de_cabelo',
+    'tom_de_olho': 'tom_de_olho',
+    'escala_pele': 'Tom de pele (escala 0-10)',
+    'escala_cabelo': 'Tom de cabelo (escala 0-10)',
+    'escala_olhos': 'Tom dos olhos (escala 0-10)',
+    'intervalo_contraste': 'Intervalo de contraste',
+    'classificacao': 'Classificação',
+    'cor_saturada': 'cor_saturada',
+    'subtom': 'Subtom',
+    'distancias': 'Distâncias',
+    'formato_rosto': 'Formato do rosto',
+    'intensidade': 'Intensidade',
+    'valor_saturacao': 'Valor Saturação',
+    'profundidade': 'Profundidade',
+    'luminosidade_media': 'Luminosidade Média',
+}
+
+# CAMPOS QUE GUARDAM UM TOM BGR (TUPLA DE 3 INTEIROS)
+TONS = ('tom_de_pele', 'tom_de_cabelo', 'tom_de_olho', 'cor_saturada')
+
+
+@dataclass(slots=True)
+class ResultadoAnalise:
+    """Medidas extraídas de UMA imagem.
+
+    Cada chamada de extrair_dados_da_imagem cria o seu próprio objeto, então
+    análises simultâneas não compartilham estado. Só guarda tipos nativos do
+    Python (tons BGR como tuplas de int).
+    """
+
+    # CORPO
+    altura_total: Optional[float] = None
+    largura_ombros: Optional[float] = None
+    proporcao: Optional[float] = None
+    largura_quadril: Optional[float] = None
+    tipo_corpo: Optional[str] = None
+
+    # TONS (BGR)
+    tom_de_pele: Optional[tuple] = None
+    pouco_cabelo: Optional[bool] = None
+    tom_de_cabelo: Optional[tuple] = None
+    tom_de_olho: Optional[tuple] = None
+
+    # CONTRASTE
+    escala_pele: Optional[int] = None
+    escala_cabelo: Optional[int] = None
+    escala_olhos: Optional[int] = None
+    intervalo_contraste: Optional[int] = None
+    classificacao: Optional[str] = None
+
+    # SUBTOM
+    cor_saturada: Optional[tuple] = None
+    subtom: Optional[str] = None
+    distancias: Optional[dict] = None
+
+    formato_rosto: Optional[str] = None
+
+    # INTENSIDADE E PROFUNDIDADE
+    intensidade: Optional[str] = None
+    valor_saturacao: Optional[int] = None
+    profundidade: Optional[str] = None
+    luminosidade_media: Optional[int] = None
+
+    # TEMPOS POR ETAPA (Cronometro.etapas); NÃO FAZ PARTE DO DICIONÁRIO "medidas"
+    tempos: Optional[list] = None
+
+    def como_dict(self):
+        # VISÃO NO FORMATO DO ANTIGO DICIONÁRIO "medidas"; CAMPOS NÃO CALCULADOS FICAM DE FORA
+        medidas = {}
+        for atributo, chave in CHAVES.items():
+            valor = getattr(self, atributo)
+            if valor is not None:
+                medidas[chave] = valor
+        return medidas
+
+    def como_json(self):
+        return json.dumps(self.como_dict(), ensure_ascii=False)
+
+    @classmethod
+    def de_dict(cls, medidas):
+        # INVERSO DE como_dict (ex.: RESPOSTA JSON DO SERVIÇO); CHAVES DESCONHECIDAS SÃO IGNORADAS
+        resultado = cls()
+        for atributo, chave in CHAVES.items():
+            valor = medidas.get(chave)
+            if atributo in TONS and valor is not None:
+                valor = tuple(int(c) for c in valor)  # o JSON devolve listas
+            setattr(resultado, atributo, valor)
+        return resultado
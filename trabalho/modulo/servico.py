@@ -0,0 +1,252 @@
+"""Serviço local de análise: modelos carregados uma vez por máquina.
+
+Um servidor HTTP em localhost mantém processos worker com o MediaPipe já
+aquecido (os mesmos do lote.py). As imagens recebidas entram numa fila e são
+despachadas em pequenos lotes: o despachante espera até `espera_ms` para
+juntar até `tamanho_lote` imagens e manda o lote inteiro para um worker, o que
+reduz a ida e volta entre processos quando chegam várias imagens juntas.
+
+Rotas:
+    GET  /saude                  estado do serviço (workers, fila, contadores)
+    POST /analisar[?recomendar=1] corpo = bytes da imagem (jpg/png/webp)
+         -> {"medidas": {...}, "estação": ..., "tempos": [...], "cores": [[b, g, r], ...]}
+         (504 se a análise não terminar em --tempo-maximo segundos; 503 se os workers caíram)
+
+Uso:
+    python servico.py --porta 8765 -j 2
+    ANALISE_SERVICO=http://127.0.0.1:8765 streamlit run app.py   # o app passa a usar o serviço
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as TempoEsgotado
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from lote import analisar_lote, inicializar_worker
+from resultado import ResultadoAnalise
+
+PORTA_PADRAO = 8765
+TAMANHO_MAXIMO = 32 * 1024 ** 2  # bytes aceitos por imagem
+TEMPO_MAXIMO = 30  # segundos que uma requisição espera pela análise (abaixo do timeout do ClienteAnalise)
+
+
+class ErroServico(RuntimeError):
+    pass
+
+
+class DespachanteLotes:
+    """Fila de imagens -> lotes de até `tamanho_lote` -> ProcessPoolExecutor."""
+
+    def __init__(self, workers=None, tamanho_lote=4, espera_ms=10):
+        self.workers = workers or os.cpu_count() or 1
+        self.tamanho_lote = tamanho_lote
+        self.espera = espera_ms / 1000
+        self.processadas = 0
+        self.lotes = 0
+        self._fila = queue.Queue()
+        self._em_voo = threading.BoundedSemaphore(self.workers)  # um lote por worker de cada vez
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=inicializar_worker)
+        self._thread = threading.Thread(target=self._despachar, name="despachante", daemon=True)
+        self._thread.start()
+
+    def pendentes(self):
+        return self._fila.qsize()
+
+    def aquecer(self):
+        # GARANTE QUE TODOS OS WORKERS JÁ CARREGARAM OS MODELOS ANTES DA PRIMEIRA REQUISIÇÃO
+        list(self._executor.map(analisar_lote, [[]] * self.workers))
+
+    def enviar(self, nome, dados):
+        # RETORNA UM Future COM (registro, etapas, pid)
+        futuro = Future()
+        self._fila.put((nome, dados, futuro))
+        return futuro
+
+    def _despachar(self):
+        while True:
+            item = self._fila.get()
+            if item is None:
+                return
+            lote = [item]
+            limite = time.monotonic() + self.espera
+            while len(lote) < self.tamanho_lote:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    item = self._fila.get(timeout=restante)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._fila.put(None)  # encerra depois deste lote
+                    break
+                lote.append(item)
+
+            self._em_voo.acquire()
+            try:
+                futuro_lote = self._executor.submit(analisar_lote, [(nome, dados) for nome, dados, _ in lote])
+            except Exception as e:  # POOL QUEBRADO (UM WORKER MORREU): FALHA O LOTE E SEGUE ATENDENDO A FILA
+                self._em_voo.release()
+                for _, _, futuro in lote:
+                    futuro.set_exception(e)
+                continue
+            futuro_lote.add_done_callback(lambda f, lote=lote: self._entregar(f, lote))
+
+    def _entregar(self, futuro_lote, lote):
+        self._em_voo.release()
+        self.lotes += 1
+        self.processadas += len(lote)
+        try:
+            resultados = futuro_lote.result()
+        except Exception as e:  # worker morreu, etc.
+            for _, _, futuro in lote:
+                futuro.set_exception(e)
+            return
+        for (_, _, futuro), resultado in zip(lote, resultados):
+            futuro.set_result(resultado)
+
+    def fechar(self):
+        self._fila.put(None)
+        self._thread.join()
+        self._executor.shutdown()
+
+
+def _criar_manipulador(despachante, inicio, tempo_maximo=TEMPO_MAXIMO):
+
+    class Manipulador(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, formato, *args):
+            pass  # sem uma linha no stderr por requisição
+
+        def _responder(self, status, corpo):
+            dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def do_GET(self):
+            if urlparse(self.path).path != "/saude":
+                return self._responder(404, {"erro": "rota desconhecida"})
+            self._responder(200, {
+                "status": "ok",
+                "pid": os.getpid(),
+                "workers": despachante.workers,
+                "fila": despachante.pendentes(),
+                "processadas": despachante.processadas,
+                "lotes": despachante.lotes,
+                "segundos_ativo": round(time.monotonic() - inicio, 1),
+            })
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path != "/analisar":
+                return self._responder(404, {"erro": "rota desconhecida"})
+
+            tamanho = int(self.headers.get("Content-Length", 0))
+            if not 0 < tamanho <= TAMANHO_MAXIMO:
+                return self._responder(413 if tamanho else 400, {"erro": "tamanho de imagem inválido"})
+            dados = self.rfile.read(tamanho)
+
+            # 504 SE A FILA/ANÁLISE PASSAR DE tempo_maximo; 503 SE O WORKER MORREU (POOL QUEBRADO)
+            try:
+                registro, etapas, _ = despachante.enviar(self.headers.get("X-Nome", "upload"), dados).result(
+                    timeout=tempo_maximo)
+            except TempoEsgotado:
+                return self._responder(504, {"erro": f"análise não terminou em {tempo_maximo} s"})
+            except Exception as e:
+                return self._responder(503, {"erro": f"workers indisponíveis: {type(e).__name__}: {e}"})
+            if "erro" in registro:
+                return self._responder(422, {"erro": registro["erro"]})
+
+            registro.pop("arquivo", None)
+            estacao = registro.pop("estação", None)
+            resposta = {"medidas": registro, "estação": estacao, "tempos": etapas}
+
+            if parse_qs(url.query).get("recomendar", ["0"])[0] == "1":
+                from recomendacao import recomendar_cores
+                cores, _, _ = recomendar_cores(registro)
+                resposta["cores"] = cores.tolist()
+
+            self._responder(200, resposta)
+
+    return Manipulador
+
+
+def servir(porta=PORTA_PADRAO, workers=None, tamanho_lote=4, espera_ms=10, host="127.0.0.1",
+           tempo_maximo=TEMPO_MAXIMO):
+    despachante = DespachanteLotes(workers, tamanho_lote, espera_ms)
+    despachante.aquecer()
+    servidor = ThreadingHTTPServer((host, porta), _criar_manipulador(despachante, time.monotonic(), tempo_maximo))
+    print(f"Serviço de análise em http://{host}:{porta} ({despachante.workers} workers)", file=sys.stderr)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        despachante.fechar()
+
+
+class ClienteAnalise:
+    """Cliente do serviço; não importa o MediaPipe nem carrega modelos."""
+
+    def __init__(self, url=None, timeout=60):
+        self.url = (url or os.environ.get("ANALISE_SERVICO") or f"http://127.0.0.1:{PORTA_PADRAO}").rstrip("/")
+        self.timeout = timeout
+
+    def _pedir(self, requisicao):
+        try:
+            with urllib.request.urlopen(requisicao, timeout=self.timeout) as resposta:
+                return json.loads(resposta.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            try:
+                mensagem = json.loads(e.read().decode("utf-8")).get("erro", str(e))
+            except ValueError:
+                mensagem = str(e)
+            raise ErroServico(mensagem) from e
+        except OSError as e:
+            raise ErroServico(f"serviço indisponível em {self.url}: {e}") from e
+
+    def saude(self):
+        return self._pedir(self.url + "/saude")
+
+    def analisar(self, dados, nome="upload", recomendar=False):
+        """Envia os bytes de uma imagem. Retorna (ResultadoAnalise, resposta completa do serviço)."""
+        requisicao = urllib.request.Request(
+            self.url + "/analisar" + ("?recomendar=1" if recomendar else ""),
+            data=dados, method="POST",
+            headers={"Content-Type": "application/octet-stream", "X-Nome": nome})
+        resposta = self._pedir(requisicao)
+        analise = ResultadoAnalise.de_dict(resposta["medidas"])
+        analise.tempos = resposta.get("tempos")
+        return analise, resposta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço local de análise de coloração pessoal.")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="processos worker com modelos aquecidos (padrão: número de núcleos)")
+    parser.add_argument("--lote", type=int, default=4, help="máximo de imagens por lote")
+    parser.add_argument("--espera-ms", type=float, default=10,
+                        help="quanto esperar por mais imagens antes de despachar um lote")
+    parser.add_argument("--tempo-maximo", type=float, default=TEMPO_MAXIMO,
+                        help="segundos que uma requisição espera pela análise antes de responder 504")
+    args = parser.parse_args(argv)
+    servir(args.porta, args.workers, args.lote, args.espera_ms, tempo_maximo=args.tempo_maximo)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
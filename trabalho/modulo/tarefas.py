@@ -0,0 +1,66 @@
+"""Análises em segundo plano, acompanhadas pela interface.
+
+A função submetida recebe um Cronometro como último argumento: cada etapa
+marcada nele serve de progresso para a interface e de ponto de cancelamento
+(a próxima marcação depois de cancelar() interrompe a análise com
+AnaliseCancelada).
+"""
+import threading
+
+from tempos import Cronometro
+
+
+class AnaliseCancelada(Exception):
+    pass
+
+
+class CronometroCancelavel(Cronometro):
+
+    def __init__(self, cancelado):
+        super().__init__()
+        self.cancelado = cancelado
+
+    def _anotar(self, nome, inicio, fim, contagens):
+        super()._anotar(nome, inicio, fim, contagens)
+        if self.cancelado.is_set():
+            raise AnaliseCancelada(nome)
+
+
+class TrabalhoAnalise:
+    """Uma análise enviada a um executor, identificada pela `chave` do upload."""
+
+    def __init__(self, chave, etapas_previstas=()):
+        self.chave = chave
+        self.etapas_previstas = tuple(etapas_previstas)
+        self._cancelado = threading.Event()
+        self.cronometro = CronometroCancelavel(self._cancelado)
+        self.futuro = None
+
+    @classmethod
+    def submeter(cls, executor, chave, funcao, *args, etapas_previstas=()):
+        trabalho = cls(chave, etapas_previstas)
+        trabalho.futuro = executor.submit(funcao, *args, trabalho.cronometro)
+        return trabalho
+
+    @property
+    def cancelado(self):
+        return self._cancelado.is_set()
+
+    def cancelar(self):
+        # SE AINDA NÃO COMEÇOU, SAI DA FILA; SE JÁ COMEÇOU, PARA NA PRÓXIMA ETAPA
+        self._cancelado.set()
+        self.futuro.cancel()
+
+    def terminado(self):
+        return self.futuro.done()
+
+    def progresso(self):
+        # (FRAÇÃO DE 0 A 1, NOME DA ÚLTIMA ETAPA CONCLUÍDA OU None)
+        feitas = len(self.cronometro)
+        total = max(len(self.etapas_previstas), feitas, 1)
+        ultima = self.cronometro.etapas[-1]['nome'] if feitas else None
+        return feitas / total, ultima
+
+    def resultado(self):
+        # RETORNA O VALOR DA FUNÇÃO OU LEVANTA A EXCEÇÃO DELA (CancelledError SE SAIU DA FILA)
+        return self.futuro.result()
@@ -0,0 +1,135 @@
+"""Tempos por etapa do pipeline.
+
+Um Cronometro anota, para cada etapa com nome, o instante de início e a duração
+(time.perf_counter_ns) e, quando informado, quanto ela processou (pixels,
+linhas do catálogo...). As etapas podem ser exportadas no formato "trace
+event" do Chrome (chrome://tracing ou https://ui.perfetto.dev) para ver um
+lote inteiro numa linha do tempo.
+
+Com memoria=True (opcional: o tracemalloc deixa tudo mais lento) cada etapa
+também anota `pico_kb`, quanto o heap do Python/NumPy subiu no pico durante a
+etapa (os arrays do NumPy e do OpenCV são rastreados pelo tracemalloc), e
+`rss_kb`, a memória residente do processo ao fim dela, que inclui os buffers
+nativos do MediaPipe. As etapas da análise do rosto também anotam `bytes_rascunho`
+(arrays de trabalho guardados no BuffersRascunho), `bytes_roi` (a ROI
+ampliada) e `bytes_mascaras` (máscaras do cabelo).
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+def rss_kb():
+    # MEMÓRIA RESIDENTE ATUAL DO PROCESSO (LINUX); None ONDE /proc NÃO EXISTE
+    try:
+        with open('/proc/self/statm') as arquivo:
+            paginas = int(arquivo.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return paginas * os.sysconf('SC_PAGE_SIZE') // 1024
+
+
+CHAVES_MEMORIA = ('pico_kb', 'rss_kb')
+
+
+class Cronometro:
+
+    def __init__(self, memoria=False):
+        self.etapas = []  # [{'nome', 'inicio_ns', 'duracao_ns', <contagens>}]
+        self.memoria = memoria
+        if memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._memoria_inicio = 0
+        self._ultima_marca = time.perf_counter_ns()
+        self._zerar_pico()
+
+    def __len__(self):
+        return len(self.etapas)
+
+    def _anotar(self, nome, inicio, fim, contagens):
+        etapa = {'nome': nome, 'inicio_ns': inicio, 'duracao_ns': fim - inicio}
+        etapa.update((chave, int(valor)) for chave, valor in contagens.items() if valor is not None)
+        if self.memoria:
+            _, pico = tracemalloc.get_traced_memory()
+            etapa['pico_kb'] = max(pico - self._memoria_inicio, 0) // 1024
+            rss = rss_kb()
+            if rss is not None:
+                etapa['rss_kb'] = rss
+            self._zerar_pico()
+        self.etapas.append(etapa)
+        self._ultima_marca = fim
+
+    def _zerar_pico(self):
+        # O PICO DA PRÓXIMA ETAPA É MEDIDO A PARTIR DO QUE ESTÁ ALOCADO AGORA
+        if self.memoria:
+            tracemalloc.reset_peak()
+            self._memoria_inicio = tracemalloc.get_traced_memory()[0]
+
+    def reiniciar(self):
+        # A PRÓXIMA marcar() CONTA A PARTIR DE AGORA
+        self._ultima_marca = time.perf_counter_ns()
+        self._zerar_pico()
+
+    def marcar(self, nome, **contagens):
+        # FECHA A ETAPA `nome`: DA MARCA ANTERIOR ATÉ AGORA (ex.: marcar('pose', pixels=n))
+        self._anotar(nome, self._ultima_marca, time.perf_counter_ns(), contagens)
+
+    @contextmanager
+    def etapa(self, nome, **contagens):
+        inicio = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self._anotar(nome, inicio, time.perf_counter_ns(), contagens)
+
+    def total_ms(self):
+        return sum(e['duracao_ns'] for e in self.etapas) / 1e6
+
+    def resumo(self):
+        return resumo(self.etapas)
+
+    def eventos_chrome(self, pid=None, tid=None, args=None):
+        # EVENTOS COMPLETOS ("ph": "X") COM ts/dur EM MICROSSEGUNDOS
+        pid = os.getpid() if pid is None else pid
+        tid = threading.get_ident() if tid is None else tid
+        eventos = []
+        for e in self.etapas:
+            evento = {'name': e['nome'], 'cat': 'etapa', 'ph': 'X', 'pid': pid, 'tid': tid,
+                      'ts': e['inicio_ns'] / 1e3, 'dur': e['duracao_ns'] / 1e3}
+            extras = dict(args or {})
+            extras.update(_contagens(e))
+            if extras:
+                evento['args'] = extras
+            eventos.append(evento)
+        return eventos
+
+
+def _contagens(etapa):
+    return {chave: valor for chave, valor in etapa.items() if chave not in ('nome', 'inicio_ns', 'duracao_ns')}
+
+
+def resumo(etapas):
+    # [{'etapa', 'ms', <contagens>}] NA ORDEM EM QUE AS ETAPAS ACONTECERAM (PARA TABELAS)
+    return [{'etapa': e['nome'], 'ms': round(e['duracao_ns'] / 1e6, 3), **_contagens(e)} for e in etapas]
+
+
+def memoria(etapas):
+    # [{'etapa', pico_kb, rss_kb, bytes_*}] SÓ DAS ETAPAS QUE ANOTARAM MEMÓRIA (Cronometro(memoria=True))
+    return [{'etapa': e['nome'], **{chave: valor for chave, valor in e.items() if chave in CHAVES_MEMORIA
+                                    or chave.startswith('bytes_')}}
+            for e in etapas if 'pico_kb' in e]
+
+
+def eventos_chrome(etapas, pid=None, tid=None, args=None):
+    # MESMO QUE Cronometro.eventos_chrome, PARA ETAPAS JÁ SERIALIZADAS (ex.: VINDAS DE OUTRO PROCESSO)
+    cronometro = Cronometro()
+    cronometro.etapas = list(etapas)
+    return cronometro.eventos_chrome(pid, tid, args)
+
+
+def gravar_trace_chrome(eventos, caminho):
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump({'traceEvents': eventos, 'displayTimeUnit': 'ms'}, arquivo, ensure_ascii=False)
@@ -0,0 +1,148 @@
+"""Confere as duas implementações do ΔE2000 com os pares de teste publicados.
+
+Sharma, Wu e Dalal (2005), "The CIEDE2000 color-difference formula:
+implementation notes, supplementary test data, and mathematical observations",
+tabela 1: 34 pares L*a*b* com o ΔE2000 esperado (4 casas). Os pares 7 a 16
+cobrem as matizes opostas (|Δh| = 180°) e as cores sem croma, onde uma
+implementação descuidada erra.
+
+Uso:
+    python testeCores.py
+"""
+import numpy as np
+
+from cores import colunas_delta_e, delta_e_2000_colunas
+
+# (L1, a1, b1, L2, a2, b2, ΔE2000)
+PARES_SHARMA = np.array([
+    (50.0000, 2.6772, -79.7751, 50.0000, 0.0000, -82.7485, 2.0425),
+    (50.0000, 3.1571, -77.2803, 50.0000, 0.0000, -82.7485, 2.8615),
+    (50.0000, 2.8361, -74.0200, 50.0000, 0.0000, -82.7485, 3.4412),
+    (50.0000, -1.3802, -84.2814, 50.0000, 0.0000, -82.7485, 1.0000),
+    (50.0000, -1.1848, -84.8006, 50.0000, 0.0000, -82.7485, 1.0000),
+    (50.0000, -0.9009, -85.5211, 50.0000, 0.0000, -82.7485, 1.0000),
+    (50.0000, 0.0000, 0.0000, 50.0000, -1.0000, 2.0000, 2.3669),
+    (50.0000, -1.0000, 2.0000, 50.0000, 0.0000, 0.0000, 2.3669),
+    (50.0000, 2.4900, -0.0010, 50.0000, -2.4900, 0.0009, 7.1792),
+    (50.0000, 2.4900, -0.0010, 50.0000, -2.4900, 0.0010, 7.1792),
+    (50.0000, 2.4900, -0.0010, 50.0000, -2.4900, 0.0011, 7.2195),
+    (50.0000, 2.4900, -0.0010, 50.0000, -2.4900, 0.0012, 7.2195),
+    (50.0000, -0.0010, 2.4900, 50.0000, 0.0009, -2.4900, 4.8045),
+    (50.0000, -0.0010, 2.4900, 50.0000, 0.0010, -2.4900, 4.8045),
+    (50.0000, -0.0010, 2.4900, 50.0000, 0.0011, -2.4900, 4.7461),
+    (50.0000, 2.5000, 0.0000, 50.0000, 0.0000, -2.5000, 4.3065),
+    (50.0000, 2.5000, 0.0000, 73.0000, 25.0000, -18.0000, 27.1492),
+    (50.0000, 2.5000, 0.0000, 61.0000, -5.0000, 29.0000, 22.8977),
+    (50.0000, 2.5000, 0.0000, 56.0000, -27.0000, -3.0000, 31.9030),
+    (50.0000, 2.5000, 0.0000, 58.0000, 24.0000, 15.0000, 19.4535),
+    (50.0000, 2.5000, 0.0000, 50.0000, 3.1736, 0.5854, 1.0000),
+    (50.0000, 2.5000, 0.0000, 50.0000, 3.2972, 0.0000, 1.0000),
+    (50.0000, 2.5000, 0.0000, 50.0000, 1.8634, 0.5757, 1.0000),
+    (50.0000, 2.5000, 0.0000, 50.0000, 3.2592, 0.3350, 1.0000),
+    (60.2574, -34.0099, 36.2677, 60.4626, -34.1751, 39.4387, 1.2644),
+    (63.0109, -31.0961, -5.8663, 62.8187, -29.7946, -4.0864, 1.2630),
+    (61.2901, 3.7196, -5.3901, 61.4292, 2.2480, -4.9620, 1.8731),
+    (35.0831, -44.1164, 3.7933, 35.0232, -40.0716, 1.5901, 1.8645),
+    (22.7233, 20.0904, -46.6940, 23.0331, 14.9730, -42.5619, 2.0373),
+    (36.4612, 47.8580, 18.3852, 36.2715, 50.5065, 21.2231, 1.4146),
+    (90.8027, -2.0831, 1.4410, 91.1528, -1.6435, 0.0447, 1.4441),
+    (90.9257, -0.5406, -0.9208, 88.6381, -0.8985, -0.7239, 1.5381),
+    (6.7747, -0.2908, -2.4247, 5.8714, -0.0985, -2.2286, 0.6377),
+    (2.0776, 0.0795, -1.1350, 0.9033, -0.0636, -0.5514, 0.9082),
+])
+TOLERANCIA = 1e-4  # METADE DA ÚLTIMA CASA DA TABELA, COM FOLGA PARA O float32
+
+
+def delta_e_2000_referencia(lab1, lab2):
+    # VERSÃO DIRETA DA FÓRMULA, EM GRAUS: ΔE2000 ENTRE LINHAS DE lab1 (N×3) E lab2 (N×3 OU UMA ÚNICA COR 3)
+    # (float32 COMO NO CATÁLOGO; NO EMPATE |Δh| = 180° O np.where COM <= 180 DEPENDE DO ARREDONDAMENTO DAS
+    # MATIZES: EM float64 O PAR 14 DE SHARMA CAI DO OUTRO LADO)
+    lab1 = np.asarray(lab1, dtype=np.float32)
+    lab2 = np.asarray(lab2, dtype=np.float32)
+    L1, a1, b1 = lab1[..., 0], lab1[..., 1], lab1[..., 2]
+    L2, a2, b2 = lab2[..., 0], lab2[..., 1], lab2[..., 2]
+
+    # CROMA E MATIZ COM A CORREÇÃO G DO EIXO a
+    c_media = (np.hypot(a1, b1) + np.hypot(a2, b2)) / 2
+    c7 = c_media ** 7
+    g = 0.5 * (1 - np.sqrt(c7 / (c7 + 25.0 ** 7)))
+    a1p = (1 + g) * a1
+    a2p = (1 + g) * a2
+    c1p = np.hypot(a1p, b1)
+    c2p = np.hypot(a2p, b2)
+    h1p = np.degrees(np.arctan2(b1, a1p)) % 360
+    h2p = np.degrees(np.arctan2(b2, a2p)) % 360
+    sem_croma = (c1p * c2p) == 0
+
+    # DIFERENÇAS
+    dl = L2 - L1
+    dc = c2p - c1p
+    dh = h2p - h1p
+    dh = np.where(dh > 180, dh - 360, np.where(dh < -180, dh + 360, dh))
+    dh = np.where(sem_croma, 0, dh)
+    dh_grande = 2 * np.sqrt(c1p * c2p) * np.sin(np.radians(dh) / 2)
+
+    # MÉDIAS
+    l_media = (L1 + L2) / 2
+    cp_media = (c1p + c2p) / 2
+    soma_h = h1p + h2p
+    h_media = np.where(np.abs(h1p - h2p) <= 180, soma_h / 2,
+                       np.where(soma_h < 360, (soma_h + 360) / 2, (soma_h - 360) / 2))
+    h_media = np.where(sem_croma, soma_h, h_media)
+
+    # PESOS
+    t = (1 - 0.17 * np.cos(np.radians(h_media - 30))
+         + 0.24 * np.cos(np.radians(2 * h_media))
+         + 0.32 * np.cos(np.radians(3 * h_media + 6))
+         - 0.20 * np.cos(np.radians(4 * h_media - 63)))
+    d_theta = 30 * np.exp(-((h_media - 275) / 25) ** 2)
+    cp7 = cp_media ** 7
+    r_c = 2 * np.sqrt(cp7 / (cp7 + 25.0 ** 7))
+    l50 = (l_media - 50) ** 2
+    s_l = 1 + 0.015 * l50 / np.sqrt(20 + l50)
+    s_c = 1 + 0.045 * cp_media
+    s_h = 1 + 0.015 * cp_media * t
+    r_t = -np.sin(np.radians(2 * d_theta)) * r_c
+
+    termo_l = dl / s_l
+    termo_c = dc / s_c
+    termo_h = dh_grande / s_h
+    return np.sqrt(termo_l ** 2 + termo_c ** 2 + termo_h ** 2 + r_t * termo_c * termo_h)
+
+
+def _conferir(nome, calculado):
+    esperado = PARES_SHARMA[:, 6]
+    erros = np.flatnonzero(np.abs(calculado - esperado) > TOLERANCIA)
+    assert not len(erros), (f"{nome}: pares {(erros + 1).tolist()} esperavam {esperado[erros].tolist()}, "
+                            f"deram {np.round(calculado[erros], 4).tolist()}")
+
+
+def teste_referencia():
+    _conferir("delta_e_2000_referencia", delta_e_2000_referencia(PARES_SHARMA[:, :3], PARES_SHARMA[:, 3:6]))
+
+
+def teste_colunas():
+    # CADA PAR NOS DOIS SENTIDOS: A COR DAS colunas E A REFERÊNCIA TROCAM DE LUGAR
+    for nome, cores, referencias in (("delta_e_2000_colunas", PARES_SHARMA[:, :3], PARES_SHARMA[:, 3:6]),
+                                     ("delta_e_2000_colunas (invertido)", PARES_SHARMA[:, 3:6], PARES_SHARMA[:, :3])):
+        calculado = np.array([delta_e_2000_colunas(colunas_delta_e(cor), [referencia])[0, 0]
+                              for cor, referencia in zip(cores, referencias)])
+        _conferir(nome, calculado)
+
+
+def teste_colunas_igual_referencia():
+    # CORES ALEATÓRIAS (E QUASE CINZAS) CONTRA POUCAS REFERÊNCIAS, COMO NO RANKING DO CATÁLOGO
+    gerador = np.random.default_rng(2005)
+    cores = np.concatenate([gerador.uniform([0, -100, -100], [100, 100, 100], (20000, 3)),
+                            gerador.uniform([0, -0.01, -0.01], [100, 0.01, 0.01], (2000, 3))]).astype(np.float32)
+    referencias = gerador.uniform([0, -100, -100], [100, 100, 100], (3, 3)).astype(np.float32)
+    calculado = delta_e_2000_colunas(colunas_delta_e(cores), referencias)
+    esperado = np.stack([delta_e_2000_referencia(cores, referencia) for referencia in referencias])
+    diferenca = float(np.abs(calculado - esperado).max())
+    assert diferenca < 1e-3, f"diferença máxima {diferenca}"
+
+
+if __name__ == "__main__":
+    for teste in (teste_referencia, teste_colunas, teste_colunas_igual_referencia):
+        teste()
+        print(f"{teste.__name__}: ok")
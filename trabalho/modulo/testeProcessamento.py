@@ -1,11 +1,14 @@
 import os
-from tkinter import filedialog
-from tkinter import Tk
 import cv2
 from processamento import extrair_dados_da_imagem, visualizar_resultados
+from modelos import obter_pool
+from depuracao import SaidaJanela
 from recomendacao import recomendar_roupas
 
 if __name__ == "__main__":
+    from tkinter import filedialog
+    from tkinter import Tk
+
     # Cria a janela para escolher o arquivo
     Tk().withdraw()  # Oculta a janela principal do tkinter
     caminho = filedialog.askopenfilename(title="Selecione a imagem",
@@ -19,7 +22,10 @@ if __name__ == "__main__":
         if imagem is None:
             print("Erro ao carregar a imagem")
         else:
-            medidas, resultado = extrair_dados_da_imagem(imagem)
+            janelas = SaidaJanela()
+            with obter_pool().emprestar() as modelos:
+                analise, resultado = extrair_dados_da_imagem(imagem, modelos, depuracao=janelas)
+            medidas = analise.como_dict()
 
             print("Medidas extraídas:")
             for k, v in medidas.items():
@@ -33,4 +39,6 @@ if __name__ == "__main__":
                                       medidas['pouco_cabelo'],
                                       tom_de_cabelo,
                                       medidas['tom_de_olho'])
-            recomendar_roupas(medidas)
+            cores, estacao = recomendar_roupas(medidas, depuracao=janelas)
+            print(f"Estação: {estacao} ({len(cores)} cores)")
+            janelas.aguardar()
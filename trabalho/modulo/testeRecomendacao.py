@@ -1,3 +1,7 @@
+from exemplos import MEDIDAS_EXEMPLO
 from recomendacao import recomendar_roupas
 
-recomendar_roupas()
\ No newline at end of file
+cores, estacao = recomendar_roupas(MEDIDAS_EXEMPLO)
+print(f"Estação: {estacao} ({len(cores)} cores)")
+for cor in cores:
+    print(cor)
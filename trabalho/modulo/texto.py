@@ -0,0 +1,62 @@
+"""Texto com acentos sobre imagens do OpenCV (o cv2.putText só desenha ASCII).
+
+As fontes são carregadas uma vez por processo e tamanho (lru_cache), com
+alternativas para máquinas sem a Arial: DejaVu Sans/Liberation Sans e, por
+fim, a fonte embutida no Pillow. Todos os textos de uma imagem são desenhados
+numa única passada do PIL, direto nos canais BGR (a cor também é passada em
+BGR), sem converter a imagem para RGB e de volta.
+"""
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+FONTES = ('arial.ttf', 'Arial.ttf', 'DejaVuSans.ttf', 'LiberationSans-Regular.ttf')
+PASTAS_FONTES = ('/usr/share/fonts/truetype/dejavu', '/usr/share/fonts/TTF', '/usr/share/fonts/dejavu',
+                 '/usr/share/fonts/truetype/liberation', '/Library/Fonts', 'C:\\Windows\\Fonts')
+
+# DESLOCAMENTOS DO "NEGRITO" (O TEXTO É DESENHADO EM CADA UM E DEPOIS NO LUGAR)
+CONTORNO = ((-1, -1), (1, 1))
+
+
+@dataclass(slots=True, frozen=True)
+class Texto:
+    texto: str
+    posicao: tuple
+    cor: tuple = (0, 0, 0)  # BGR
+    tamanho: int = 20
+    negrito: bool = True
+
+
+@lru_cache(maxsize=None)
+def carregar_fonte(tamanho):
+    # PRIMEIRA FONTE DISPONÍVEL: PELO NOME (PASTAS DO SISTEMA), NAS PASTAS CONHECIDAS, OU A EMBUTIDA
+    for nome in FONTES:
+        for caminho in (nome, *(os.path.join(pasta, nome) for pasta in PASTAS_FONTES)):
+            try:
+                return ImageFont.truetype(caminho, tamanho)
+            except OSError:
+                continue
+    try:
+        return ImageFont.load_default(size=tamanho)  # Pillow >= 10.1
+    except TypeError:
+        return ImageFont.load_default()
+
+
+def desenhar_textos(imagem, textos):
+    """Desenha todos os `textos` (lista de Texto) na imagem BGR, no próprio array. Retorna a imagem."""
+    if not textos:
+        return imagem
+    img_pil = Image.fromarray(imagem)
+    draw = ImageDraw.Draw(img_pil)
+    for item in textos:
+        fonte = carregar_fonte(item.tamanho)
+        x, y = item.posicao
+        if item.negrito:
+            for dx, dy in CONTORNO:
+                draw.text((x + dx, y + dy), item.texto, font=fonte, fill=item.cor)
+        draw.text((x, y), item.texto, font=fonte, fill=item.cor)
+    imagem[...] = np.asarray(img_pil)
+    return imagem
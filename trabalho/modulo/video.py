@@ -0,0 +1,231 @@
+"""Análise contínua de um vídeo ou da câmera.
+
+Os modelos rodam em modo de rastreamento (static_image_mode=False), quadros são
+pulados conforme o custo medido para manter o FPS alvo, e os tons de pele,
+cabelo e olhos são suavizados numa janela deslizante com rejeição de outliers.
+Assim que a janela tem amostras e tempo suficientes, as medidas estáveis são
+classificadas com as mesmas regras da análise de foto (classificar_tons).
+
+Uso:
+    python video.py 0                      # câmera 0
+    python video.py clipe.mp4 --fps 8 -o medidas.json
+    python video.py 0 --mostrar            # janela com o quadro analisado
+"""
+import argparse
+import json
+import math
+import statistics
+import sys
+import time
+from collections import Counter, deque
+
+import cv2
+import numpy as np
+
+from cores import bgr_para_lab_cie
+from modelos import ConjuntoModelos
+from processamento import classificar_tipo_corpo, classificar_tons, extrair_dados_da_imagem
+from recomendacao import classificar_estacao
+from resultado import TONS, ResultadoAnalise
+
+CORPO = ('altura_total', 'largura_ombros', 'proporcao', 'largura_quadril')
+
+# UMA AMOSTRA É OUTLIER SE ESTIVER A MAIS DE max(K_MAD × MAD, DELTA_MINIMO) DA MEDIANA (ΔE EM L*a*b*)
+K_MAD = 2.5
+DELTA_MINIMO = 4.0
+
+
+def tom_robusto(amostras):
+    """Média BGR das amostras que sobram depois de descartar as distantes da mediana (em L*a*b*).
+
+    Retorna (tom, quantas foram usadas) ou (None, 0) sem amostras.
+    """
+    if not amostras:
+        return None, 0
+    bgr = np.asarray(amostras, dtype=np.float32)
+    lab = bgr_para_lab_cie(bgr)
+    distancias = np.linalg.norm(lab - np.median(lab, axis=0), axis=1)
+    mad = np.median(np.abs(distancias - np.median(distancias)))
+    aceitas = distancias <= max(K_MAD * mad, DELTA_MINIMO)
+    tom = np.round(bgr[aceitas].mean(axis=0))
+    return tuple(int(c) for c in tom), int(aceitas.sum())
+
+
+class SuavizadorMedidas:
+    """Janela deslizante com as medidas dos últimos quadros analisados."""
+
+    def __init__(self, janela=30, min_amostras=12, segundos_minimos=3.0):
+        self.min_amostras = min_amostras
+        self.segundos_minimos = segundos_minimos
+        self._amostras = deque(maxlen=janela)  # (instante, ResultadoAnalise)
+
+    def __len__(self):
+        return len(self._amostras)
+
+    def adicionar(self, instante, analise):
+        self._amostras.append((instante, analise))
+
+    def estavel(self):
+        # AMOSTRAS SUFICIENTES, COBRINDO PELO MENOS segundos_minimos
+        if len(self._amostras) < self.min_amostras:
+            return False
+        return self._amostras[-1][0] - self._amostras[0][0] >= self.segundos_minimos
+
+    def medidas(self):
+        """ResultadoAnalise com os tons suavizados e o contraste/subtom/estação recalculados (ou None)."""
+        analises = [analise for _, analise in self._amostras]
+        if not analises:
+            return None
+
+        resultado = ResultadoAnalise()
+        for campo in TONS:
+            tom, _ = tom_robusto([getattr(a, campo) for a in analises if getattr(a, campo) is not None])
+            setattr(resultado, campo, tom)
+
+        # CABELO: DECIDE PELA MAIORIA DOS QUADROS
+        resultado.pouco_cabelo = sum(bool(a.pouco_cabelo) for a in analises) * 2 > len(analises)
+        if resultado.pouco_cabelo:
+            resultado.tom_de_cabelo = None
+
+        for campo in CORPO:
+            valores = [getattr(a, campo) for a in analises if getattr(a, campo) is not None]
+            if valores:
+                setattr(resultado, campo, round(statistics.median(valores), 2))
+        if None not in (resultado.largura_ombros, resultado.largura_quadril, resultado.proporcao):
+            resultado.tipo_corpo = classificar_tipo_corpo(resultado.largura_ombros,
+                                                          resultado.largura_quadril,
+                                                          resultado.proporcao)
+
+        formatos = Counter(a.formato_rosto for a in analises if a.formato_rosto is not None)
+        if formatos:
+            resultado.formato_rosto = formatos.most_common(1)[0][0]
+
+        if resultado.tom_de_pele is None or resultado.tom_de_olho is None:
+            return None
+        return classificar_tons(resultado)
+
+
+class AnalisadorVideo:
+    """Analisa quadros em ordem, pulando o que for preciso para manter `fps_alvo` análises por segundo."""
+
+    def __init__(self, fps_alvo=10, janela=30, min_amostras=12, segundos_minimos=3.0, modelos=None):
+        self.intervalo_alvo = 1 / fps_alvo
+        self.modelos = modelos or ConjuntoModelos(estatico=False)
+        self.suavizador = SuavizadorMedidas(janela, min_amostras, segundos_minimos)
+        self.custo_medio = self.intervalo_alvo  # média móvel do tempo de uma análise (s)
+        self.analisados = 0
+        self.falhas = 0
+
+    def fechar(self):
+        self.modelos.fechar()
+
+    def processar(self, quadro, instante):
+        # ANALISA UM QUADRO (instante em segundos); RETORNA A ResultadoAnalise DELE OU None
+        inicio = time.perf_counter()
+        try:
+            analise, _ = extrair_dados_da_imagem(quadro, self.modelos)
+        except ValueError:  # rosto fora do quadro, desfocado...
+            analise = None
+            self.falhas += 1
+        else:
+            self.analisados += 1
+            self.suavizador.adicionar(instante, analise)
+        self.custo_medio = 0.8 * self.custo_medio + 0.2 * (time.perf_counter() - inicio)
+        return analise
+
+    def quadros_a_pular(self, fps_fonte):
+        # QUANTOS QUADROS DA FONTE CABEM NO TEMPO DE UMA ANÁLISE (OU NO INTERVALO ALVO, SE FOR MAIOR)
+        if not fps_fonte or fps_fonte <= 0:
+            return 0
+        return max(0, math.ceil(max(self.custo_medio, self.intervalo_alvo) * fps_fonte) - 1)
+
+
+def analisar_video(fonte, fps_alvo=10, duracao_maxima=15.0, segundos_minimos=3.0, janela=30,
+                   min_amostras=12, mostrar=False):
+    """Lê `fonte` (caminho ou índice da câmera) até as medidas estabilizarem ou `duracao_maxima` segundos.
+
+    Retorna (ResultadoAnalise ou None, estatísticas do processamento).
+    """
+    captura = cv2.VideoCapture(fonte)
+    if not captura.isOpened():
+        raise OSError(f"Não foi possível abrir '{fonte}'")
+
+    camera = isinstance(fonte, int)
+    fps_fonte = captura.get(cv2.CAP_PROP_FPS) or 30.0
+    analisador = AnalisadorVideo(fps_alvo, janela, min_amostras, segundos_minimos)
+    inicio = time.perf_counter()
+    pulados = 0
+    try:
+        while True:
+            ok, quadro = captura.read()
+            if not ok:
+                break
+
+            # TEMPO DO VÍDEO PARA ARQUIVOS; RELÓGIO DE PAREDE PARA A CÂMERA
+            instante = time.perf_counter() - inicio if camera else captura.get(cv2.CAP_PROP_POS_MSEC) / 1000
+            analise = analisador.processar(quadro, instante)
+
+            if mostrar:
+                cor = (0, 255, 0) if analise is not None else (0, 0, 255)
+                cv2.putText(quadro, f"{len(analisador.suavizador)} amostras", (20, 40),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1, cor, 2)
+                cv2.imshow("Analise de video", quadro)
+                if cv2.waitKey(1) & 0xFF in (27, ord('q')):
+                    break
+
+            if analisador.suavizador.estavel() or instante >= duracao_maxima:
+                break
+
+            # grab() AVANÇA SEM DECODIFICAR: OS QUADROS PULADOS QUASE NÃO CUSTAM
+            for _ in range(analisador.quadros_a_pular(fps_fonte)):
+                if not captura.grab():
+                    break
+                pulados += 1
+
+        estatisticas = {
+            'analisados': analisador.analisados,
+            'falhas': analisador.falhas,
+            'pulados': pulados,
+            'estavel': analisador.suavizador.estavel(),
+            'segundos': round(time.perf_counter() - inicio, 3),
+            'ms_por_analise': round(analisador.custo_medio * 1000, 1),
+        }
+        return analisador.suavizador.medidas(), estatisticas
+    finally:
+        captura.release()
+        analisador.fechar()
+        if mostrar:
+            cv2.destroyAllWindows()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Análise de coloração pessoal a partir de vídeo ou câmera.")
+    parser.add_argument("fonte", help="arquivo de vídeo ou índice da câmera (ex.: 0)")
+    parser.add_argument("--fps", type=float, default=10, help="análises por segundo desejadas")
+    parser.add_argument("--duracao", type=float, default=15.0, help="tempo máximo de leitura (s)")
+    parser.add_argument("--estabilizar", type=float, default=3.0,
+                        help="segundos mínimos de amostras antes de emitir o resultado")
+    parser.add_argument("-o", "--saida", default="-", help="arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument("--mostrar", action="store_true", help="mostra os quadros analisados")
+    args = parser.parse_args(argv)
+
+    fonte = int(args.fonte) if args.fonte.isdigit() else args.fonte
+    analise, estatisticas = analisar_video(fonte, args.fps, args.duracao, args.estabilizar, mostrar=args.mostrar)
+    print(json.dumps(estatisticas, ensure_ascii=False), file=sys.stderr)
+    if analise is None:
+        print("Nenhum rosto analisado de forma estável.", file=sys.stderr)
+        return 1
+
+    medidas = analise.como_dict()
+    medidas['estação'] = classificar_estacao(medidas)
+    texto = json.dumps(medidas, ensure_ascii=False)
+    if args.saida == "-":
+        print(texto)
+    else:
+        with open(args.saida, "w", encoding="utf-8") as saida:
+            saida.write(texto + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())